@@ -9,17 +9,16 @@ import math
 from dotenv import load_dotenv
 from flask import (
     Flask, render_template, request, jsonify, session, redirect, url_for,
-    flash, Response, send_file, stream_with_context,
+    flash, Response, send_file, stream_with_context, g, has_request_context,
 )
 import json
-from supabase import create_client, Client
+from supabase import create_client
 from datetime import datetime, timedelta, timezone, date, time
 from functools import wraps
 import requests
 import re
 import pandas as pd
 import numpy as np
-from ortools.sat.python import cp_model
 import uuid
 import mwparserfromhell
 import bleach
@@ -29,11 +28,30 @@ from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from collections import defaultdict
 from group_history import (
-    canonical_pair_key as _canonical_pair_key,
-    meeting_details_from_history as _meeting_details_from_history,
-    pair_keys_from_groups as _pair_keys_from_groups,
+    day_ordinal as _day_ordinal,
+    latest_matching_grouping as _latest_matching_grouping,
     matrix_rows_from_history as _matrix_rows_from_history,
+    matrix_drift as _matrix_drift,
+    no_show_names_by_session as _no_show_names_by_session,
+    with_excluded_names as _with_excluded_names,
 )
+from grouping_problem import (
+    MIN_GROUP_SIZE,
+    build_grouping_problem,
+    grouping_objectives,
+    grouping_signature,
+    score_grouping,
+)
+from grouping_local_search import local_search_groupings, repair_groups, repair_neighborhood
+from grouping_jobs import GroupingJobStore, format_sse, grouping_job_key
+from grouping_cache import GroupingResultCache, HistoryRowsCache, HistoryVersion, grouping_cache_key
+from grouping_feasibility import find_infeasibility
+from co_matrix import CoMatrix
+from history_index import HistoryIndex
+from supabase_pages import iter_rows as _iter_rows, read_all as _read_all, rpc_rows as _rpc_rows
+from query_coalescing import CoalescingClient, QueryScope
+from grouping_index import MAX_BATCH as SCORE_BATCH_LIMIT, GroupingIndex, SharedGroupingIndex
+from term_planner import expected_session_attendees, plan_term_groupings, planned_repeat_count
 from topic_preview import anonymous_topic_previews
 from topic_document import number_topic_submissions, topic_submitter_identity
 from seminar_absence import normalize_member_ids
@@ -70,7 +88,32 @@ PUBLIC_BASE_URL = os.environ.get(
 ).rstrip("/")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Supabase URL과 Key가 .env 파일에 설정되지 않았습니다.")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+def _request_query_scope():
+    """현재 요청의 Supabase 조회 기억. 요청 밖(작업 스레드 등)에서는 None."""
+    if not has_request_context():
+        return None
+    if 'supabase_queries' not in g:
+        g.supabase_queries = QueryScope()
+    return g.supabase_queries
+
+
+# 같은 요청 안의 같은 조회는 한 번만 보낸다(query_coalescing).
+supabase = CoalescingClient(create_client(SUPABASE_URL, SUPABASE_KEY), _request_query_scope)
+
+
+@app.after_request
+def report_supabase_queries(response):
+    """요청에서 실제로 보낸 Supabase 조회 수와 기억으로 답한 수를 헤더와 디버그 로그로 남긴다."""
+    scope = g.get('supabase_queries')
+    if scope is not None:
+        stats = scope.stats()
+        response.headers['X-Supabase-Queries'] = (
+            f"issued={stats['issued']}, hits={stats['hits']}, merged={stats['merged']}"
+        )
+        app.logger.debug("[supabase] %s %s", request.path, stats)
+    return response
 
 
 @app.context_processor
@@ -1628,7 +1671,7 @@ def _load_group_pair_restriction_rows():
 def _restricted_name_pairs(member_rows=None):
     restrictions = _load_group_pair_restriction_rows()
     if member_rows is None:
-        member_rows = supabase.table('members').select('id, name').execute().data or []
+        member_rows = _read_all(supabase, 'members', 'id, name')
     return restricted_pairs_from_rows(restrictions, member_rows)
 
 
@@ -1693,9 +1736,10 @@ def bookclub_index():
     pair_restrictions = []
 
     try:
-        all_active_members_res = supabase.table("members").select("id, name, student_id, department, gender") \
-            .eq('is_active', True).order("name").execute()
-        all_active_members = all_active_members_res.data or []
+        all_active_members = sorted(
+            _read_all(supabase, 'members', 'id, name, student_id, department, gender',
+                      where=lambda q: q.eq('is_active', True)),
+            key=lambda m: m.get('name') or '')
         for member in all_active_members:
             member['gender_code'] = normalize_gender(member.get('gender'))
         active_member_ids = {member['id'] for member in all_active_members}
@@ -1827,23 +1871,54 @@ def bookclub_index():
     )
 
 
-@app.route('/start_group_generation')
+@app.route('/making_team/results')
 @login_required(role="admin")
-def start_group_generation():
-    # --- [수정] 로그 추가 ---
-    app.logger.info("\n---/start_group_generation 경로 함수 실행 시작---")
+def bookclub_results():
+    """추천안이 도착하는 대로 카드를 그리는 결과 페이지.
+
+    페이지가 같은 쿼리로 POST /jobs 작업을 만들고 /jobs/<id>/events SSE를 연다.
+    회원 성별·만남 기록은 context 이벤트로, 추천안은 solution 이벤트로 받는다.
+    주소에 job이 있으면(새로고침) 그 작업의 이벤트를 처음부터 다시 받는다.
+    """
     present_names = request.args.getlist('present')
-    facilitator_names = request.args.getlist('facilitators')
-    group_count_str = request.args.get('group_count')
-    group_names_str = request.args.get('group_names', '')
-    seminar_session_id = (request.args.get('seminar_session_id') or '').strip() or None
-    meeting_date = (request.args.get('meeting_date') or '').strip() or None
+    present_set = set(present_names)
+    group_names = [
+        name.strip() for name in request.args.get('group_names', '').split(',') if name.strip()
+    ]
+    return render_template(
+        'bookclub_ga_results.html',
+        combined_solutions=[],
+        streaming=True,
+        stream_query=request.query_string.decode('utf-8'),
+        stream_job_id=request.args.get('job'),
+        present=present_names,
+        facilitators=[name for name in request.args.getlist('facilitators') if name in present_set],
+        group_names=group_names,
+        meeting_history={},
+        member_genders={},
+        manual_entry_url=url_for('manual_entry'),
+        seminar_session_id=(request.args.get('seminar_session_id') or '').strip() or None,
+        meeting_date=(request.args.get('meeting_date') or '').strip() or None,
+        book_title=None,
+    )
+
+
+def _grouping_params_from_args(args):
+    """조 편성 요청 파라미터를 정리한다. 선택한 세미나 회차가 없으면 None."""
+    present_names = args.getlist('present')
+    facilitator_names = args.getlist('facilitators')
+    group_count_str = args.get('group_count')
+    seminar_session_id = (args.get('seminar_session_id') or '').strip() or None
+    meeting_date = (args.get('meeting_date') or '').strip() or None
+    engine = (args.get('engine') or 'cp_sat').strip()
+    if engine not in GROUPING_ENGINES:
+        engine = 'cp_sat'
     session_book_title = None
     if seminar_session_id:
         selected_session = supabase.table('seminar_sessions').select('meeting_date, book_title') \
             .eq('id', seminar_session_id).single().execute().data
         if not selected_session:
-            return jsonify({'error': '선택한 세미나 회차를 찾을 수 없습니다.'}), 404
+            return None
         meeting_date = selected_session['meeting_date']
         session_book_title = selected_session.get('book_title')
 
@@ -1857,124 +1932,259 @@ def start_group_generation():
 
     app.logger.info(f"[1] 전달받은 참석자 명단 (총 {len(present_names)}명): {present_names}")
     app.logger.info(f"[2] 전달받은 발제자 명단: {facilitator_names}")
-    app.logger.info(f"[3] 전달받은 그룹 수: '{group_count_str}'")
-    # --- [수정 끝] ---
+    app.logger.info(f"[3] 전달받은 그룹 수: '{group_count_str}', 엔진: {engine}")
+    return {
+        'present': present_names,
+        'facilitators': facilitator_names,
+        'group_count_override': int(group_count_str) if group_count_str and group_count_str.isdigit() else None,
+        'seminar_session_id': seminar_session_id,
+        'meeting_date': meeting_date,
+        'book_title': session_book_title,
+        'engine': engine,
+        'manual_entry_url': url_for('manual_entry'),
+    }
 
-    manual_entry_url = url_for('manual_entry')
 
-    def generate_events(manual_url):
-        try:
-            app.logger.info("[4] DB에서 전체 회원 및 히스토리 데이터 로드 시작")
-            members_res = supabase.table("members").select("*").order("name").execute().data
-            members_df = pd.DataFrame(members_res)
-            effective_history_rows = _effective_group_history_rows()
-            app.logger.info(f"[5] 데이터 로드 완료: 회원 {len(members_df)}명, 히스토리 {len(effective_history_rows)}건")
-            restricted_pairs = _restricted_name_pairs(members_res)
-            app.logger.info("[5.5] 비공개 편성 제한 %d건 적용", len(restricted_pairs))
+def _submit_grouping_job(params):
+    """같은 참석자·발제자·조 수·엔진·회차의 작업이 진행 중이면 그 작업에 합류한다."""
+    key = grouping_job_key(
+        params['present'], params['facilitators'], params['group_count_override'],
+        engine=params['engine'], seminar_session_id=params['seminar_session_id'],
+    )
+    return grouping_jobs.submit(key, lambda job: _run_grouping_job(job, params))
+
+
+def _run_grouping_job(job, params):
+    """작업 풀에서 실행된다: context → progress/solution → complete 순서로 이벤트를 기록한다."""
+    present_names = params['present']
+    facilitator_names = params['facilitators']
+    present_set = set(present_names)
+    # 이력을 읽기 전에 버전을 잡아야, 읽는 도중 저장된 기록의 결과가 새 버전으로 캐시되지 않는다.
+    history_version = grouping_history_version.current()
+
+    app.logger.info("[4] DB에서 전체 회원 및 히스토리 데이터 로드 시작")
+    # 회원 표는 max-rows보다 길어질 수 있으므로 id 순으로 나눠 읽고 이름순으로 다시 정렬한다.
+    members_res = sorted(_read_all(supabase, 'members', '*'), key=lambda m: m.get('name') or '')
+    members_df = pd.DataFrame(members_res)
+    effective_history_rows = _effective_group_history_rows()
+    app.logger.info(f"[5] 데이터 로드 완료: 회원 {len(members_df)}명, 히스토리 {len(effective_history_rows)}건")
+    restricted_pairs = _restricted_name_pairs(members_res)
+    app.logger.info("[5.5] 비공개 편성 제한 %d건 적용", len(restricted_pairs))
+
+    # 저장된 계획표가 아니라 실제 참석 기준으로 즉시 계산한다.
+    # 회차에 등록된 미연락 불참자는 해당 날짜의 만남에서 자동 제외된다.
+    # 솔버와 결과 카드에는 참석자끼리의 쌍만 필요하므로 그 쌍만 DB에서 집계해 받는다.
+    pair_rows = _attendee_pair_rows(present_names)
+    co_matrix = {row['pair_key']: row['count'] for row in pair_rows}
+    meeting_history = {
+        row['pair_key']: {
+            'count': row['count'],
+            'days': [_day_ordinal(day) for day in row.get('days') or []],
+        }
+        for row in pair_rows
+    }
+    app.logger.info(f"[6] co_matrix {len(co_matrix)}개 항목, 참석자 만남 기록 {len(meeting_history)}쌍")
+    # 같은 명단으로 저장한 직전 편성은 솔버의 출발점(힌트)으로 쓴다.
+    previous_groups = _latest_matching_grouping(
+        effective_history_rows, present_names, params['seminar_session_id'],
+    )
+    # 학기 계획에서 미리 만든 회차 초안은 저장된 편성이 없을 때의 출발점이 된다.
+    plan_groups = _load_group_plan_groups(params['seminar_session_id'])
+    if previous_groups is None and plan_groups:
+        previous_groups = plan_groups
+
+    # 결과 페이지가 카드를 직접 그리는 데 필요한 정보는 솔버를 돌리기 전에 한 번만 보낸다.
+    # 'M'/'W'로 비교하므로 정규화된 성별을 보낸다.
+    member_genders = {
+        row['name']: normalize_gender(row.get('gender'))
+        for row in members_df.to_dict(orient='records')
+        if row['name'] in present_set
+    }
+    job.publish('context', {
+        'present': present_names,
+        'facilitators': facilitator_names,
+        'meeting_history': meeting_history,
+        'member_genders': member_genders,
+        'seminar_session_id': params['seminar_session_id'],
+        'meeting_date': params['meeting_date'],
+        'book_title': params['book_title'],
+        'manual_entry_url': params['manual_entry_url'],
+    })
+    job.publish('progress', {'progress': 10})
+    job.raise_if_cancelled()
+
+    # 문제는 여기서 한 번만 만들고 검사한다. 엔진은 만들어진 문제를 받아 풀기만 한다.
+    # 제약끼리 모순이면 솔버를 띄우지 않고 어떤 조건이 충돌하는지 바로 알린다.
+    problem, infeasibility = _prepare_grouping_problem(
+        members_df, co_matrix, present_names, facilitator_names,
+        params['group_count_override'], restricted_pairs,
+    )
+    if infeasibility:
+        job.publish('error', {
+            'error': ' '.join(item['message'] for item in infeasibility),
+            'conflicts': infeasibility,
+        })
+        return
 
-            group_count_override = None
-            if group_count_str and group_count_str.isdigit():
-                group_count_override = int(group_count_str)
+    engine = params['engine']
+    app.logger.info(f"[7] '종합 최적화(단일)' {engine} 알고리즘 실행 시작")
+    grouping_runner = {
+        'local_search': run_local_search_grouping,
+        'set_partition': run_set_partition_grouping,
+        'pareto': run_pareto_grouping,
+    }.get(engine, run_cp_grouping)
+
+    last_sent_pct = [10]
+    solution_ids = {}
+
+    def progress_callback(pct):
+        # 진행률은 단조 증가만 기록한다.
+        if pct > last_sent_pct[0]:
+            last_sent_pct[0] = pct
+            job.publish('progress', {'progress': pct})
+
+    def solution_callback(result):
+        signature = grouping_signature(result['groups'])
+        if signature in solution_ids:
+            return
+        solution_ids[signature] = len(solution_ids)
+        solution = {
+            'id': solution_ids[signature],
+            'groups': result['groups'],
+            'score': result['score'],
+            'details': result['details'],
+        }
+        if result.get('tag'):
+            # 파레토 모드: 성비 우선 / 균형 / 새만남 우선 중 어떤 절충안인지
+            # 학기 계획 초안을 고친 안은 'plan'
+            solution['tag'] = result['tag']
+            solution['objectives'] = result['objectives']
+        job.publish('solution', solution)
+
+    # 학기 초안이 있으면 실제 참석자에 맞게 고친 안을 솔버보다 먼저 보낸다.
+    plan_result = None
+    if plan_groups and problem is not None:
+        repaired = repair_groups(problem, plan_groups)
+        if repaired:
+            imbalance, penalty = grouping_objectives(problem, repaired)
+            plan_result = {
+                **score_grouping(problem, repaired),
+                'tag': 'plan',
+                'objectives': {'gender_imbalance': imbalance, 'repeat_penalty': penalty},
+            }
+            solution_callback(plan_result)
 
-            # 저장된 계획표가 아니라 실제 참석 기준으로 즉시 계산한다.
-            # 회차에 등록된 미연락 불참자는 해당 날짜의 만남에서 자동 제외된다.
-            calculated_matrix = _matrix_rows_from_history(effective_history_rows)
-            co_matrix = {key: row['count'] for key, row in calculated_matrix.items()}
-            app.logger.info(f"[6] co_matrix {len(co_matrix)}개 항목 로드 완료")
+    cache_key = grouping_cache_key(
+        present_names, facilitator_names, params['group_count_override'], restricted_pairs,
+        'combined', history_version, engine=engine, genders=member_genders,
+        plan=sorted(sorted(group) for group in plan_groups or []),
+    )
+    combined_solutions = grouping_results.get(cache_key)
+    if combined_solutions is not None:
+        app.logger.info(f"[7.5] 캐시된 결과 {len(combined_solutions)}개 사용 (이력 버전 {history_version})")
+    elif problem is None:
+        combined_solutions = []
+    else:
+        combined_solutions = grouping_runner(
+            problem, top_n=12,
+            progress_callback=progress_callback,
+            previous_groups=previous_groups,
+            solution_callback=solution_callback,
+            stop_event=job.stop_event,
+        ) or []
+        job.raise_if_cancelled()
+        if combined_solutions:
+            grouping_results.put(cache_key, combined_solutions)
+    if plan_result is not None:
+        plan_signature = grouping_signature(plan_result['groups'])
+        combined_solutions = [plan_result] + [
+            result for result in combined_solutions
+            if grouping_signature(result['groups']) != plan_signature
+        ]
+    app.logger.info(f"[8] '종합 최적화' 완료, {len(combined_solutions)}개")
 
-            yield f"event: progress\ndata: {json.dumps({'progress': 10})}\n\n"
+    # 최종 순위만 보낸다. 스트리밍된 카드는 이 순서로 다시 정렬되고 나머지는 지워진다.
+    ranking = []
+    for result in combined_solutions:
+        solution_callback(result)
+        ranking.append(solution_ids[grouping_signature(result['groups'])])
+    job.publish('complete', {'ranking': ranking})
+    app.logger.info("[11] 추천안 %d개 기록 완료", len(ranking))
 
-            app.logger.info("[7] '종합 최적화(단일)' CP-SAT 알고리즘 실행 시작")
 
-            # 솔버를 별도 스레드에서 돌리고, 진행률을 큐를 통해 실시간 스트리밍
-            import threading, queue
-            progress_queue = queue.Queue()
+def _grouping_event_stream(job_id, last_event_id=None):
+    for record in grouping_jobs.events(job_id, last_event_id):
+        yield format_sse(record)
 
-            def progress_callback(pct):
-                try:
-                    progress_queue.put(('progress', pct))
-                except Exception:
-                    pass
 
-            solver_result = {'solutions': None, 'error': None}
+def _sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
-            def run_solver():
-                try:
-                    solver_result['solutions'] = run_cp_grouping(
-                        members_df, co_matrix, present_names, facilitator_names,
-                        optimize_for='combined', top_n=12,
-                        group_count_override=group_count_override,
-                        progress_callback=progress_callback,
-                        restricted_pairs=restricted_pairs,
-                    )
-                except Exception as ex:
-                    solver_result['error'] = ex
-                finally:
-                    progress_queue.put(('done', None))
 
-            t = threading.Thread(target=run_solver, daemon=True)
-            t.start()
+@app.route('/jobs', methods=['POST'])
+@login_required(role="admin")
+def create_grouping_job():
+    """조 편성 작업을 만들고 ID를 돌려준다. 결과는 /jobs/<id>/events로 받는다."""
+    params = _grouping_params_from_args(request.form)
+    if params is None:
+        return jsonify({'error': '선택한 세미나 회차를 찾을 수 없습니다.'}), 404
+    job_id, created = _submit_grouping_job(params)
+    return jsonify({
+        'job_id': job_id,
+        'events_url': url_for('grouping_job_events', job_id=job_id),
+        'deduplicated': not created,
+    }), 202
 
-            # 큐를 폴링하면서 진행률을 실시간 yield
-            last_sent_pct = 10
-            while True:
-                try:
-                    kind, payload = progress_queue.get(timeout=30)
-                except queue.Empty:
-                    # heartbeat (SSE 연결 유지)
-                    yield ": keep-alive\n\n"
-                    continue
-                if kind == 'progress':
-                    if payload > last_sent_pct:
-                        last_sent_pct = payload
-                        yield f"event: progress\ndata: {json.dumps({'progress': payload})}\n\n"
-                elif kind == 'done':
-                    break
 
-            t.join()
-            if solver_result['error']:
-                raise solver_result['error']
-            combined_solutions = solver_result['solutions'] or []
-            app.logger.info(f"[8] '종합 최적화' 완료, {len(combined_solutions)}개")
+@app.route('/jobs/<job_id>/events')
+@login_required(role="admin")
+def grouping_job_events(job_id):
+    """작업 이벤트 SSE. 재연결 시 Last-Event-ID 다음 이벤트부터 이어서 보낸다."""
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id) or not grouping_jobs.exists(job_id):
+        return jsonify({'error': '조 편성 작업을 찾을 수 없습니다. 다시 편성해주세요.'}), 404
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return _sse_response(_grouping_event_stream(job_id, last_event_id))
 
-            yield f"event: progress\ndata: {json.dumps({'progress': 90})}\n\n"
 
-            # 결과 페이지에서 'M'/'W'로 비교하므로 정규화된 값으로 전달
-            member_genders = {
-                row['name']: normalize_gender(row.get('gender'))
-                for row in members_df.to_dict(orient='records')
-            }
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+@login_required(role="admin")
+def cancel_grouping_job(job_id):
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id) or not grouping_jobs.exists(job_id):
+        return jsonify({'error': '조 편성 작업을 찾을 수 없습니다.'}), 404
+    grouping_jobs.cancel(job_id)
+    return jsonify({'status': 'ok'})
 
-            meeting_history = _meeting_details_from_history(effective_history_rows)
-
-            app.logger.info("[10] 최종 결과 페이지(HTML) 렌더링 시작")
-            with app.app_context():
-                group_names = [name.strip() for name in group_names_str.split(',') if name.strip()]
-                final_html = render_template(
-                    'bookclub_ga_results.html',
-                    combined_solutions=combined_solutions,
-                    present=present_names,
-                    facilitators=facilitator_names,
-                    group_names=group_names,
-                    meeting_history=meeting_history,
-                    member_genders=member_genders,
-                    manual_entry_url=manual_url,
-                    seminar_session_id=seminar_session_id,
-                    meeting_date=meeting_date,
-                    book_title=session_book_title,
-                )
-                complete_data = json.dumps({'html': final_html})
-                yield f"event: complete\ndata: {complete_data}\n\n"
-            app.logger.info("[11] 성공적으로 최종 HTML을 브라우저로 전송 완료")
 
-        except Exception as e:
-            app.logger.error(f"!!! 조 편성 중 심각한 오류 발생: {e}", exc_info=True)
-            error_data = json.dumps({'error': str(e)})
-            yield f"event: error\ndata: {error_data}\n\n"
+@app.route('/jobs/metrics')
+@login_required(role="admin")
+def grouping_job_metrics():
+    """조 편성 작업 지표: 생성·합류·완료·실패·취소·이탈(구독자 없음) 횟수와 대기열 상태."""
+    return jsonify(grouping_jobs.metrics())
+
+
+@app.route('/start_group_generation')
+@login_required(role="admin")
+def start_group_generation():
+    """기존 GET 진입점. 작업을 만들고(같은 요청이면 합류하고) 그 이벤트를 그대로 중계한다."""
+    app.logger.info("\n---/start_group_generation 경로 함수 실행 시작---")
+    params = _grouping_params_from_args(request.args)
+    if params is None:
+        return jsonify({'error': '선택한 세미나 회차를 찾을 수 없습니다.'}), 404
+    manual_entry_url = params['manual_entry_url']
+
+    def generate_events(manual_url):
+        params['manual_entry_url'] = manual_url
+        job_id, _ = _submit_grouping_job(params)
+        yield from _grouping_event_stream(job_id)
 
     # Response가 generator를 순회하는 시점에는 원래 view 함수가 이미 반환된 뒤다.
-    # 요청 컨텍스트를 스트림 수명 동안 유지해야 결과 템플릿의 header/sidebar가
-    # request와 session을 안전하게 참조할 수 있다.
+    # 요청 컨텍스트를 스트림 수명 동안 유지해야 generator 안에서도 request와 session을
+    # 안전하게 참조할 수 있다.
     return Response(
         stream_with_context(generate_events(manual_entry_url)),
         mimetype='text/event-stream',
@@ -1982,233 +2192,143 @@ def start_group_generation():
 
 
 
-def run_cp_grouping(members_df, co_matrix, attendee_names, presenter_names,
-                    optimize_for='gender', top_n=10, group_count_override=None,
-                    progress_callback=None, restricted_pairs=None):
+# 조 편성 엔진: 'cp_sat'(기본, OR-Tools) / 'local_search'(NumPy 지역 탐색, 1초 이내)
+# / 'set_partition'(후보 조 집합 분할, 100명 이상 행사·합반용)
+# / 'pareto'(성비·새만남 절충안 비교, 태그 붙은 추천안)
+GROUPING_ENGINES = ('cp_sat', 'local_search', 'set_partition', 'pareto')
+
+# 조 편성 백그라운드 작업 큐. 이벤트는 워커 프로세스끼리 공유하는 작업 디렉터리에 남는다.
+grouping_jobs = GroupingJobStore()
+# 조 편성 결과 캐시. 이력이 바뀌면 grouping_history_version.bump()로 예전 결과를 무효화한다.
+grouping_history_version = HistoryVersion()
+grouping_results = GroupingResultCache()
+# 노쇼를 반영한 history 행. 버전이 오르면 바뀐 행만 다시 읽는다(bump에 넘긴 ID 기준).
+history_rows_cache = HistoryRowsCache(
+    grouping_history_version,
+    lambda: _load_effective_group_history_rows(),
+    lambda history_ids, session_ids: _load_history_rows(history_ids, session_ids),
+)
+# 후보 편성 일괄 채점(score-batch, 수동 입력 미리보기)용 회원·만남 기록 인덱스
+grouping_index = SharedGroupingIndex(lambda: _load_grouping_index())
+
+
+def _load_group_plan_groups(seminar_session_id):
+    """회차에 저장된 학기 계획 초안의 조 목록. 회차가 없거나 초안이 없으면 None."""
+    if not seminar_session_id:
+        return None
+    rows = supabase.table('seminar_group_plans').select('groups') \
+        .eq('session_id', seminar_session_id).limit(1).execute().data or []
+    groups = rows[0].get('groups') if rows else None
+    return groups or None
+
+
+def _grouping_problem_from_members(members_df, co_matrix, attendee_names, presenter_names,
+                                   optimize_for, group_count_override, restricted_pairs):
+    gender_by_name = {
+        row['name']: normalize_gender(row.get('gender'))
+        for row in members_df.to_dict(orient='records')
+    }
+    return build_grouping_problem(
+        attendee_names, presenter_names, gender_by_name, co_matrix,
+        restricted_pairs=restricted_pairs,
+        group_count_override=group_count_override,
+        optimize_for=optimize_for,
+    )
+
+
+def _prepare_grouping_problem(members_df, co_matrix, attendee_names, presenter_names,
+                              group_count_override, restricted_pairs, optimize_for='combined'):
+    """조 편성 문제를 만들고 제약끼리의 모순을 찾는다. 모든 엔진은 이 문제를 그대로 받는다.
+
+    (problem, infeasibility)를 반환한다. 참석자가 3명 미만이면 problem은 None이다.
+    """
+    problem = _grouping_problem_from_members(
+        members_df, co_matrix, attendee_names, presenter_names,
+        optimize_for, group_count_override, restricted_pairs,
+    )
+    if problem is None:
+        app.logger.warning("[6.5] 참석자 3명 미만, 편성 생략")
+        return None, []
+    infeasibility = find_infeasibility(problem)
+    if infeasibility:
+        app.logger.warning("[6.5] 편성 불가: %s", infeasibility[0]['message'])
+    else:
+        app.logger.info(
+            f"[6.5] 참석자 {len(attendee_names)}명, 그룹={problem.num_groups}, "
+            f"크기={problem.min_size}~{problem.max_size}"
+        )
+    return problem, infeasibility
+
+
+def run_cp_grouping(problem, top_n=10, progress_callback=None, previous_groups=None,
+                    solution_callback=None, stop_event=None):
     """
     OR-Tools CP-SAT 기반 조 편성 알고리즘.
-    optimize_for: 'gender' (성비우선) or 'new_face' (새만남우선)
+    problem: _prepare_grouping_problem이 만들고 검사한 GroupingProblem
     top_n: 반환할 다양한 조합 수
+
+    모델은 한 번만 만들고, 찾은 조합마다 다양성 컷을 더해 다시 푼다(grouping_solver).
+    첫 라운드는 탐욕 배치나 previous_groups(직전 저장 편성) 중 나은 쪽을 힌트로 받는다.
+    solution_callback은 중복을 거른 추천안을 찾는 즉시 받는다(SSE 스트리밍용).
+    stop_event가 켜지면(작업 취소) 탐색을 멈추고 그때까지의 결과를 반환한다.
+    컨테이너에 CPU가 여러 개 할당되어 있으면 하위 문제를 프로세스 풀에 나눠 푼다.
     """
-    app.logger.info(f"[CP-SAT] 시작: optimize_for={optimize_for}, top_n={top_n}, attendees={len(attendee_names)}")
+    # OR-Tools는 CP-SAT 엔진을 실제로 쓸 때만 불러온다.
+    from grouping_solver import enumerate_groupings_parallel
 
-    names = list(attendee_names)
-    n = len(names)
+    results = enumerate_groupings_parallel(
+        problem, top_n=top_n, progress_callback=progress_callback,
+        previous_groups=previous_groups, solution_callback=solution_callback,
+        stop_event=stop_event,
+    )
+    app.logger.info(f"[CP-SAT] 완료: {len(results)}개 반환")
+    return results
 
-    if n < 3:
-        app.logger.warning("[CP-SAT] 참석자 3명 미만, 중단")
-        return []
 
-    # 멤버 정보 딕셔너리
-    name_to_info = {}
-    for _, row in members_df.iterrows():
-        name_to_info[row['name']] = row.to_dict()
+def run_pareto_grouping(problem, top_n=10, progress_callback=None, previous_groups=None,
+                        solution_callback=None, stop_event=None):
+    """성비 우선 / 균형 / 새만남 우선 절충안을 한 번의 풀이 세션에서 구한다.
 
-    # 그룹 수 결정
-    MIN_GROUP_SIZE = 4
-    if group_count_override and group_count_override > 0:
-        num_groups = group_count_override
-    else:
-        q, r = divmod(n, 4)
-        num_groups = q if r == 0 else q + 1
-    # 모든 그룹이 최소 MIN_GROUP_SIZE명 이상 가질 수 있도록 그룹 수 상한선 적용
-    num_groups = max(1, min(num_groups, n // MIN_GROUP_SIZE))
-
-    min_size = MIN_GROUP_SIZE
-    max_size = math.ceil(n / num_groups)  # +1 제거: 일부 조에 여유 생갈 경우 3인조 발생 방지
-
-    app.logger.info(f"[CP-SAT] 그룹={num_groups}, 크기={min_size}~{max_size}")
-
-    # 성별 정규화: 미상은 별도 카테고리로 두어 자동으로 여성에 합산되지 않도록 함.
-    is_male_arr = []   # 1 if 남성 else 0
-    is_female_arr = [] # 1 if 여성 else 0
-    for name in names:
-        info = name_to_info.get(name, {})
-        norm = normalize_gender(info.get('gender'))
-        is_male_arr.append(1 if norm == 'M' else 0)
-        is_female_arr.append(1 if norm == 'W' else 0)
-    # 하위호환을 위해 genders도 유지 (기존 변수 참조 자리)
-    genders = is_male_arr
-
-    # 발제자 인덱스
-    presenter_set = set(presenter_names)
-    presenter_indices = [i for i, nm in enumerate(names) if nm in presenter_set]
-
-    name_to_index = {name: index for index, name in enumerate(names)}
-    restricted_index_pairs = []
-    for first_name, second_name in (restricted_pairs or set()):
-        if first_name in name_to_index and second_name in name_to_index:
-            restricted_index_pairs.append((name_to_index[first_name], name_to_index[second_name]))
-
-    # 쌍별 만남 횟수
-    def get_pair_count(a, b):
-        key = _canonical_pair_key(a, b)
-        return co_matrix.get(key, 0)
-
-    # objective 계산을 위한 쌍 사전
-    pair_counts = {}
-    for i in range(n):
-        for j in range(i + 1, n):
-            pair_counts[(i, j)] = get_pair_count(names[i], names[j])
-
-    SCALE = 1000
-    results = []
-    # 金지 조합: 이미 찾은 조합들 (각각 frozenset of frozensets)
-    found_groupings = []
-
-    for attempt in range(top_n * 2): # 최대 탐색 횟수 조정
-        if len(results) >= top_n:
-            break
-
-        model = cp_model.CpModel()
-
-        # x[i][g]: 멤버 i가 그룹 g에 소속
-        x = [[model.NewBoolVar(f'x_{i}_{g}') for g in range(num_groups)] for i in range(n)]
-
-        # --- [대칭성 파괴(Symmetry Breaking)] ---
-        # 첫 번째 사람을 무조건 그룹 0에 넣음으로써 불필요한 자리바꿈 탐색 공간을 기하급수적으로 줄임
-        if n > 0 and num_groups > 0:
-            model.Add(x[0][0] == 1)
-
-        # 각 멤버는 정확히 하나의 그룹
-        for i in range(n):
-            model.AddExactlyOne(x[i][g] for g in range(num_groups))
-
-        # 그룹 크기 제약
-        for g in range(num_groups):
-            sz = sum(x[i][g] for i in range(n))
-            model.Add(sz >= min_size)
-            model.Add(sz <= max_size)
-
-        # 비공개 관리자 제한: 지정된 두 사람은 어떤 추천안에서도 같은 조가 될 수 없다.
-        for left_index, right_index in restricted_index_pairs:
-            for g in range(num_groups):
-                model.Add(x[left_index][g] + x[right_index][g] <= 1)
-
-        # 발제자 분산: 그룹 수 >= 발제자 수일 때 각 그룹에 1명씩
-        if len(presenter_indices) <= num_groups:
-            for pi in range(len(presenter_indices)):
-                for pj in range(pi + 1, len(presenter_indices)):
-                    for g in range(num_groups):
-                        model.Add(x[presenter_indices[pi]][g] + x[presenter_indices[pj]][g] <= 1)
-
-        # 이전에 찾은 조합 금지: 동일한 pair grouping을 피하기 위해
-        for attempt_idx, found_pairs in enumerate(found_groupings):
-            if not found_pairs:
-                continue
-            same_g_vars = []
-            for (i, j) in found_pairs:
-                for g in range(num_groups):
-                    b = model.NewBoolVar(f'f_{attempt_idx}_{i}_{j}_{g}')
-                    # x[i][g] == 1 and x[j][g] == 1 이면 b >= 1 이어야 함
-                    model.Add(x[i][g] + x[j][g] - 1 <= b)
-                    same_g_vars.append(b)
-            # 이전에 같은 그룹이었던 쌍들 중 무조건 하나 이상은 이번엔 다른 그룹이어야 함
-            if same_g_vars:
-                model.Add(sum(same_g_vars) <= len(found_pairs) - 1)
-
-        # --- 목적함수 ---
-        obj = []
-
-        # 성비 점수: 각 그룹 내 성별 불균형(|남-여|)을 최소화.
-        # 성별 미상자는 어느 쪽으로도 카운트하지 않아 결과 왜곡을 막음.
-        for g in range(num_groups):
-            males = model.NewIntVar(0, n, f'm_{g}')
-            model.Add(males == sum(is_male_arr[i] * x[i][g] for i in range(n)))
-            females = model.NewIntVar(0, n, f'f_{g}')
-            model.Add(females == sum(is_female_arr[i] * x[i][g] for i in range(n)))
-            diff = model.NewIntVar(-n, n, f'd_{g}')
-            model.Add(diff == males - females)
-            abs_diff = model.NewIntVar(0, n, f'ad_{g}')
-            model.AddAbsEquality(abs_diff, diff)
-            gender_w = 40 if optimize_for in ['gender', 'combined'] else 6
-            obj.append(abs_diff * (-SCALE * gender_w))
-
-        # 새만남 점수 (최적화 변환): 
-        # 기존: 모든 쌍에 대해 보너스를 주는 방식 (O(N^2) 변수 생성)
-        # 변경: 이미 만난 1~2단계 쌍에 대해서만 '페널티(loss)'를 부과 (O(E) 90% 이상 변수 축소)
-        new_face_w = 10 if optimize_for in ['new_face', 'combined'] else 6
-        max_nf_val = SCALE * new_face_w
-        for (i, j), cnt in pair_counts.items():
-            if cnt > 0:
-                nf_val = max_nf_val // (cnt + 1)
-                loss = max_nf_val - nf_val
-                if loss > 0:
-                    for g in range(num_groups):
-                        bv = model.NewBoolVar(f's_{attempt}_{i}_{j}_{g}')
-                        model.Add(x[i][g] + x[j][g] - 1 <= bv)
-                        obj.append(bv * (-loss))
-
-        model.Maximize(sum(obj))
-
-        solver = cp_model.CpSolver()
-        # 탐색 구조를 대폭 줄였으므로 1.5초만에 최적해/실현가능 영역에 도달
-        solver.parameters.max_time_in_seconds = 1.5
-        solver.parameters.num_workers = 4
-        solver.parameters.random_seed = attempt * 13 + 7
-
-        status = solver.Solve(model)
-
-        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            app.logger.warning(f"[CP-SAT] attempt {attempt}: 실패 status={status}")
-            continue
+    40:10 가중치 대신 두 목적을 따로 다룬다(grouping_solver.pareto_groupings).
+    추천안마다 'tag'가 붙으며 top_n은 PARETO_POINTS까지만 쓴다.
+    """
+    from grouping_solver import PARETO_POINTS, pareto_groupings
 
-        # 결과 추출
-        assignment = {}
-        for i in range(n):
-            for g in range(num_groups):
-                if solver.Value(x[i][g]) == 1:
-                    assignment[names[i]] = g
-                    break
+    results = pareto_groupings(
+        problem, points=min(top_n, PARETO_POINTS), progress_callback=progress_callback,
+        previous_groups=previous_groups, solution_callback=solution_callback,
+        stop_event=stop_event,
+    )
+    app.logger.info(f"[pareto] 완료: {len(results)}개 반환")
+    return results
 
-        groups_dict = {g: [] for g in range(num_groups)}
-        for name, g in assignment.items():
-            groups_dict[g].append(name)
-        formatted_groups = [groups_dict[g] for g in sorted(groups_dict) if groups_dict[g]]
 
-        # 중복 체크
-        frozen = frozenset(frozenset(grp) for grp in formatted_groups)
-        if frozen in [frozenset(frozenset(grp) for grp in r['groups']) for r in results]:
-            app.logger.info(f"[CP-SAT] attempt {attempt}: 중복, 스킵")
-            continue
+def run_local_search_grouping(problem, top_n=10, progress_callback=None, previous_groups=None,
+                              solution_callback=None, stop_event=None):
+    """run_cp_grouping과 같은 입력·결과 형식의 NumPy 지역 탐색 엔진."""
+    results = local_search_groupings(
+        problem, top_n=top_n, progress_callback=progress_callback,
+        previous_groups=previous_groups, solution_callback=solution_callback,
+        stop_event=stop_event,
+    )
+    app.logger.info(f"[local-search] 완료: {len(results)}개 반환")
+    return results
 
-        # 점수 계산 (표시용 — combined 가중치 40:10 적용).
-        # 성별 미상자는 분모/분자에서 모두 제외해 점수 왜곡 방지.
-        gender_score = 0.0
-        for grp in formatted_groups:
-            m = sum(1 for nm in grp if normalize_gender(name_to_info.get(nm, {}).get('gender')) == 'M')
-            f = sum(1 for nm in grp if normalize_gender(name_to_info.get(nm, {}).get('gender')) == 'W')
-            if m > 0 and f > 0:
-                gender_score += min(m, f) / max(m, f)
-
-        new_face_score = 0.0
-        for (i, j), cnt in pair_counts.items():
-            if assignment.get(names[i]) == assignment.get(names[j]):
-                new_face_score += 1.0 / (cnt + 1)
-
-        total_score = (gender_score * 40 + new_face_score * 10)
-
-        results.append({
-            'score': f"{total_score:.2f}",
-            'details': [f"{gender_score:.2f}", f"{new_face_score:.2f}", "0.00", "0.00"],
-            'groups': formatted_groups
-        })
-        app.logger.info(f"[CP-SAT] attempt {attempt}: 성공 {len(results)}/{top_n}, score={total_score:.2f}")
 
-        # 현재 진행률을 progress_callback으로 통보 (10~85% 범위를 results 수에 청해 비례 배분)
-        if progress_callback:
-            pct = min(85, 12 + int((len(results) / top_n) * 73))
-            progress_callback(pct)
+def run_set_partition_grouping(problem, top_n=10, progress_callback=None, previous_groups=None,
+                               solution_callback=None, stop_event=None):
+    """run_cp_grouping과 같은 입력·결과 형식의 집합 분할 엔진(대규모 명단용).
 
-        # 이 조합의 동일-그룹 쌍을 금지 목록에 추가
-        same_pairs = set()
-        for i in range(n):
-            for j in range(i + 1, n):
-                if assignment.get(names[i]) == assignment.get(names[j]):
-                    same_pairs.add((i, j))
-        found_groupings.append(same_pairs)
+    후보 조를 미리 만들고 점수를 NumPy로 계산한 뒤, CP-SAT은 후보 조합만 고른다.
+    """
+    from grouping_set_partition import set_partition_groupings
 
-    app.logger.info(f"[CP-SAT] 완료: {len(results)}개 반환")
+    results = set_partition_groupings(
+        problem, top_n=top_n, progress_callback=progress_callback,
+        previous_groups=previous_groups, solution_callback=solution_callback,
+        stop_event=stop_event,
+    )
+    app.logger.info(f"[set-partition] 완료: {len(results)}개 반환")
     return results
 
 
@@ -2239,6 +2359,110 @@ def validate_bookclub_groups():
     return jsonify({'valid': True})
 
 
+def _load_grouping_index():
+    members = _read_all(supabase, 'members', 'id, name, gender')
+    return GroupingIndex(
+        members, _effective_group_history_rows(), _restricted_name_pairs(members),
+        gender_of=normalize_gender,
+    )
+
+
+@app.route('/api/bookclub/score-batch', methods=['POST'])
+@login_required(role="admin")
+def score_bookclub_groupings():
+    """후보 편성 여러 개를 한 번에 채점한다(수동 편집 실시간 점수, 변형 비교용).
+
+    groupings는 편성(이름 목록의 목록)의 목록이다. 점수는 솔버 추천안과 같은 식이고,
+    조별 성비·새 만남·과거 만남·편성 제한 충돌을 함께 돌려준다.
+    """
+    data = request.get_json(silent=True) or {}
+    groupings = data.get('groupings')
+    if not isinstance(groupings, list) or not groupings or not all(
+        isinstance(groups, list) and all(isinstance(group, list) for group in groups)
+        for groups in groupings
+    ):
+        return jsonify({'status': 'error', 'message': '조 편성 데이터 형식이 올바르지 않습니다.'}), 400
+    if len(groupings) > SCORE_BATCH_LIMIT:
+        return jsonify({
+            'status': 'error',
+            'message': f'한 번에 최대 {SCORE_BATCH_LIMIT}개까지 채점할 수 있습니다.',
+        }), 400
+    try:
+        index = grouping_index.get(grouping_history_version.current())
+        return jsonify({'status': 'success', 'results': index.score_batch(groupings)})
+    except Exception as e:
+        app.logger.error(f"score_bookclub_groupings error: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/bookclub/repair-groups', methods=['POST'])
+@login_required(role="admin")
+def repair_bookclub_groups():
+    """기존 조 편성에 늦게 온 사람(add)과 빠진 사람(remove)만 반영한다.
+
+    groups(결과 페이지의 추천안) 또는 history_id(저장된 기록) 중 하나를 받는다.
+    인원이 바뀐 조와 그 이웃 조만 다시 풀고 나머지 조는 그대로 두며, 제약은 전체 편성과 같다.
+    """
+    data = request.get_json(silent=True) or {}
+    added = [str(name).strip() for name in data.get('add') or [] if str(name).strip()]
+    removed = {str(name).strip() for name in data.get('remove') or [] if str(name).strip()}
+    groups = data.get('groups')
+    history_id = data.get('history_id')
+    facilitators = data.get('facilitators')
+    try:
+        if history_id is not None:
+            row = supabase.table('history').select('id, groups, facilitators') \
+                .eq('id', history_id).single().execute().data
+            if not row:
+                return jsonify({'status': 'error', 'message': '조 편성 기록을 찾을 수 없습니다.'}), 404
+            groups = row.get('groups') or []
+            if facilitators is None:
+                facilitators = row.get('facilitators') or []
+        if not isinstance(groups, list) or not groups or not all(isinstance(group, list) for group in groups):
+            return jsonify({'status': 'error', 'message': '조 편성 데이터 형식이 올바르지 않습니다.'}), 400
+
+        previous_names = [str(name).strip() for group in groups for name in group]
+        attendees = [name for name in previous_names if name not in removed]
+        attendees += [name for name in dict.fromkeys(added) if name not in previous_names]
+        attendee_set = set(attendees)
+        facilitators = [str(name).strip() for name in facilitators or [] if str(name).strip() in attendee_set]
+        group_count = data.get('group_count')
+        # 지정하지 않았으면 기존 조 수를 따르되, 빠진 사람이 많으면 최소 인원을 채울 수 있는 만큼 줄인다.
+        group_count = int(group_count) if str(group_count or '').isdigit() \
+            else max(1, min(len(groups), len(attendees) // MIN_GROUP_SIZE))
+
+        members_res = _read_all(supabase, 'members', 'id, name, gender')
+        # 고치려는 편성 자체가 저장된 기록이면 그 기록의 만남은 빼고 계산한다.
+        history_rows = [
+            row for row in _effective_group_history_rows()
+            if history_id is None or str(row.get('id')) != str(history_id)
+        ]
+        co_matrix = CoMatrix(members_res, history_rows)
+        problem, infeasibility = _prepare_grouping_problem(
+            pd.DataFrame(members_res), co_matrix, attendees, facilitators,
+            group_count, _restricted_name_pairs(members_res),
+        )
+        if problem is None:
+            return jsonify({'status': 'error', 'message': '참석자가 3명 미만이라 조를 편성할 수 없습니다.'}), 400
+        if infeasibility:
+            return jsonify({
+                'status': 'error',
+                'message': ' '.join(item['message'] for item in infeasibility),
+                'conflicts': infeasibility,
+            }), 409
+        result = repair_neighborhood(problem, groups)
+        if result is None:
+            return jsonify({'status': 'error', 'message': '제약을 지키면서 기존 편성을 고치지 못했습니다. 다시 편성해주세요.'}), 409
+        app.logger.info(
+            "[repair] +%d/-%d명, 조 %d개 중 %d개 다시 편성",
+            len(added), len(removed), len(result['groups']), len(result['changed_groups']),
+        )
+        return jsonify({'status': 'success', 'present': attendees, 'facilitators': facilitators, **result})
+    except Exception as e:
+        app.logger.error(f"repair_bookclub_groups error: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/bookclub/save', methods=['POST'])
 @login_required(role="admin")
 def bookclub_save():
@@ -2262,16 +2486,63 @@ def _chunks(items, size=100):
         yield seq[idx:idx + size]
 
 
-def _effective_group_history_rows():
+# 캐시하는 history 열. 기록 목록·회원 활동 화면도 같은 행을 쓴다.
+HISTORY_COLUMNS = 'id, date, groups, seminar_session_id, book_title, genre, facilitators'
+
+
+def _history_index():
+    """현재 이력 버전의 HistoryIndex. 행이 바뀔 때까지 만든 것을 다시 쓴다."""
+    return history_rows_cache.derived('history_index', HistoryIndex)
+
+
+def _attendee_pair_rows(names):
+    """names끼리의 쌍별 만남 횟수·마지막 만남일·만난 날짜.
+
+    DB 함수 history_pair_counts(031 마이그레이션)가 조 명단을 풀어 필요한 쌍만 센다. 행 집합 RPC는
+    PostgREST max-rows에서 잘리므로 결과 전체를 jsonb 하나로 싸는 history_pair_counts_json(033)을
+    부른다. 함수가 아직 없거나 호출이 실패하거나 응답이 잘렸으면 같은 형식으로 이력 인덱스에서 계산한다.
+    """
+    names = sorted({str(name).strip() for name in names if str(name).strip()})
+    try:
+        return _rpc_rows(supabase, 'history_pair_counts_json', {'p_names': names})
+    except Exception as e:
+        app.logger.warning(f"[co-matrix] history_pair_counts_json 호출 실패, 이력 인덱스로 계산: {e}")
+        return _history_index().pair_rows(names)
+
+
+def _effective_group_history_rows(refresh=False):
     """Load grouping history with active no-shows excluded from their session.
 
     A saved group is the planned seating chart.  Meeting statistics must use
     actual attendance, so an active no-show record removes that member from
     every group in the linked seminar history row.
+
+    Rows come from history_rows_cache; pass refresh=True to re-read everything.
     """
-    history_rows = supabase.table('history').select(
-        'id, date, groups, seminar_session_id'
-    ).execute().data or []
+    return history_rows_cache.get(refresh=refresh)
+
+
+def _load_effective_group_history_rows():
+    history_rows = _read_all(supabase, 'history', HISTORY_COLUMNS)
+    return _with_no_show_exclusions(history_rows)
+
+
+def _load_history_rows(history_ids, session_ids):
+    """해당 ID의 history 행과 해당 회차에 연결된 행만 읽는다(지워진 행은 빠진다)."""
+    rows = {}
+    for batch in _chunks(history_ids):
+        for row in supabase.table('history').select(HISTORY_COLUMNS) \
+                .in_('id', batch).execute().data or []:
+            rows[str(row['id'])] = row
+    for batch in _chunks(session_ids):
+        for row in supabase.table('history').select(HISTORY_COLUMNS) \
+                .in_('seminar_session_id', batch).execute().data or []:
+            rows[str(row['id'])] = row
+    return _with_no_show_exclusions(list(rows.values()))
+
+
+def _with_no_show_exclusions(history_rows):
+    """history 행에 연결 회차의 미연락 불참자를 'excluded_names'로 붙인다."""
     session_ids = {
         row.get('seminar_session_id') for row in history_rows
         if row.get('seminar_session_id')
@@ -2286,58 +2557,111 @@ def _effective_group_history_rows():
 
     member_ids = {row['member_id'] for row in no_show_rows}
     member_rows = supabase.table('members').select('id, name').in_('id', list(member_ids)).execute().data or []
-    member_name_by_id = {row['id']: row.get('name') for row in member_rows}
-    excluded_by_session = defaultdict(set)
-    for row in no_show_rows:
-        name = member_name_by_id.get(row['member_id'])
-        if name:
-            excluded_by_session[row['session_id']].add(name)
-
-    return [
-        {
-            **row,
-            'excluded_names': sorted(excluded_by_session.get(row.get('seminar_session_id'), set())),
+    return list(_with_excluded_names(history_rows, _no_show_names_by_session(no_show_rows, member_rows)))
+
+
+def _stored_matrix_rows(pair_keys):
+    rows = {}
+    for batch in _chunks(pair_keys):
+        for row in supabase.table('bookclub_co_matrix').select('pair_key, count, last_met') \
+                .in_('pair_key', batch).execute().data or []:
+            rows[row['pair_key']] = row
+    return rows
+
+
+def _apply_history_change(old_row=None, new_row=None):
+    """history 한 건의 변경이 건드린 쌍만 이력에서 다시 세어 bookclub_co_matrix에 덮어쓴다.
+
+    현재 값을 읽어 +1/−1 하면 동시에 저장한 요청의 증감이 사라지므로, 바뀐 행의 쌍 키를
+    refresh_co_matrix_pairs RPC(032 마이그레이션)에 넘겨 DB 안에서 잠금을 잡고 다시 센다.
+    RPC를 쓸 수 없으면 공유 이력 인덱스로 같은 쌍을 다시 세어 덮어쓴다(되풀이해도 같은 값).
+    old_row/new_row는 _with_no_show_exclusions를 거친 history 행이다.
+    """
+    rows = [row for row in (old_row, new_row) if row]
+    keys = set(_matrix_rows_from_history(rows))
+    if not keys:
+        return {'pair_count': 0, 'removed_count': 0, 'scope': 'affected'}
+    names = sorted({
+        str(name).strip()
+        for row in rows for group in row.get('groups') or [] if isinstance(group, list)
+        for name in group if str(name).strip()
+    })
+    try:
+        result = supabase.rpc('refresh_co_matrix_pairs', {
+            'p_names': names, 'p_pair_keys': sorted(keys),
+        }).execute().data or {}
+        return {
+            'pair_count': result.get('pair_count', 0),
+            'removed_count': result.get('removed_count', 0),
+            'scope': 'affected',
         }
-        for row in history_rows
-    ]
+    except Exception as e:
+        app.logger.warning(f"[co-matrix] refresh_co_matrix_pairs 호출 실패, 이력 인덱스로 계산: {e}")
+
+    calculated = {
+        row['pair_key']: {'pair_key': row['pair_key'], 'count': row['count'], 'last_met': row['last_met']}
+        for row in _history_index().pair_rows(names) if row['pair_key'] in keys
+    }
+    stale_keys = keys - set(calculated)
+    for batch in _chunks(stale_keys):
+        supabase.table('bookclub_co_matrix').delete().in_('pair_key', batch).execute()
+    for batch in _chunks(calculated.values()):
+        supabase.table('bookclub_co_matrix').upsert(batch, on_conflict='pair_key').execute()
+    return {'pair_count': len(calculated), 'removed_count': len(stale_keys), 'scope': 'affected'}
 
 
-def _rebuild_matrix_for_session(session_id):
-    linked_rows = supabase.table('history').select('groups') \
+def _apply_no_show_change(session_id, member_ids, excluded):
+    """미연락 불참 등록(excluded=True)·취소가 회차 기록의 만남에서 빼고 더하는 쌍을 반영한다."""
+    linked_rows = supabase.table('history').select('id, date, groups, seminar_session_id') \
         .eq('seminar_session_id', session_id).execute().data or []
-    affected_keys = set()
-    for row in linked_rows:
-        affected_keys |= _pair_keys_from_groups(row.get('groups') or [])
-    if affected_keys:
-        return rebuild_co_matrix(affected_keys)
-    return {'history_count': 0, 'pair_count': 0, 'removed_count': 0, 'scope': 'affected'}
+    if not linked_rows or not member_ids:
+        return
+    member_rows = supabase.table('members').select('id, name').in_('id', list(member_ids)).execute().data or []
+    changed_names = {row['name'] for row in member_rows if row.get('name')}
+    for row in _with_no_show_exclusions(linked_rows):
+        now_excluded = set(row.get('excluded_names') or [])
+        before = now_excluded - changed_names if excluded else now_excluded | changed_names
+        _apply_history_change({**row, 'excluded_names': sorted(before)}, row)
 
 
-def rebuild_co_matrix(pair_keys=None):
+def rebuild_co_matrix(pair_keys=None, dry_run=False):
     """history를 원본으로 만남 매트릭스를 재계산한다.
 
     pair_keys가 주어지면 해당 쌍만 갱신하고, None이면 전체를 복구한다.
+    평소에는 _apply_history_change가 바뀐 쌍만 고치므로, 전체 재계산은 저장된 값이
+    이력과 어긋난 정도(drift)를 함께 알려주는 정합성 점검이기도 하다.
+    dry_run이면 drift만 계산하고 쓰지 않는다.
     """
     target_keys = set(pair_keys) if pair_keys is not None else None
-    history_rows = _effective_group_history_rows()
+    # 정합성 점검이므로 캐시가 아니라 DB에서 다시 읽는다.
+    history_rows = _effective_group_history_rows(refresh=True)
     calculated = _matrix_rows_from_history(history_rows, target_keys)
 
     if target_keys is None:
-        existing_rows = supabase.table('bookclub_co_matrix').select('pair_key').execute().data or []
-        existing_keys = {row['pair_key'] for row in existing_rows}
-        target_keys = existing_keys | set(calculated)
+        stored_rows = {
+            row['pair_key']: row
+            for row in _iter_rows(supabase, 'bookclub_co_matrix', 'pair_key, count, last_met', key='pair_key')
+        }
+        target_keys = set(stored_rows) | set(calculated)
+    else:
+        stored_rows = _stored_matrix_rows(target_keys)
+    drift = _matrix_drift(calculated, stored_rows)
+    if drift['missing_count'] or drift['stale_count'] or drift['mismatched_count']:
+        app.logger.warning("[co-matrix] 이력과 어긋난 쌍: %s", drift)
 
     stale_keys = target_keys - set(calculated)
-    for batch in _chunks(stale_keys):
-        supabase.table('bookclub_co_matrix').delete().in_('pair_key', batch).execute()
-    for batch in _chunks(calculated.values()):
-        supabase.table('bookclub_co_matrix').upsert(batch, on_conflict='pair_key').execute()
+    if not dry_run:
+        for batch in _chunks(stale_keys):
+            supabase.table('bookclub_co_matrix').delete().in_('pair_key', batch).execute()
+        for batch in _chunks(calculated.values()):
+            supabase.table('bookclub_co_matrix').upsert(batch, on_conflict='pair_key').execute()
 
     return {
         'history_count': len(history_rows),
         'pair_count': len(calculated),
         'removed_count': len(stale_keys),
         'scope': 'full' if pair_keys is None else 'affected',
+        'drift': drift,
     }
 
 
@@ -2368,11 +2692,10 @@ def save_group_record_to_db(date, present, facilitators, groups, book_title=None
             record["genre"] = genre.strip()
         insert_res = supabase.table("history").insert(record).execute()
         history_id = insert_res.data[0]['id'] if insert_res.data else None
+        grouping_history_version.bump(history_ids=[history_id] if history_id else None)
 
-        # 2. history를 원본으로 해당 사람 쌍을 다시 계산한다.
-        affected_keys = _pair_keys_from_groups(groups)
-        if affected_keys:
-            rebuild_co_matrix(affected_keys)
+        # 2. 새 기록의 사람 쌍만 만남 매트릭스에 더한다.
+        _apply_history_change(new_row=_with_no_show_exclusions([{**record, 'id': history_id}])[0])
 
         return {"status": "ok", "history_id": history_id}
     except Exception as e:
@@ -2472,24 +2795,23 @@ def bookclub_api_get_history():
 @app.route('/api/bookclub/history/delete', methods=['POST'])
 @login_required(role="admin")
 def bookclub_api_delete_history():
-    """기록을 삭제한 뒤 영향받은 사람 쌍을 남은 전체 이력으로 재계산한다."""
+    """기록을 삭제하고 그 기록의 사람 쌍을 만남 매트릭스에서 뺀다."""
     record_id = request.json.get("id")
     if not record_id:
         return jsonify({"status": "error", "message": "record id required"}), 400
     try:
         # 1. 삭제할 기록 조회
-        del_res = supabase.table("history").select("groups, date").eq("id", record_id).execute()
+        del_res = supabase.table("history").select("id, groups, date, seminar_session_id") \
+            .eq("id", record_id).execute()
         if not del_res.data:
             return jsonify({"status": "error", "message": "Record not found"}), 404
-        deleted_record = del_res.data[0]
+        deleted_record = _with_no_show_exclusions(del_res.data)[0]
 
         # 2. 실제 삭제
         supabase.table("history").delete().eq("id", record_id).execute()
+        grouping_history_version.bump(history_ids=[record_id])
 
-        deleted_groups = deleted_record.get("groups", []) or []
-        affected_keys = _pair_keys_from_groups(deleted_groups)
-        if affected_keys:
-            rebuild_co_matrix(affected_keys)
+        _apply_history_change(old_row=deleted_record)
 
         return jsonify({"status": "ok"})
     except Exception as e:
@@ -2728,61 +3050,21 @@ def preview_manual_groups():
         if not groups:
             return jsonify({"error": "그룹 정보가 없습니다."}), 400
 
-        # 1. DB에서 전체 회원 정보와 만남 기록을 가져옵니다.
-        all_members_res = supabase.table("members").select("name, gender").execute()
-        name_to_gender = {m['name']: normalize_gender(m.get('gender')) for m in all_members_res.data}
-
-        # [수정] last_met 컬럼도 함께 가져옵니다.
-        co_matrix_res = supabase.table("bookclub_co_matrix").select("pair_key, count, last_met").execute()
-        co_matrix = {item['pair_key']: {'count': item['count'], 'last_met': item.get('last_met')} for item in
-                     co_matrix_res.data}
-
-        # 발제자 표시용 '*' 접미사를 제거하여 실제 회원 이름으로 정규화
-        def strip_facilitator_mark(nm):
-            return nm[:-1].strip() if isinstance(nm, str) and nm.endswith('*') else nm
-
-        groups = [[strip_facilitator_mark(n) for n in g if n] for g in groups]
-
-        # 2. 그룹별 분석 시작
+        # 공유 인덱스로 채점한다(요청마다 회원·만남 기록 전체를 다시 읽지 않는다).
+        scored = grouping_index.get(grouping_history_version.current()).score(groups)
         group_analysis = []
-        for i, group in enumerate(groups):
-            # 성비 계산
-            gender_counts = {'M': 0, 'W': 0, 'Unknown': 0}
-            for name in group:
-                gender = name_to_gender.get(name)
-                if gender in ['M', 'W']:
-                    gender_counts[gender] += 1
-                else:
-                    gender_counts['Unknown'] += 1
-
-            # 만남 기록 분석
-            new_encounters = []
-            past_encounters = []
-
-            # itertools.combinations를 사용하여 그룹 내 모든 쌍을 생성
-            for name1, name2 in itertools.combinations(group, 2):
-                pair_key = _canonical_pair_key(name1, name2)
-
-                if pair_key in co_matrix:
-                    # 만난 기록이 있는 경우
-                    record = co_matrix[pair_key]
-                    past_encounters.append({
-                        "pair": f"{name1} & {name2}",
-                        "count": record['count'],
-                        "last_met": record.get('last_met', 'N/A')  # last_met이 없을 경우 대비
-                    })
-                else:
-                    # 처음 만나는 경우
-                    new_encounters.append(f"{name1} & {name2}")
-
-            # 결과 구조화
+        for group, analysis in zip(scored['groups'], scored['group_analysis']):
+            past_pairs = {item['pair'] for item in analysis['past']}
             group_analysis.append({
-                "group_index": i + 1,
-                "gender_balance": gender_counts,
+                "group_index": analysis['group_index'],
+                "gender_balance": analysis['gender_balance'],
                 "encounters": {
-                    "new": new_encounters,
-                    "past": sorted(past_encounters, key=lambda x: x['count'], reverse=True)  # 횟수 내림차순 정렬
-                }
+                    "new": [
+                        f"{name1} & {name2}" for name1, name2 in itertools.combinations(group, 2)
+                        if f"{name1} & {name2}" not in past_pairs
+                    ],
+                    "past": analysis['past'],
+                },
             })
 
         return jsonify({"group_analysis": group_analysis})
@@ -3775,6 +4057,129 @@ def seminar_term_delete(term_id):
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+def _term_plan_sessions(term_id, all_active_members):
+    """학기의 남은 활성 회차마다 예상 참석자·발제자 이름을 모은다."""
+    today = datetime.now(KST).date().isoformat()
+    sessions = supabase.table('seminar_sessions').select(
+        'id, meeting_date, day_type, participation_mode, seminar_week_id'
+    ).eq('term_id', term_id).eq('is_active', True).gte('meeting_date', today) \
+        .order('meeting_date').execute().data or []
+    if not sessions:
+        return []
+    session_ids = [row['id'] for row in sessions]
+    votes = supabase.table('seminar_votes').select('session_id, member_id') \
+        .in_('session_id', session_ids).eq('attending', True).execute().data or []
+    absences = supabase.table('seminar_absences').select('session_id, member_id') \
+        .in_('session_id', session_ids).is_('cancelled_at', 'null').execute().data or []
+    votes_by_session = defaultdict(set)
+    for row in votes:
+        votes_by_session[row['session_id']].add(row['member_id'])
+    absences_by_session = defaultdict(set)
+    for row in absences:
+        absences_by_session[row['session_id']].add(row['member_id'])
+
+    name_by_id = {member['id']: member['name'] for member in all_active_members}
+    planned = []
+    for seminar_session in sessions:
+        attendee_ids = expected_session_attendees(
+            seminar_session, name_by_id.keys(),
+            votes_by_session[seminar_session['id']], absences_by_session[seminar_session['id']],
+        )
+        _, facilitator_names, _ = _topic_facilitators_for_session(seminar_session, all_active_members)
+        planned.append({
+            'id': seminar_session['id'],
+            'meeting_date': seminar_session['meeting_date'],
+            'attendees': [name_by_id[member_id] for member_id in attendee_ids],
+            'facilitators': sorted(facilitator_names),
+        })
+    return planned
+
+
+def _run_term_plan_job(job, term_id, created_by):
+    """작업 풀에서 실행된다: 회차 초안이 나올 때마다 저장하고 session_plan 이벤트를 기록한다."""
+    all_active_members = sorted(
+        _read_all(supabase, 'members', 'id, name, student_id, gender',
+                  where=lambda q: q.eq('is_active', True)),
+        key=lambda m: m.get('name') or '')
+    sessions = _term_plan_sessions(term_id, all_active_members)
+    job.publish('progress', {'progress': 5, 'session_count': len(sessions)})
+    if not sessions:
+        job.publish('complete', {'plans': []})
+        return
+
+    co_matrix = _history_index().pair_counts()
+    gender_by_name = {
+        member['name']: normalize_gender(member.get('gender')) for member in all_active_members
+    }
+    restricted_pairs = _restricted_name_pairs()
+
+    def session_callback(plan, done):
+        stamp = datetime.now(timezone.utc).isoformat()
+        supabase.table('seminar_group_plans').upsert({
+            'session_id': plan['session_id'],
+            'term_id': term_id,
+            'expected_attendees': plan['expected_attendees'],
+            'facilitators': plan['facilitators'],
+            'groups': plan['groups'],
+            'score': plan['score'],
+            'error': plan.get('error'),
+            'created_by_member_id': created_by,
+            'updated_at': stamp,
+        }, on_conflict='session_id').execute()
+        job.publish('session_plan', plan)
+        job.publish('progress', {'progress': 5 + int(95 * done / len(sessions))})
+
+    plans = plan_term_groupings(
+        sessions, gender_by_name, co_matrix, restricted_pairs=restricted_pairs,
+        session_callback=session_callback, stop_event=job.stop_event,
+    )
+    job.raise_if_cancelled()
+    app.logger.info("[term-plan] 학기 %s 회차 %d개 초안 저장", term_id, len(plans))
+    job.publish('complete', {
+        'plans': [
+            {'session_id': plan['session_id'], 'meeting_date': plan['meeting_date'],
+             'group_count': len(plan['groups']), 'error': plan.get('error')}
+            for plan in plans
+        ],
+        'repeat_count': planned_repeat_count(plans, co_matrix),
+    })
+
+
+@app.route('/api/admin/seminar_terms/<term_id>/group_plan', methods=['POST'])
+@login_required(role="admin")
+def seminar_term_group_plan_create(term_id):
+    """학기 남은 회차의 조 편성 초안을 백그라운드로 만든다. 진행은 /jobs/<id>/events로 받는다."""
+    created_by = session.get('user_id')
+    job_id, created = grouping_jobs.submit(
+        grouping_job_key([], [], term_plan=term_id), lambda job: _run_term_plan_job(job, term_id, created_by),
+    )
+    return jsonify({
+        'status': 'success',
+        'job_id': job_id,
+        'events_url': url_for('grouping_job_events', job_id=job_id),
+        'deduplicated': not created,
+    }), 202
+
+
+@app.route('/api/admin/seminar_terms/<term_id>/group_plan', methods=['GET'])
+@login_required(role="admin")
+def seminar_term_group_plan_list(term_id):
+    try:
+        plans = supabase.table('seminar_group_plans').select(
+            'session_id, expected_attendees, facilitators, groups, score, error, updated_at, '
+            'seminar_sessions(meeting_date)'
+        ).eq('term_id', term_id).execute().data or []
+        for plan in plans:
+            plan['meeting_date'] = (plan.pop('seminar_sessions', None) or {}).get('meeting_date')
+            plan['groups'] = plan.get('groups') or []
+        # 초안끼리와 지금까지의 이력을 합쳐, 이미 만난 쌍이 다시 같은 조가 되는 횟수
+        repeat_count = planned_repeat_count(plans, _history_index().pair_counts())
+        return jsonify({'status': 'success', 'plans': plans, 'repeat_count': repeat_count})
+    except Exception as e:
+        app.logger.error(f"seminar_term_group_plan_list error: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/admin/seminar_sessions/<session_id>/toggle_active', methods=['POST'])
 @login_required(role="admin")
 def seminar_session_toggle(session_id):
@@ -4089,8 +4494,11 @@ def seminar_session_update_book(session_id):
                 .eq('seminar_week_id', week_id).execute().data or []
             session_ids = [row['id'] for row in linked_sessions]
             if session_ids:
-                supabase.table('history').update({'book_title': book_title or None}) \
-                    .in_('seminar_session_id', session_ids).execute()
+                updated = supabase.table('history').update({'book_title': book_title or None}) \
+                    .in_('seminar_session_id', session_ids).execute().data or []
+                grouping_history_version.bump(
+                    history_ids=[row['id'] for row in updated], session_ids=session_ids,
+                )
         else:
             supabase.table('seminar_sessions').update(update).eq('id', session_id).execute()
             supabase.table('topic_events').update(update).eq('seminar_session_id', session_id).execute()
@@ -4555,29 +4963,17 @@ def _member_special_events(member_id):
 
 def _aggregate_member_activity(member_id, member_name):
     """한 멤버의 세미나/벽돌책/소모임 활동 집계."""
-    history_res = supabase.table('history').select('id, date, book_title, genre, groups, facilitators') \
-        .order('date', desc=True).execute()
-    history = history_res.data or []
     seminar_records, facilitator_count = [], 0
-    for row in history:
-        groups = row.get('groups') or []
-        present = set()
-        for g in groups:
-            if isinstance(g, list):
-                present.update(g)
-            elif isinstance(g, str):
-                present.add(g)
-        if member_name in present:
-            is_fac = member_name in (row.get('facilitators') or [])
-            if is_fac:
-                facilitator_count += 1
-            seminar_records.append({
-                'history_id': row['id'],
-                'date': row.get('date'),
-                'book_title': row.get('book_title') or '',
-                'genre': row.get('genre') or '',
-                'is_facilitator': is_fac,
-            })
+    for row, is_fac in _history_index().member_records(member_name):
+        if is_fac:
+            facilitator_count += 1
+        seminar_records.append({
+            'history_id': row['id'],
+            'date': row.get('date'),
+            'book_title': row.get('book_title') or '',
+            'genre': row.get('genre') or '',
+            'is_facilitator': is_fac,
+        })
 
     # 벽돌책 세션 참여
     try:
@@ -4824,12 +5220,17 @@ def _build_attendance_matrix(start_date=None, end_date=None):
         .order('name').execute().data or []
 
     # 2) 세미나 history 조회 (날짜 범위 필터)
-    q = supabase.table('history').select('id, date, present, book_title')
-    if start_date:
-        q = q.gte('date', start_date)
-    if end_date:
-        q = q.lte('date', end_date)
-    histories = q.order('date').execute().data or []
+    def history_range(q):
+        if start_date:
+            q = q.gte('date', start_date)
+        if end_date:
+            q = q.lte('date', end_date)
+        return q
+
+    histories = sorted(
+        _iter_rows(supabase, 'history', 'id, date, present, book_title', where=history_range),
+        key=lambda row: str(row.get('date') or ''),
+    )
 
     # 3) 실제 세미나 회차별로 구성한다. 같은 주의 월/목 기록도 각각 보여야
     #    관리자가 "언제 참석했는지"를 정확히 확인할 수 있다.
@@ -4981,8 +5382,7 @@ def admin_seminar_rooms():
     last_day = next_first - timedelta(days=1)
 
     try:
-        posts_res = supabase.table('seminar_room_posts').select('*').execute()
-        posts = posts_res.data or []
+        posts = _read_all(supabase, 'seminar_room_posts', key='wr_id')
     except Exception as e:
         app.logger.error(f"seminar_room_posts 조회 실패: {e}")
         posts = []
@@ -5270,17 +5670,8 @@ def records_members():
         ).order('name').execute().data or []
         # 회원명부 클릭 시 미리 활동 요약을 보여주기 위해 각 멤버의 활동 카운트 집계
         if members:
-            # 1) 세미나/발제 카운트 (history.groups 이름 매칭)
-            history_rows = supabase.table('history').select('groups, facilitators').execute().data or []
-            seminar_cnt, fac_cnt = {}, {}
-            for r in history_rows:
-                names = set()
-                for g in (r.get('groups') or []):
-                    if isinstance(g, list): names.update(g)
-                    elif isinstance(g, str): names.add(g)
-                facs = set(r.get('facilitators') or [])
-                for n in names: seminar_cnt[n] = seminar_cnt.get(n, 0) + 1
-                for n in facs: fac_cnt[n] = fac_cnt.get(n, 0) + 1
+            # 1) 세미나/발제 카운트 (history.groups 이름 매칭, 이력 인덱스에서 한 번에)
+            member_counts = _history_index().member_counts()
             # 2) 벽돌책 + 소모임 세션 카운트 (member_id 기반)
             try:
                 bb_rows = supabase.table('brick_session_members').select('member_id').execute().data or []
@@ -5292,8 +5683,7 @@ def records_members():
             for r in bb_rows: bb_cnt[r['member_id']] = bb_cnt.get(r['member_id'], 0) + 1
             for r in sg_rows: sg_cnt[r['member_id']] = sg_cnt.get(r['member_id'], 0) + 1
             for m in members:
-                m['seminar_count'] = seminar_cnt.get(m['name'], 0)
-                m['facilitator_count'] = fac_cnt.get(m['name'], 0)
+                m['seminar_count'], m['facilitator_count'] = member_counts.get(m['name'], (0, 0))
                 m['brick_count'] = bb_cnt.get(m['id'], 0)
                 m['study_count'] = sg_cnt.get(m['id'], 0)
     except Exception as e:
@@ -5340,22 +5730,18 @@ def records_member_profile(member_id):
 def records_seminars():
     term_id = request.args.get('term_id') or ''
     try:
-        q = supabase.table('history').select('*').order('date', desc=True)
         start, end, _ = _get_term_range(term_id)
-        if start and end:
-            q = q.gte('date', start).lte('date', end)
-        history = q.execute().data or []
-        for row in history:
-            groups = row.get('groups') or []
-            present = []
-            for g in groups:
-                if isinstance(g, list):
-                    present.extend(g)
-                elif isinstance(g, str):
-                    present.append(g)
-            row['present_count'] = len(present)
-            row['group_count'] = len(groups) if groups and isinstance(groups[0], list) else 0
-            row['facilitator_count'] = len(row.get('facilitators') or [])
+        # 캐시된 행은 다른 요청과 함께 쓰므로 화면용 값은 복사본에 붙인다.
+        history = [
+            {
+                **{key: value for key, value in row.items() if key != 'excluded_names'},
+                'present_count': present_count,
+                'group_count': group_count,
+                'facilitator_count': facilitator_count,
+            }
+            for row, present_count, group_count, facilitator_count
+            in _history_index().row_summaries(start, end)
+        ]
 
         # 6개월 단위 버킷 그룹화 (예: "2025년 상반기", "2025년 하반기")
         buckets = []  # [{'key': str, 'label': str, 'rows': [..]}]
@@ -5395,16 +5781,18 @@ def records_seminar_detail(history_id):
                 all_present.extend(g)
             elif isinstance(g, str):
                 all_present.append(g)
-        member_map = {}
-        if all_present:
-            mres = supabase.table('members').select('id, name, gender').in_('name', list(set(all_present))).execute().data or []
-            member_map = {m['name']: m['id'] for m in mres}
-        else:
-            mres = []
+        # 기록에 남은 회원(탈퇴 포함)과 활성 회원 목록을 회원 표 한 번 읽어 나눈다.
+        present_set = set(all_present)
+        members = sorted(_read_all(supabase, 'members', 'id, name, gender, is_active'),
+                         key=lambda m: m.get('name') or '')
+        mres = [m for m in members if m.get('name') in present_set]
+        member_map = {m['name']: m['id'] for m in mres}
         member_genders = {m['name']: normalize_gender(m.get('gender')) for m in mres}
         genres = _load_genres()
-        all_members = supabase.table('members').select('id, name, gender') \
-            .eq('is_active', True).order('name').execute().data or []
+        all_members = [
+            {'id': m['id'], 'name': m['name'], 'gender': m.get('gender')}
+            for m in members if m.get('is_active')
+        ]
         for member in all_members:
             member['gender_code'] = normalize_gender(member.get('gender'))
             member_genders.setdefault(member['name'], member['gender_code'])
@@ -5468,10 +5856,12 @@ def update_history_meta(history_id):
         date_changed = 'date' in update
         old_row = None
         if groups_changed or date_changed:
-            old_res = supabase.table('history').select('groups, date').eq('id', history_id).execute()
-            old_row = (old_res.data or [None])[0]
+            old_res = supabase.table('history').select('id, groups, date, seminar_session_id') \
+                .eq('id', history_id).execute()
+            old_row = (_with_no_show_exclusions(old_res.data or []) or [None])[0]
 
         supabase.table('history').update(update).eq('id', history_id).execute()
+        grouping_history_version.bump(history_ids=[history_id])
 
         # 세미나 운영 화면에서 생성된 기록은 도서명이 주차·회차·발제문에도 공유된다.
         # 기록 화면에서 고쳐도 원본 일정과 짝 회차가 즉시 같은 제목을 보도록 역동기화한다.
@@ -5494,8 +5884,11 @@ def update_history_meta(history_id):
                 supabase.table('topic_events').update(title_update) \
                     .eq('seminar_week_id', week_id).execute()
                 if linked_session_ids:
-                    supabase.table('history').update(title_update) \
-                        .in_('seminar_session_id', linked_session_ids).execute()
+                    updated = supabase.table('history').update(title_update) \
+                        .in_('seminar_session_id', linked_session_ids).execute().data or []
+                    grouping_history_version.bump(
+                        history_ids=[row['id'] for row in updated], session_ids=linked_session_ids,
+                    )
             else:
                 supabase.table('seminar_sessions').update(title_update) \
                     .eq('id', linked_session_id).execute()
@@ -5503,13 +5896,8 @@ def update_history_meta(history_id):
                     .eq('seminar_session_id', linked_session_id).execute()
 
         if old_row is not None and (groups_changed or date_changed):
-            old_groups = old_row.get('groups') or []
-            old_date = old_row.get('date') or ''
-            new_groups = update.get('groups', old_groups)
-            new_date = update.get('date', old_date)
-            affected_keys = _pair_keys_from_groups(old_groups) | _pair_keys_from_groups(new_groups)
-            if affected_keys:
-                rebuild_co_matrix(affected_keys)
+            new_row = {**old_row, **{key: update[key] for key in ('groups', 'date') if key in update}}
+            _apply_history_change(old_row, new_row)
 
         return jsonify({'status': 'success'})
     except Exception as e:
@@ -5522,13 +5910,13 @@ def update_history_meta(history_id):
 def records_history_delete(history_id):
     """세미나 기록 삭제 + co_matrix 차감."""
     try:
-        old_res = supabase.table('history').select('groups, date').eq('id', history_id).execute()
-        old_row = (old_res.data or [None])[0]
+        old_res = supabase.table('history').select('id, groups, date, seminar_session_id') \
+            .eq('id', history_id).execute()
+        old_row = (_with_no_show_exclusions(old_res.data or []) or [None])[0]
         supabase.table('history').delete().eq('id', history_id).execute()
+        grouping_history_version.bump(history_ids=[history_id])
         if old_row:
-            affected_keys = _pair_keys_from_groups(old_row.get('groups') or [])
-            if affected_keys:
-                rebuild_co_matrix(affected_keys)
+            _apply_history_change(old_row=old_row)
         return jsonify({'status': 'success'})
     except Exception as e:
         app.logger.error(f"records_history_delete error: {e}", exc_info=True)
@@ -5667,7 +6055,8 @@ def seminar_session_add_no_shows(session_id):
                 for member_id in new_member_ids
             ]).execute()
         # 이미 저장된 계획표가 있더라도 미연락 불참자는 실제 만남으로 세지 않는다.
-        _rebuild_matrix_for_session(session_id)
+        grouping_history_version.bump(session_ids=[session_id])
+        _apply_no_show_change(session_id, new_member_ids, excluded=True)
         return jsonify({
             'status': 'success',
             'added_count': len(new_member_ids),
@@ -5685,14 +6074,16 @@ def seminar_session_add_no_shows(session_id):
 def seminar_session_cancel_no_show(session_id, member_id):
     try:
         stamp = datetime.now(timezone.utc).isoformat()
-        supabase.table('seminar_no_shows').update({
+        cancelled = supabase.table('seminar_no_shows').update({
             'cancelled_at': stamp,
             'cancelled_by': session.get('user_id'),
             'updated_at': stamp,
         }).eq('session_id', session_id).eq('member_id', member_id) \
-            .is_('cancelled_at', 'null').execute()
+            .is_('cancelled_at', 'null').execute().data or []
         # 취소된 경우에는 해당 회원의 만남을 원래 계획표 기준으로 다시 복구한다.
-        _rebuild_matrix_for_session(session_id)
+        grouping_history_version.bump(session_ids=[session_id])
+        if cancelled:
+            _apply_no_show_change(session_id, [member_id], excluded=False)
         return jsonify({'status': 'success'})
     except Exception as e:
         app.logger.error(f"seminar_session_cancel_no_show error: {e}", exc_info=True)
@@ -5719,14 +6110,27 @@ def seminar_week_update(week_id):
         supabase.table('seminar_sessions').update(update).eq('seminar_week_id', week_id).execute()
         supabase.table('topic_events').update(update).eq('seminar_week_id', week_id).execute()
         session_ids = [row['id'] for row in sessions]
-        supabase.table('history').update({'book_title': book_title or None}) \
-            .in_('seminar_session_id', session_ids).execute()
+        updated = supabase.table('history').update({'book_title': book_title or None}) \
+            .in_('seminar_session_id', session_ids).execute().data or []
+        grouping_history_version.bump(history_ids=[row['id'] for row in updated], session_ids=session_ids)
         return jsonify({'status': 'success'})
     except Exception as e:
         app.logger.error(f"seminar_week_update error: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@app.route('/api/admin/bookclub/check_matrix')
+@login_required(role="admin")
+def admin_check_bookclub_matrix():
+    """저장된 만남 매트릭스가 history와 어긋난 정도를 쓰지 않고 확인한다."""
+    try:
+        result = rebuild_co_matrix(dry_run=True)
+        return jsonify({'status': 'success', **result})
+    except Exception as e:
+        app.logger.error(f"admin_check_bookclub_matrix error: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/admin/bookclub/rebuild_matrix', methods=['POST'])
 @login_required(role="admin")
 def admin_rebuild_bookclub_matrix():
@@ -5985,10 +6389,13 @@ def records_analytics():
         min_attendance = 3
     try:
         start, end, _ = _get_term_range(term_id)
-        hq = supabase.table('history').select('id, date, genre, present, book_title')
-        if start and end:
-            hq = hq.gte('date', start).lte('date', end)
-        history = hq.order('date').execute().data or []
+        history = sorted(
+            _iter_rows(
+                supabase, 'history', 'id, date, genre, present, book_title',
+                where=(lambda q: q.gte('date', start).lte('date', end)) if start and end else None,
+            ),
+            key=lambda row: str(row.get('date') or ''),
+        )
         genre_counts, monthly_counts, member_attend = {}, {}, {}
         for row in history:
             g = row.get('genre') or '미분류'
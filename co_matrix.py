@@ -0,0 +1,103 @@
+"""회원 ID 기준의 밀집 만남 매트릭스.
+
+조 편성 이력은 이름으로 저장되어 있지만, 이 매트릭스는 회원 ID마다 한 칸을 주고
+만남 횟수(uint16)와 최근 만남일(day ordinal, int32)을 NumPy 배열로 담는다.
+이름 ↔ ID 변환은 만들 때와 결과를 내보낼 때 한 번씩만 하고, 쌍 조회는 배열 인덱싱이다.
+조 편성 문제(pair_counts_for)와 수동 편성 채점(grouping_index)이 이 배열을 그대로 읽는다.
+"""
+
+import numpy as np
+
+from group_history import day_ordinal
+
+
+# uint16 칸이 넘치지 않도록 만남 횟수는 이 값에서 멈춘다.
+COUNT_MAX = np.iinfo(np.uint16).max
+
+
+class CoMatrix:
+    """회원 ID × 회원 ID 만남 횟수·최근 만남일 배열.
+
+    회원 목록에 없는 이름(탈퇴 회원 등)은 이름 자체를 ID로 삼아 자리를 준다.
+    마지막 행·열(self.unknown)은 어디에도 없는 이름이 함께 쓰는 빈 자리라 늘 0이다.
+    """
+
+    def __init__(self, member_rows=(), history_rows=()):
+        self.ids = []
+        self.names = []
+        self.id_by_name = {}
+        for row in member_rows or []:
+            name = str(row.get('name') or '').strip()
+            if name and name not in self.id_by_name:
+                self._add_member(row.get('id') or name, name)
+        for row in history_rows or []:
+            for group in row.get('groups') or []:
+                if isinstance(group, list):
+                    for name in group:
+                        name = str(name).strip()
+                        if name and name not in self.id_by_name:
+                            self._add_member(name, name)
+
+        self.position = {member_id: position for position, member_id in enumerate(self.ids)}
+        self.unknown = len(self.ids)
+        self.counts = np.zeros((self.unknown + 1, self.unknown + 1), dtype=np.uint16)
+        self.last_met = np.zeros((self.unknown + 1, self.unknown + 1), dtype=np.int32)
+        for row in history_rows or []:
+            for group in row.get('groups') or []:
+                if isinstance(group, list):
+                    self.add_group(group, row.get('date'), row.get('excluded_names'))
+
+    def _add_member(self, member_id, name):
+        self.ids.append(member_id)
+        self.names.append(name)
+        self.id_by_name[name] = member_id
+
+    # --- 이름 ↔ 위치 변환(경계에서 한 번) ---
+
+    def positions(self, names):
+        """이름 목록을 배열 위치로 바꾼다. 모르는 이름은 self.unknown(늘 0인 칸)이다."""
+        return np.array([
+            self.position.get(self.id_by_name.get(str(name).strip()), self.unknown)
+            for name in names
+        ], dtype=np.int64)
+
+    # --- 갱신 ---
+
+    def add_group(self, group, meeting_date=None, excluded_names=None, times=1):
+        """한 조에서 만난 쌍을 한꺼번에 더한다(times가 음수면 뺀다). 모르는 이름은 건너뛴다."""
+        excluded = {str(name).strip() for name in excluded_names or []}
+        members = np.unique(self.positions(
+            [name for name in group if str(name).strip() and str(name).strip() not in excluded]
+        ))
+        members = members[members != self.unknown]
+        if len(members) < 2:
+            return
+        block = np.ix_(members, members)
+        updated = np.clip(self.counts[block].astype(np.int32) + times, 0, COUNT_MAX)
+        np.fill_diagonal(updated, 0)
+        self.counts[block] = updated
+        ordinal = day_ordinal(meeting_date)
+        if times > 0 and ordinal:
+            days = np.maximum(self.last_met[block], ordinal)
+            np.fill_diagonal(days, 0)
+            self.last_met[block] = days
+
+    # --- 조회 ---
+
+    def submatrix(self, names):
+        """참석자 목록 순서의 (만남 횟수, 최근 만남일) 부분 행렬."""
+        members = self.positions(names)
+        block = np.ix_(members, members)
+        counts = self.counts[block].copy()
+        last_met = self.last_met[block].copy()
+        # 같은 이름이 두 번 들어왔거나 모르는 이름끼리는 만난 적 없는 것으로 둔다.
+        same = members[:, None] == members[None, :]
+        counts[same] = 0
+        last_met[same] = 0
+        return counts, last_met
+
+    def pair_counts_for(self, names):
+        """GroupingProblem.pair_counts 형식의 {(i, j): 횟수}. i < j는 names 안의 순서다."""
+        counts, _ = self.submatrix(names)
+        rows, cols = np.nonzero(np.triu(counts, 1))
+        return {(i, j): int(counts[i, j]) for i, j in zip(rows.tolist(), cols.tolist())}
@@ -1,67 +1,171 @@
-# rebuild_matrix.py
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from datetime import datetime
+"""bookclub_co_matrix를 history에서 다시 계산해 바뀐 쌍만 고치는 CLI.
+
+    python compare_matrix.py --dry-run            # 현재 표와의 차이만 출력한다
+    python compare_matrix.py                      # 차이만 반영한다
+    python compare_matrix.py --chunk-size 200 --workers 2
+
+앱의 rebuild_co_matrix와 같은 규칙(group_history.matrix_rows_from_history, 취소되지 않은
+미연락 불참자 제외)으로 계산한다. history와 현재 표는 키셋 페이지로 나눠 읽고, 새로 생기거나
+값이 바뀐 쌍은 upsert, 이력에 없는 쌍은 delete를 chunk 단위로 최대 workers개까지 동시에 보낸다.
+delete와 id 조회는 키를 URL의 in.(...) 필터에 싣기 때문에 IN_CHUNK_SIZE개씩 따로 나눈다.
+upsert를 모두 마친 뒤에 지우므로 도중에 멈춰도 표가 비는 일이 없고, 다시 실행하면 남은 차이만 고친다.
+"""
+
+import argparse
 import os
-import itertools
-from group_history import canonical_pair_key
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from group_history import (
+    matrix_diff,
+    matrix_rows_from_history,
+    no_show_names_by_session,
+    with_excluded_names,
+)
+from supabase_pages import iter_rows
+
+TABLE = 'bookclub_co_matrix'
+# 요청 하나에 담는 쌍 수
+CHUNK_SIZE = 500
+# in_ 필터 하나에 담는 값 수. 값이 URL에 실리므로 한글 pair_key 500개(약 30KB)면
+# 프록시의 URL 길이 제한에 걸린다. 50개면 3KB 안쪽이다.
+IN_CHUNK_SIZE = 50
+# 동시에 보내는 upsert/delete 요청 수
+WORKERS = 4
+# 이 행 수마다 읽기 진행 상황을 출력한다.
+PROGRESS_EVERY = 1000
+
+
+def _report(label, rows, every=PROGRESS_EVERY):
+    """rows를 그대로 흘려보내며 every건마다 읽은 수를 출력한다."""
+    count = 0
+    for row in rows:
+        count += 1
+        if count % every == 0:
+            print(f"  {label} {count}건 읽는 중…", flush=True)
+        yield row
+    print(f"  {label} {count}건", flush=True)
+
+
+def expected_matrix_rows(client, page_size=None):
+    """history를 흘려 읽으며 쌍별 만남 횟수·마지막 만남일을 계산한다."""
+    no_shows = list(iter_rows(
+        client, 'seminar_no_shows', 'session_id, member_id', page_size=page_size,
+        where=lambda q: q.is_('cancelled_at', 'null'),
+    ))
+    member_ids = sorted({row['member_id'] for row in no_shows})
+    members = []
+    for chunk in _chunks(member_ids, IN_CHUNK_SIZE):
+        members.extend(iter_rows(
+            client, 'members', 'id, name', page_size=page_size,
+            where=lambda q, chunk=chunk: q.in_('id', chunk),
+        ))
+    excluded_by_session = no_show_names_by_session(no_shows, members)
+    print(f"INFO: 미연락 불참 기록 {len(no_shows)}건(회차 {len(excluded_by_session)}개)을 만남에서 뺍니다.")
+
+    history = iter_rows(client, 'history', 'id, date, groups, seminar_session_id', page_size=page_size)
+    return matrix_rows_from_history(with_excluded_names(_report('history', history), excluded_by_session))
+
+
+def stored_matrix_rows(client, page_size=None):
+    rows = iter_rows(client, TABLE, 'pair_key, count, last_met', key='pair_key', page_size=page_size)
+    return {row['pair_key']: row for row in _report(TABLE, rows)}
+
 
-print(f"[{datetime.now()}] 'bookclub_co_matrix' 테이블 재구축을 시작합니다.")
+def plan_changes(expected_rows, stored_rows):
+    """(upsert할 행 목록, 지울 pair_key 목록, matrix_diff 결과)."""
+    missing, stale, mismatched = matrix_diff(expected_rows, stored_rows)
+    upserts = [expected_rows[key] for key in missing + mismatched]
+    return upserts, stale, (missing, stale, mismatched)
+
+
+def print_diff(expected_rows, stored_rows, diff, limit=20):
+    missing, stale, mismatched = diff
+    print(f"INFO: 새 쌍 {len(missing)}개, 지울 쌍 {len(stale)}개, 값이 다른 쌍 {len(mismatched)}개")
+    for key in missing[:limit]:
+        row = expected_rows[key]
+        print(f"  + {key}: {row['count']}회, {row['last_met']}")
+    for key in stale[:limit]:
+        row = stored_rows[key]
+        print(f"  - {key}: {row.get('count')}회, {row.get('last_met')}")
+    for key in mismatched[:limit]:
+        old, new = stored_rows[key], expected_rows[key]
+        print(f"  ~ {key}: {old.get('count')}회 {old.get('last_met')} → {new['count']}회 {new['last_met']}")
+
+
+def _chunks(items, size):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def _send_chunks(label, chunks, send, workers):
+    """chunk마다 send를 최대 workers개 동시에 부르고 진행 상황을 출력한다. 하나라도 실패하면 멈춘다."""
+    total = sum(len(chunk) for chunk in chunks)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(send, chunk): len(chunk) for chunk in chunks}
+        try:
+            for future in as_completed(futures):
+                future.result()
+                done += futures[future]
+                print(f"  {label} {done}/{total}", flush=True)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def apply_changes(client, upserts, deletes, chunk_size=CHUNK_SIZE, workers=WORKERS):
+    """upsert를 모두 마친 뒤 delete한다. 어느 단계에서 멈춰도 표에는 이전 값이나 새 값이 남는다.
+
+    upsert는 본문에 실리므로 chunk_size씩, delete는 키가 URL에 실리므로 IN_CHUNK_SIZE를 넘지 않게 보낸다.
+    """
+    _send_chunks(
+        'upsert', list(_chunks(upserts, chunk_size)),
+        lambda chunk: client.table(TABLE).upsert(chunk, on_conflict='pair_key').execute(),
+        workers,
+    )
+    _send_chunks(
+        'delete', list(_chunks(deletes, min(chunk_size, IN_CHUNK_SIZE))),
+        lambda chunk: client.table(TABLE).delete().in_('pair_key', chunk).execute(),
+        workers,
+    )
+
+
+def run(client, dry_run=False, chunk_size=CHUNK_SIZE, workers=WORKERS, page_size=None, show=20):
+    started = time.monotonic()
+    expected_rows = expected_matrix_rows(client, page_size)
+    stored_rows = stored_matrix_rows(client, page_size)
+    upserts, deletes, diff = plan_changes(expected_rows, stored_rows)
+    print(f"INFO: 이력 기준 {len(expected_rows)}쌍, 현재 표 {len(stored_rows)}쌍")
+    print_diff(expected_rows, stored_rows, diff, show)
+    if dry_run:
+        print("INFO: --dry-run이므로 표를 바꾸지 않았습니다.")
+    elif upserts or deletes:
+        apply_changes(client, upserts, deletes, chunk_size, workers)
+        print(f"✅ {len(upserts)}쌍 갱신, {len(deletes)}쌍 삭제 ({time.monotonic() - started:.1f}s)")
+    else:
+        print("✅ 이미 이력과 일치합니다.")
+    return {'upsert_count': len(upserts), 'delete_count': len(deletes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='차이만 출력하고 표는 바꾸지 않는다')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='요청 하나에 담는 쌍 수')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='동시에 보내는 요청 수')
+    parser.add_argument('--page-size', type=int, help='읽기 페이지 크기(기본 SUPABASE_PAGE_SIZE)')
+    parser.add_argument('--show', type=int, default=20, help='종류별로 출력할 차이 수')
+    args = parser.parse_args()
 
-try:
-    # .env 파일에서 환경 변수 로드 및 Supabase 클라이언트 초기화
     load_dotenv()
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-    # 1. 'history' 테이블에서 모든 원본 기록을 가져옵니다.
-    history_res = supabase.table('history').select('date, groups').execute()
-    all_history = history_res.data
-    print(f"INFO: 총 {len(all_history)}개의 과거 모임 기록을 발견했습니다.")
-
-    # 2. 'members' 테이블에서 모든 회원 이름을 가져와 유효한 이름 목록을 만듭니다.
-    members_res = supabase.table('members').select('name').execute()
-    valid_names = {member['name'] for member in members_res.data}
-    print(f"INFO: 총 {len(valid_names)}명의 유효한 회원 이름을 확인했습니다.")
-
-    # 3. 모든 만남 기록을 처음부터 다시 계산합니다.
-    new_matrix = {}
-    for record in all_history:
-        meeting_date = record.get('date')
-        groups = record.get('groups', [])
-        for group in groups:
-            # 그룹 내에 유효한 이름만 필터링합니다.
-            valid_group_members = [name for name in group if name in valid_names]
-
-            # 그룹 내 모든 쌍(pair)을 만듭니다.
-            for name1, name2 in itertools.combinations(valid_group_members, 2):
-                pair_key = canonical_pair_key(name1, name2)
-
-                if pair_key not in new_matrix:
-                    new_matrix[pair_key] = {'count': 0, 'last_met': '1970-01-01'}
-
-                new_matrix[pair_key]['count'] += 1
-                if meeting_date and meeting_date > new_matrix[pair_key]['last_met']:
-                    new_matrix[pair_key]['last_met'] = meeting_date
-
-    print(f"INFO: 총 {len(new_matrix)}개의 고유한 만남 쌍을 재계산했습니다.")
-
-    # 4. 기존 'bookclub_co_matrix' 테이블의 모든 데이터를 삭제합니다.
-    print("INFO: 기존 'bookclub_co_matrix' 테이블의 모든 데이터를 삭제합니다...")
-    # 'match'를 사용하여 모든 행을 대상으로 delete를 실행합니다.
-    supabase.table('bookclub_co_matrix').delete().neq('pair_key', 'dummy_value_to_delete_all').execute()
-
-    # 5. 새로 계산된 데이터를 테이블에 삽입합니다.
-    if new_matrix:
-        data_to_insert = [
-            {'pair_key': pair, 'count': values['count'], 'last_met': values['last_met']}
-            for pair, values in new_matrix.items()
-        ]
-        print(f"INFO: 새로 계산된 {len(data_to_insert)}개의 데이터를 테이블에 삽입합니다...")
-        supabase.table('bookclub_co_matrix').insert(data_to_insert).execute()
-
-    print("✅ 'bookclub_co_matrix' 테이블 재구축이 성공적으로 완료되었습니다.")
-
-except Exception as e:
-    print(f"❌ 오류가 발생했습니다: {e}")
+    client = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_SERVICE_KEY"))
+    run(client, dry_run=args.dry_run, chunk_size=max(1, args.chunk_size), workers=args.workers,
+        page_size=args.page_size, show=args.show)
+
+
+if __name__ == '__main__':
+    main()
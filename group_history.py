@@ -1,5 +1,6 @@
 """조 편성 이력에서 만남 매트릭스를 계산하는 순수 함수."""
 
+import datetime
 import itertools
 
 
@@ -49,37 +50,81 @@ def matrix_rows_from_history(history_rows, only_keys=None):
     return stats
 
 
-def meeting_details_from_history(history_rows):
-    """Return pair meeting counts and every recorded date for result previews."""
-    stats = {}
-    for row in history_rows or []:
-        meeting_date = str(row.get('date') or '').strip()
-        excluded_names = {
-            str(name).strip() for name in (row.get('excluded_names') or [])
-            if str(name).strip()
+def no_show_names_by_session(no_show_rows, member_rows):
+    """취소되지 않은 미연락 불참 기록을 {seminar_session_id: {이름}}으로 묶는다."""
+    name_by_id = {row['id']: row.get('name') for row in member_rows or []}
+    excluded = {}
+    for row in no_show_rows or []:
+        name = str(name_by_id.get(row['member_id']) or '').strip()
+        if name:
+            excluded.setdefault(row['session_id'], set()).add(name)
+    return excluded
+
+
+def with_excluded_names(history_rows, excluded_by_session):
+    """history 행마다 연결 회차의 불참자를 'excluded_names'로 붙여 하나씩 내준다."""
+    for row in history_rows:
+        yield {
+            **row,
+            'excluded_names': sorted(excluded_by_session.get(row.get('seminar_session_id'), set())),
         }
-        for group in row.get('groups') or []:
-            if not isinstance(group, list):
-                continue
-            names = [
-                str(name).strip() for name in group
-                if str(name).strip() and str(name).strip() not in excluded_names
-            ]
-            for a, b in itertools.combinations(names, 2):
-                if a == b:
-                    continue
-                key = canonical_pair_key(a, b)
-                item = stats.setdefault(key, {
-                    'count': 0,
-                    'last_met': None,
-                    'dates': [],
-                })
-                item['count'] += 1
-                if meeting_date:
-                    if meeting_date not in item['dates']:
-                        item['dates'].append(meeting_date)
-                    if not item['last_met'] or meeting_date > item['last_met']:
-                        item['last_met'] = meeting_date
-    for item in stats.values():
-        item['dates'].sort(reverse=True)
-    return stats
+
+
+def matrix_diff(expected_rows, stored_rows):
+    """(저장 안 된 키, 이력에 없는 키, 값이 다른 키) 정렬 목록."""
+    missing = sorted(set(expected_rows) - set(stored_rows))
+    stale = sorted(set(stored_rows) - set(expected_rows))
+    mismatched = sorted(
+        key for key in set(expected_rows) & set(stored_rows)
+        if int(stored_rows[key].get('count') or 0) != expected_rows[key]['count']
+        or str(stored_rows[key].get('last_met') or '')[:10] != str(expected_rows[key]['last_met'] or '')[:10]
+    )
+    return missing, stale, mismatched
+
+
+def matrix_drift(expected_rows, stored_rows):
+    """이력에서 다시 계산한 행과 저장된 행의 차이. 저장된 표가 이력과 어긋났는지 확인하는 데 쓴다."""
+    missing, stale, mismatched = matrix_diff(expected_rows, stored_rows)
+    return {
+        'missing_count': len(missing),
+        'stale_count': len(stale),
+        'mismatched_count': len(mismatched),
+        'samples': (missing + stale + mismatched)[:10],
+    }
+
+
+def day_ordinal(value):
+    """'YYYY-MM-DD...' 날짜를 date.toordinal() 값으로 바꾼다. 날짜가 아니면 0."""
+    try:
+        return datetime.date.fromisoformat(str(value or '').strip()[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+def day_from_ordinal(ordinal):
+    """day_ordinal의 역. 0이면 None."""
+    return datetime.date.fromordinal(int(ordinal)).isoformat() if ordinal > 0 else None
+
+
+def latest_matching_grouping(history_rows, attendee_names, seminar_session_id=None,
+                             min_overlap=0.8):
+    """Return the groups of the most recent saved grouping for the same roster.
+
+    A row saved for the same seminar session wins; otherwise the newest row whose
+    members overlap the attendees by at least min_overlap (Jaccard) is used.
+    """
+    attendees = {str(name).strip() for name in attendee_names if str(name).strip()}
+    best = None
+    for row in history_rows or []:
+        groups = [group for group in row.get('groups') or [] if isinstance(group, list)]
+        if not groups or not attendees:
+            continue
+        members = {str(name).strip() for group in groups for name in group if str(name).strip()}
+        same_session = bool(seminar_session_id) and row.get('seminar_session_id') == seminar_session_id
+        overlap = len(members & attendees) / len(members | attendees)
+        if not same_session and overlap < min_overlap:
+            continue
+        rank = (same_session, str(row.get('date') or ''))
+        if best is None or rank > best[0]:
+            best = (rank, groups)
+    return best[1] if best else None
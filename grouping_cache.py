@@ -0,0 +1,276 @@
+"""조 편성 결과 캐시와 이력 버전.
+
+같은 참석자·발제자·조 수·편성 제한·최적화 기준으로 다시 요청하면 솔버를 돌리지 않고
+이전 결과를 돌려준다. 키에는 이력 버전이 들어가며, 기록 저장·수정·삭제·노쇼 변경 때마다
+버전이 올라가므로 만남 기록이 바뀐 뒤에는 예전 결과가 조회되지 않는다.
+
+이력 버전마다 바뀐 history 행·회차를 기록해 두므로, HistoryRowsCache는 버전이 올라도
+바뀐 행만 다시 읽는다.
+
+메모리는 LRU로 MAX_ENTRIES개까지 두고, 디스크 계층(GROUPING_CACHE_DIR)이 있으면
+워커끼리 결과를 공유하고 워커가 재시작되어도 유지한다. GROUPING_CACHE_DIR를 빈 값으로
+두면 디스크 계층을 끈다(이때 이력 버전도 프로세스 안에서만 유지된다).
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('GROUPING_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'grouping_cache'))
+MAX_ENTRIES = 64
+MAX_DISK_ENTRIES = 256
+# 이력 버전별 변경 기록을 최근 몇 개까지 남길지
+CHANGE_LOG_SIZE = 256
+# 앱 밖(대시보드 등)에서 고친 이력도 반영되도록 이 시간이 지나면 전체를 다시 읽는다.
+HISTORY_ROWS_TTL = 300.0
+
+
+def grouping_cache_key(attendees, facilitators, group_count_override, restricted_pairs,
+                       optimize_for, history_version, **options):
+    """요청을 정규화해 해시한 캐시 키. 순서만 다른 입력은 같은 키가 된다."""
+    payload = {
+        'attendees': sorted(str(name).strip() for name in attendees),
+        'facilitators': sorted(str(name).strip() for name in facilitators),
+        'group_count': group_count_override,
+        'restricted': sorted(sorted(str(name).strip() for name in pair) for pair in restricted_pairs or ()),
+        'optimize_for': optimize_for,
+        'history_version': history_version,
+        'options': {key: options[key] for key in sorted(options)},
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class HistoryVersion:
+    """조 편성 이력이 바뀔 때마다 1씩 오르는 버전.
+
+    directory가 있으면 파일에 두고 flock으로 올리므로 gunicorn 워커끼리 같은 값을 본다.
+    bump에 바뀐 history 행 ID나 회차 ID를 넘기면 버전별 변경 기록으로 남는다.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self._path = os.path.join(directory, 'history_version') if directory else None
+        self._value = 0
+        self._changes = []
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def current(self):
+        if self._path is None:
+            return self._value
+        try:
+            with open(self._path, encoding='utf-8') as handle:
+                return int(handle.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self, history_ids=None, session_ids=None):
+        """버전을 올린다. 바뀐 범위를 모르면 ID 없이 불러 전체를 다시 읽게 한다."""
+        with self._lock:
+            if self._path is None:
+                self._value += 1
+                value = self._value
+                self._changes = self._record_change(self._changes, value, history_ids, session_ids)
+            else:
+                with open(self._path + '.lock', 'a') as lock_handle:
+                    fcntl.flock(lock_handle, fcntl.LOCK_EX)
+                    try:
+                        value = self.current() + 1
+                        changes = self._record_change(self._read_changes(), value, history_ids, session_ids)
+                        self._write(self._path + '.log', json.dumps(changes))
+                        self._write(self._path, str(value))
+                    finally:
+                        fcntl.flock(lock_handle, fcntl.LOCK_UN)
+        logger.info("[grouping-cache] 이력 버전 %d", value)
+        return value
+
+    def changes_since(self, version):
+        """version 다음부터 지금까지 바뀐 (history_ids, session_ids). 알 수 없으면 None."""
+        changes = self._changes if self._path is None else self._read_changes()
+        current = self.current()
+        wanted = {entry['version']: entry for entry in changes if entry['version'] > version}
+        if len(wanted) != current - version:
+            return None
+        history_ids, session_ids = set(), set()
+        for entry in wanted.values():
+            if entry['history_ids'] is None and entry['session_ids'] is None:
+                return None
+            history_ids.update(entry['history_ids'] or ())
+            session_ids.update(entry['session_ids'] or ())
+        return history_ids, session_ids
+
+    @staticmethod
+    def _record_change(changes, version, history_ids, session_ids):
+        entry = {
+            'version': version,
+            'history_ids': None if history_ids is None else [str(item) for item in history_ids],
+            'session_ids': None if session_ids is None else [str(item) for item in session_ids],
+        }
+        return (changes + [entry])[-CHANGE_LOG_SIZE:]
+
+    def _read_changes(self):
+        try:
+            with open(self._path + '.log', encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return []
+
+    @staticmethod
+    def _write(path, text):
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+        os.replace(temp_path, path)
+
+
+class HistoryRowsCache:
+    """이력 버전이 같으면 이미 읽은 history 행과 그로부터 만든 값을 다시 쓰는 프로세스 캐시.
+
+    loader()는 전체 행을, row_loader(history_ids, session_ids)는 해당 ID의 행과 해당 회차에
+    연결된 행만 읽는다. 버전이 올랐어도 변경 기록이 남아 있으면 그 행만 다시 읽어 바꿔 끼운다.
+    돌려주는 행은 여러 요청이 함께 쓰므로 읽기만 해야 한다.
+    """
+
+    def __init__(self, version, loader, row_loader, ttl=HISTORY_ROWS_TTL):
+        self._version = version
+        self._loader = loader
+        self._row_loader = row_loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._rows = None
+        self._loaded_version = None
+        self._loaded_at = 0.0
+        self._derived = {}
+
+    def get(self, refresh=False):
+        # 읽기 전에 버전을 잡아야, 읽는 도중 바뀐 행이 다음 호출에서 다시 읽힌다.
+        version = self._version.current()
+        with self._lock:
+            fresh = time.monotonic() - self._loaded_at < self._ttl
+            if self._rows is not None and fresh and not refresh:
+                if version == self._loaded_version:
+                    return list(self._rows)
+                changes = self._version.changes_since(self._loaded_version)
+                if changes is not None:
+                    self._patch(*changes)
+                    self._loaded_version = version
+                    return list(self._rows)
+            started = time.monotonic()
+            self._rows = list(self._loader())
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+            self._derived = {}
+            logger.info("[history-cache] 이력 %d건 전체 로드, %.2fs",
+                        len(self._rows), self._loaded_at - started)
+            return list(self._rows)
+
+    def _patch(self, history_ids, session_ids):
+        fetched = self._row_loader(history_ids, session_ids) if history_ids or session_ids else []
+        fetched_ids = {str(row.get('id')) for row in fetched}
+        self._rows = [
+            row for row in self._rows
+            if str(row.get('id')) not in history_ids | fetched_ids
+            and str(row.get('seminar_session_id')) not in session_ids
+        ] + list(fetched)
+        self._derived = {}
+        logger.info("[history-cache] 바뀐 이력 %d건만 다시 읽음", len(fetched))
+
+    def derived(self, name, builder):
+        """현재 행으로 만든 값(만남 매트릭스 등)을 행이 바뀔 때까지 재사용한다."""
+        self.get()
+        with self._lock:
+            rows = self._rows
+            entry = self._derived.get(name)
+            if entry is not None and entry[0] is rows:
+                return entry[1]
+        value = builder(list(rows))
+        with self._lock:
+            self._derived[name] = (rows, value)
+        return value
+
+
+class GroupingResultCache:
+    """메모리 LRU + 선택적 디스크 계층."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, directory=CACHE_DIR,
+                 max_disk_entries=MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.directory = os.path.join(directory, 'results') if directory else None
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        results = self._read_disk(key)
+        if results is not None:
+            self._remember(key, results)
+        return results
+
+    def put(self, key, results):
+        self._remember(key, results)
+        self._write_disk(key, results)
+
+    def _remember(self, key, results):
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                results = json.load(handle)
+            os.utime(path)
+            return results
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, results):
+        if not self.directory:
+            return
+        path = self._disk_path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, ensure_ascii=False)
+            os.replace(temp_path, path)
+            self._prune_disk()
+        except OSError as ex:
+            logger.warning("[grouping-cache] 디스크 저장 실패: %s", ex)
+
+    def _prune_disk(self):
+        """오래 쓰이지 않은 파일부터 지워 MAX_DISK_ENTRIES개를 넘지 않게 한다."""
+        paths = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith('.json')
+        ]
+        if len(paths) <= self.max_disk_entries:
+            return
+        paths.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
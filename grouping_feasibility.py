@@ -0,0 +1,188 @@
+"""솔버를 띄우기 전에 조 편성 제약이 서로 모순되는지 확인하는 사전 검사.
+
+CP-SAT는 해가 없는 모델에서도 라운드마다 시간 제한을 다 쓰고 빈 결과만 돌려준다.
+여기서는 OR-Tools 없이 수 밀리초 안에 다음을 확인하고, 어떤 조건이 충돌하는지
+관리자가 읽을 수 있는 문장으로 돌려준다.
+
+- 인원 수: 관리자가 지정한 조 수가 최소 인원으로 채울 수 있는 조 수를 넘지 않는지,
+  참석자 수가 (조 수 × 최소 인원) ~ (조 수 × 최대 인원) 안에 드는지
+- 발제자 분산: 발제자끼리는 한 조에 한 명씩만 들어가므로 서로 제한된 쌍처럼 다룬다
+- 편성 제한 그래프: 같은 조가 될 수 없는 사람들을 조 수만큼의 색으로 칠할 수 있는지
+  (조당 최대 인원과 남은 자리 채우기까지 고려한 제한적 백트래킹)
+
+백트래킹이 탐색 한도를 넘으면 판단을 미루고 솔버에 맡긴다. 즉 여기서 돌려주는 충돌은
+항상 실제로 해가 없는 경우뿐이다.
+"""
+
+SEARCH_NODE_LIMIT = 20000
+
+
+def find_infeasibility(problem):
+    """GroupingProblem의 제약이 동시에 만족될 수 없으면 이유 목록을, 아니면 빈 목록을 반환한다.
+
+    각 항목은 {'constraint': 'size' | 'restrictions', 'message': str, 'members': [이름]} 형태다.
+    """
+    n = problem.n
+    num_groups = problem.num_groups
+    min_size = problem.min_size
+    max_size = problem.max_size
+
+    # build_grouping_problem은 지정 조 수를 n // min_size로 줄여 두므로, 줄이기 전 값으로 확인한다.
+    requested = problem.requested_groups
+    if requested and requested * min_size > n:
+        return [{
+            'constraint': 'size',
+            'message': (
+                f"참석자 {n}명을 지정한 {requested}개 조로 나눌 수 없습니다. "
+                f"조당 최소 {min_size}명이면 {max(1, n // min_size)}개 조까지 만들 수 있습니다."
+            ),
+            'members': [],
+        }]
+
+    if n < num_groups * min_size or n > num_groups * max_size:
+        return [{
+            'constraint': 'size',
+            'message': (
+                f"참석자 {n}명을 {num_groups}개 조(조당 {min_size}~{max_size}명)로 나눌 수 없습니다. "
+                f"최소 {num_groups * min_size}명, 최대 {num_groups * max_size}명이 필요합니다."
+            ),
+            'members': [],
+        }]
+
+    neighbours = _conflict_graph(problem)
+    if not any(neighbours):
+        return []
+
+    conflicts = []
+    for index, adjacent in enumerate(neighbours):
+        # 이 사람의 조는 이 사람과 제한되지 않은 사람들로만 min_size명을 채워야 한다.
+        if n - len(adjacent) < min_size:
+            conflicts.append({
+                'constraint': 'restrictions',
+                'message': (
+                    f"{problem.names[index]}님은 {len(adjacent)}명과 같은 조가 될 수 없어 "
+                    f"{min_size}명 이상인 조를 만들 수 없습니다."
+                ),
+                'members': [problem.names[index]],
+            })
+    if conflicts:
+        return conflicts
+
+    clique = _largest_clique(neighbours)
+    if len(clique) > num_groups:
+        names = [problem.names[index] for index in clique]
+        return [{
+            'constraint': 'restrictions',
+            'message': (
+                f"서로 같은 조가 될 수 없는 {', '.join(names)} {len(names)}명을 "
+                f"{num_groups}개 조에 나눌 수 없습니다."
+                + (" (발제자는 조마다 한 명씩 배치됩니다)" if _has_presenter_edge(problem, clique) else '')
+            ),
+            'members': names,
+        }]
+
+    feasible = _colorable(neighbours, num_groups, min_size, max_size)
+    if feasible is False:
+        constrained = [problem.names[index] for index, adjacent in enumerate(neighbours) if adjacent]
+        return [{
+            'constraint': 'restrictions',
+            'message': (
+                f"편성 제한과 발제자 분산 조건을 {num_groups}개 조(조당 {min_size}~{max_size}명)에 "
+                f"동시에 만족하는 배치가 없습니다. 관련 회원: {', '.join(constrained)}"
+            ),
+            'members': constrained,
+        }]
+    return []
+
+
+def _conflict_graph(problem):
+    """같은 조가 될 수 없는 사람끼리 이은 인접 집합 목록."""
+    neighbours = [set() for _ in range(problem.n)]
+    for left, right in problem.restricted_index_pairs:
+        if left != right:
+            neighbours[left].add(right)
+            neighbours[right].add(left)
+    if problem.spread_presenters:
+        for left in problem.presenter_indices:
+            for right in problem.presenter_indices:
+                if left != right:
+                    neighbours[left].add(right)
+    return neighbours
+
+
+def _has_presenter_edge(problem, indices):
+    presenters = set(problem.presenter_indices) if problem.spread_presenters else set()
+    return len(presenters.intersection(indices)) >= 2
+
+
+def _largest_clique(neighbours):
+    """제한 그래프의 최대 클릭. 제한이 걸린 사람만 보므로 실제 입력에서는 매우 작다."""
+    best = []
+    budget = [SEARCH_NODE_LIMIT]
+
+    def expand(clique, candidates):
+        nonlocal best
+        if len(clique) > len(best):
+            best = list(clique)
+        budget[0] -= 1
+        if budget[0] <= 0:
+            return
+        for vertex in sorted(candidates):
+            if len(clique) + len(candidates) <= len(best):
+                return
+            candidates = candidates - {vertex}
+            expand(clique + [vertex], candidates & neighbours[vertex])
+
+    vertices = {index for index, adjacent in enumerate(neighbours) if adjacent}
+    expand([], vertices)
+    return best
+
+
+def _colorable(neighbours, num_groups, min_size, max_size):
+    """제한된 사람들을 num_groups개 조에 배치하고 나머지로 최소 인원을 채울 수 있는지.
+
+    True/False, 탐색 한도를 넘으면 None(판단 보류)을 반환한다.
+    """
+    n = len(neighbours)
+    constrained = [index for index, adjacent in enumerate(neighbours) if adjacent]
+    free = n - len(constrained)
+    # 차수가 큰 사람부터 배치하면 모순을 빨리 찾는다.
+    order = sorted(constrained, key=lambda index: -len(neighbours[index]))
+    colour = {}
+    sizes = [0] * num_groups
+    budget = [SEARCH_NODE_LIMIT]
+
+    def place(position):
+        budget[0] -= 1
+        if budget[0] <= 0:
+            raise _SearchLimit
+        if position == len(order):
+            shortfall = sum(max(0, min_size - size) for size in sizes)
+            return shortfall <= free
+        vertex = order[position]
+        used = {colour[other] for other in neighbours[vertex] if other in colour}
+        tried_empty = False
+        for group in range(num_groups):
+            if group in used or sizes[group] >= max_size:
+                continue
+            # 빈 조끼리는 서로 바꿔도 같으므로 하나만 시도한다.
+            if sizes[group] == 0:
+                if tried_empty:
+                    continue
+                tried_empty = True
+            colour[vertex] = group
+            sizes[group] += 1
+            if place(position + 1):
+                return True
+            sizes[group] -= 1
+            del colour[vertex]
+        return False
+
+    try:
+        return place(0)
+    except _SearchLimit:
+        return None
+
+
+class _SearchLimit(Exception):
+    pass
@@ -0,0 +1,156 @@
+"""조 편성 후보를 한꺼번에 채점하는 메모리 인덱스.
+
+회원 성별, 만남 횟수·최근 만남일, 비공개 편성 제한을 회원 인덱스 기준의 NumPy 배열로
+한 번 만들어 두고, 여러 후보 편성을 DB 왕복 없이 채점한다. 점수는 솔버 결과 카드와 같은
+`score_grouping` 식(성비 40 : 새만남 10)이다.
+
+이름을 인덱스로 바꾸는 일은 요청 경계에서 한 번만 하고, 쌍별 조회는 부분 행렬 연산으로 한다.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from co_matrix import CoMatrix
+from group_history import day_from_ordinal as _day_from_ordinal
+
+logger = logging.getLogger(__name__)
+
+# 한 요청에서 채점할 수 있는 후보 편성 수
+MAX_BATCH = 100
+# 이력 버전이 그대로여도 회원 정보·편성 제한 변경을 반영하도록 이 시간이 지나면 다시 만든다.
+INDEX_TTL = 60.0
+
+
+def _strip_facilitator_mark(name):
+    """수동 입력의 발제자 표시('홍길동*')를 떼고 이름만 남긴다."""
+    name = str(name).strip()
+    return name[:-1].strip() if name.endswith('*') else name
+
+
+class GroupingIndex:
+    """회원별 성별, 쌍별 만남 횟수·최근 만남일, 편성 제한을 담은 읽기 전용 배열.
+
+    마지막 행·열(self.unknown)은 회원 목록에 없는 이름이 함께 쓰는 빈 자리다.
+    """
+
+    def __init__(self, member_rows, history_rows, restricted_pairs=(), gender_of=None):
+        # 만남 횟수·최근 만남일은 회원 ID 기준 CoMatrix를 그대로 쓴다(같은 배열 위치).
+        self.matrix = CoMatrix(member_rows, history_rows)
+        self.names = self.matrix.names
+        self.index = {name: position for position, name in enumerate(self.names)}
+        self.unknown = self.matrix.unknown
+        self.counts = self.matrix.counts
+        self.last_met = self.matrix.last_met
+        self.gender = np.zeros(self.unknown + 1, dtype=np.int8)
+        for row in member_rows or []:
+            position = self.index.get(str(row.get('name') or '').strip())
+            gender = gender_of(row.get('gender')) if gender_of else row.get('gender')
+            if position is not None and not self.gender[position]:
+                self.gender[position] = 1 if gender == 'M' else -1 if gender == 'W' else 0
+
+        size = self.unknown + 1
+        self.restricted = np.zeros((size, size), dtype=bool)
+        for first, second in restricted_pairs or ():
+            i, j = self.index.get(str(first).strip()), self.index.get(str(second).strip())
+            if i is not None and j is not None:
+                self.restricted[i, j] = self.restricted[j, i] = True
+
+    def positions(self, names):
+        return np.array([self.index.get(name, self.unknown) for name in names], dtype=np.int64)
+
+    def score(self, groups):
+        """후보 편성 하나의 점수와 조별 분석. groups는 이름 목록의 목록이다."""
+        groups = [[_strip_facilitator_mark(name) for name in group if str(name).strip()] for group in groups]
+        groups = [group for group in groups if group]
+        names = [name for group in groups for name in group]
+        members = self.positions(names)
+        group_of = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+
+        same_group = np.triu(group_of[:, None] == group_of[None, :], 1)
+        block = np.ix_(members, members)
+        counts = np.where(same_group, self.counts[block], 0)
+        new_face_score = float((1.0 / (counts[same_group] + 1)).sum())
+
+        gender = self.gender[members]
+        males = np.bincount(group_of, weights=gender == 1, minlength=len(groups))
+        females = np.bincount(group_of, weights=gender == -1, minlength=len(groups))
+        mixed = (males > 0) & (females > 0)
+        ratios = np.divide(np.minimum(males, females), np.maximum(males, females),
+                           out=np.zeros(len(groups)), where=mixed)
+        gender_score = float(ratios.sum())
+
+        last_met = self.last_met[block]
+        conflicts = same_group & self.restricted[block]
+        past_pairs = np.argwhere(counts > 0)
+        past_group = group_of[past_pairs[:, 0]]
+        conflict_pairs = np.argwhere(conflicts)
+        conflict_group = group_of[conflict_pairs[:, 0]]
+        sizes = np.bincount(group_of, minlength=len(groups))
+        analysis = []
+        for group_index in range(len(groups)):
+            size = int(sizes[group_index])
+            pair_total = size * (size - 1) // 2
+            past = [
+                {
+                    'pair': f'{names[i]} & {names[j]}',
+                    'count': int(counts[i, j]),
+                    'last_met': _day_from_ordinal(last_met[i, j]),
+                }
+                for i, j in past_pairs[past_group == group_index].tolist()
+            ]
+            analysis.append({
+                'group_index': group_index + 1,
+                'gender_balance': {
+                    'M': int(males[group_index]),
+                    'W': int(females[group_index]),
+                    'Unknown': size - int(males[group_index]) - int(females[group_index]),
+                },
+                'new_pair_count': pair_total - len(past),
+                'past': sorted(past, key=lambda item: item['count'], reverse=True),
+                'conflicts': [
+                    f'{names[i]} & {names[j]}'
+                    for i, j in conflict_pairs[conflict_group == group_index].tolist()
+                ],
+            })
+
+        total_score = gender_score * 40 + new_face_score * 10
+        return {
+            'score': f"{total_score:.2f}",
+            'details': [f"{gender_score:.2f}", f"{new_face_score:.2f}", "0.00", "0.00"],
+            'groups': groups,
+            'new_pair_count': sum(item['new_pair_count'] for item in analysis),
+            'past_pair_count': len(past_pairs),
+            'conflict_count': int(conflicts.sum()),
+            'group_analysis': analysis,
+        }
+
+    def score_batch(self, groupings):
+        return [self.score(groups) for groups in groupings]
+
+
+class SharedGroupingIndex:
+    """프로세스 하나가 공유하는 GroupingIndex. 이력 버전이 바뀌거나 TTL이 지나면 다시 만든다."""
+
+    def __init__(self, loader, ttl=INDEX_TTL):
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._built_at = 0.0
+
+    def get(self, history_version):
+        with self._lock:
+            fresh = time.monotonic() - self._built_at < self._ttl
+            if self._index is not None and self._version == history_version and fresh:
+                return self._index
+            started = time.monotonic()
+            self._index = self._loader()
+            self._version = history_version
+            self._built_at = time.monotonic()
+            logger.info("[grouping-index] %d명 인덱스 생성, %.2fs",
+                        len(self._index.names), self._built_at - started)
+            return self._index
@@ -0,0 +1,468 @@
+"""조 편성 백그라운드 작업 큐.
+
+요청 스레드 대신 제한된 작업 풀에서 조 편성을 돌리고, 작업이 낸 SSE 이벤트를
+작업 디렉터리의 JSON Lines 파일에 차례로 기록한다. gunicorn 워커가 여러 개여도 같은
+컨테이너의 파일을 보므로, 브라우저가 다른 워커로 다시 붙어도 Last-Event-ID 다음
+이벤트부터 이어 받을 수 있다.
+
+- 같은 키(참석자·발제자·조 수 등)의 작업이 진행 중이면 새로 만들지 않고 합류한다.
+- 작업을 가진 프로세스는 HEARTBEAT_SECONDS마다 .alive 파일을 갱신한다. 워커가 재시작되어
+  HEARTBEAT_TIMEOUT 넘게 갱신이 없으면 그 작업은 죽은 것으로 보고, 구독자에게 error를 보내며
+  같은 요청은 합류하지 않고 새로 푼다.
+- 끝난 작업의 이벤트는 RESULT_TTL 동안 보관했다가 지운다.
+- 구독자가 DISCONNECT_GRACE 동안 하나도 없으면 작업을 취소한다.
+- CP-SAT 한 번이 코어 여러 개를 쓰므로, 컨테이너 전체에서 동시에 도는 작업은
+  MAX_CONCURRENT_SOLVES개로 제한한다. 나머지는 'queued' 이벤트로 대기 순번을 알리며 기다린다.
+- 생성·합류·완료·실패·취소·이탈 횟수를 metrics.json에 누적한다(/jobs/metrics).
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_DIR = os.environ.get('GROUPING_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'grouping_jobs')
+MAX_WORKERS = max(1, int(os.environ.get('GROUPING_JOB_WORKERS', '2')))
+RESULT_TTL = 600
+DISCONNECT_GRACE = 20
+KEEP_ALIVE_SECONDS = 15
+POLL_SECONDS = 0.2
+HEARTBEAT_SECONDS = 1.0
+HEARTBEAT_TIMEOUT = 10
+# 컨테이너 전체에서 동시에 실행하는 조 편성 작업 수(gunicorn 워커 수와 무관)
+MAX_CONCURRENT_SOLVES = max(1, int(os.environ.get('GROUPING_MAX_SOLVES', '1')))
+QUEUE_POLL_SECONDS = 0.5
+
+# 이 이벤트가 기록되면 작업이 끝난 것으로 본다.
+TERMINAL_EVENTS = ('complete', 'error', 'cancelled')
+LOST_JOB_MESSAGE = '조 편성 작업이 중단되었습니다(서버 재시작). 다시 시도해 주세요.'
+
+
+class JobCancelled(Exception):
+    """구독자가 모두 떠났거나 취소 요청을 받아 작업을 멈췄다."""
+
+
+def grouping_job_key(attendees, facilitators, group_count=None, **options):
+    """같은 조 편성 요청이면 같은 값이 나오는 작업 키."""
+    payload = {
+        'attendees': sorted(str(name).strip() for name in attendees),
+        'facilitators': sorted(str(name).strip() for name in facilitators),
+        'group_count': group_count,
+        'options': {key: options[key] for key in sorted(options)},
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class GroupingJob:
+    """작업 실행 쪽 핸들. 이벤트를 기록하고 취소 여부를 알려준다."""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.id = job_id
+        # 솔버가 라운드 사이와 탐색 도중에 확인하는 중단 신호
+        self.stop_event = threading.Event()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event, data):
+        """이벤트 하나를 기록한다. 한 줄을 한 번에 써서 읽는 쪽이 반쪽 줄을 보지 않게 한다."""
+        with self._lock:
+            record = {'id': self._next_id, 'event': event, 'data': data}
+            self._next_id += 1
+            line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+            with open(self.store.path(self.id, 'events'), 'a', encoding='utf-8') as handle:
+                handle.write(line)
+        return record['id']
+
+    @property
+    def cancelled(self):
+        if self.stop_event.is_set():
+            return True
+        if self.store.cancel_requested(self.id):
+            self.stop_event.set()
+        return self.stop_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+
+class GroupingJobStore:
+    """작업 생성(single-flight), 실행, 이벤트 재생, 만료 정리를 맡는다."""
+
+    def __init__(self, directory=JOB_DIR, max_workers=MAX_WORKERS, result_ttl=RESULT_TTL,
+                 disconnect_grace=DISCONNECT_GRACE, max_concurrent=MAX_CONCURRENT_SOLVES,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.directory = directory
+        self.result_ttl = result_ttl
+        self.disconnect_grace = disconnect_grace
+        self.max_concurrent = max_concurrent
+        self.heartbeat_timeout = heartbeat_timeout
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='grouping-job')
+        self._submit_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        # 이 프로세스가 가진(대기·실행 중인) 작업. heartbeat 스레드가 .alive를 갱신한다.
+        self._owned = set()
+        self._owned_lock = threading.Lock()
+        self._closed = threading.Event()
+        threading.Thread(target=self._heartbeat, daemon=True, name='grouping-job-heartbeat').start()
+
+    def path(self, name, suffix):
+        return os.path.join(self.directory, f'{name}.{suffix}')
+
+    # --- 작업 생성과 실행 ---
+
+    def submit(self, key, runner):
+        """(job_id, 새로 만들었는지)를 반환한다.
+
+        같은 키의 작업이 아직 끝나지 않았으면 그 작업에 합류한다. runner(job)는 작업
+        풀에서 실행되며 job.publish로 이벤트를 내고, 마지막에 complete를 기록해야 한다.
+        """
+        self.purge_expired()
+        key_path = self.path(key, 'key')
+        # 같은 컨테이너의 다른 gunicorn 워커와도 겹치지 않게 파일 잠금 안에서 판단한다.
+        with self._submit_lock, open(os.path.join(self.directory, 'submit.lock'), 'a') as lock_handle:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX)
+            try:
+                existing = self._read_text(key_path)
+                if existing and self.is_alive(existing) and not self.is_finished(existing):
+                    self.touch_listener(existing)
+                    self.record('joined')
+                    return existing, False
+                # 끝났거나 죽은 작업의 키는 새 작업으로 바꾼다.
+                job_id = uuid.uuid4().hex
+                self._create_job_files(job_id, key)
+                self._publish_key(key_path, job_id)
+            finally:
+                fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+        job = GroupingJob(self, job_id)
+        self._executor.submit(self._run, job, runner)
+        self.record('submitted')
+        logger.info("[job %s] 생성", job_id)
+        return job_id, True
+
+    def _create_job_files(self, job_id, key):
+        """키를 공개하기 전에 작업 파일을 모두 만든다. 키를 읽은 쪽은 늘 완성된 작업을 본다."""
+        with self._owned_lock:
+            self._owned.add(job_id)
+        self._beat(job_id)
+        open(self.path(job_id, 'events'), 'a', encoding='utf-8').close()
+        with open(self.path(job_id, 'meta'), 'w', encoding='utf-8') as handle:
+            json.dump({'key': key, 'created_at': time.time()}, handle)
+        # 작업 풀 대기도 순번에 넣도록 실행 슬롯을 받기 전까지 대기 표시를 남겨 둔다.
+        open(self.path(job_id, 'waiting'), 'w').close()
+        self.touch_listener(job_id)
+
+    def _publish_key(self, key_path, job_id):
+        """job_id를 쓴 임시 파일을 key_path로 link해, 빈 키나 반쯤 쓴 키가 보이지 않게 한다."""
+        temp_path = f'{key_path}.{job_id}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            handle.write(job_id)
+        try:
+            self._remove(key_path)
+            os.link(temp_path, key_path)
+        finally:
+            self._remove(temp_path)
+
+    def _run(self, job, runner):
+        watcher = threading.Thread(target=self._watch_listeners, args=(job,), daemon=True)
+        watcher.start()
+        slot = None
+        try:
+            slot = self._acquire_slot(job)
+            runner(job)
+            self.record('completed')
+        except JobCancelled:
+            explicit = os.path.exists(self.path(job.id, 'cancel'))
+            if slot is None:
+                self.record('dropped_while_queued')
+            else:
+                self.record('cancelled' if explicit else 'dropped')
+            logger.info("[job %s] 취소됨(%s)", job.id, 'cancel requested' if explicit else 'no listeners')
+            job.publish('cancelled', {'reason': 'cancel requested' if explicit else 'no listeners'})
+        except Exception as ex:
+            self.record('failed')
+            logger.error("[job %s] 실패: %s", job.id, ex, exc_info=True)
+            job.publish('error', {'error': str(ex)})
+        finally:
+            job.stop_event.set()
+            watcher.join()
+            self._remove(self.path(job.id, 'waiting'))
+            if slot is not None:
+                fcntl.flock(slot, fcntl.LOCK_UN)
+                slot.close()
+            open(self.path(job.id, 'done'), 'w').close()
+            with self._owned_lock:
+                self._owned.discard(job.id)
+
+    def _acquire_slot(self, job):
+        """실행 슬롯 하나를 잡을 때까지 기다린다. 슬롯은 작업 디렉터리의 flock 파일이다.
+
+        기다리는 동안 순번이 바뀌면 'queued' 이벤트를 내고, 그 사이 구독자가 모두 떠나면
+        JobCancelled를 던져 솔버를 한 번도 돌리지 않고 끝낸다.
+        """
+        started = time.monotonic()
+        last_position = None
+        while True:
+            job.raise_if_cancelled()
+            for index in range(self.max_concurrent):
+                handle = open(self.path(f'slot-{index}', 'lock'), 'a')
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()
+                    continue
+                self._remove(self.path(job.id, 'waiting'))
+                waited = time.monotonic() - started
+                if last_position is not None:
+                    self.record('queue_wait_seconds', waited)
+                    logger.info("[job %s] %.1f초 대기 후 실행", job.id, waited)
+                return handle
+            position = self.queue_position(job.id)
+            if position != last_position:
+                job.publish('queued', {'position': position, 'max_concurrent': self.max_concurrent})
+                last_position = position
+            job.stop_event.wait(QUEUE_POLL_SECONDS)
+
+    def _watch_listeners(self, job):
+        """구독자가 모두 떠나면(heartbeat가 오래됨) 작업을 멈추게 한다."""
+        while not job.stop_event.wait(1.0):
+            if self.cancel_requested(job.id):
+                job.stop_event.set()
+
+    def cancel(self, job_id):
+        open(self.path(job_id, 'cancel'), 'w').close()
+
+    def cancel_requested(self, job_id):
+        if os.path.exists(self.path(job_id, 'cancel')):
+            return True
+        heartbeat = self._mtime(self.path(job_id, 'listen'))
+        return heartbeat is not None and time.time() - heartbeat > self.disconnect_grace
+
+    def close(self):
+        """새 작업을 더 받지 않고, 실행 중인 작업이 끝날 때까지 기다린다."""
+        self._executor.shutdown(wait=True)
+        self._closed.set()
+
+    def _heartbeat(self):
+        while not self._closed.wait(HEARTBEAT_SECONDS):
+            with self._owned_lock:
+                owned = list(self._owned)
+            for job_id in owned:
+                self._beat(job_id)
+
+    def _beat(self, job_id):
+        try:
+            with open(self.path(job_id, 'alive'), 'a'):
+                pass
+            os.utime(self.path(job_id, 'alive'))
+        except OSError:
+            pass
+
+    # --- 대기열과 지표 ---
+
+    def _waiting_jobs(self):
+        """슬롯을 기다리는 작업 ID를 먼저 온 순서로 돌려준다."""
+        now = time.time()
+        waiting = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if not name.endswith('.waiting'):
+                continue
+            job_id = name[:-len('.waiting')]
+            since = self._mtime(self.path(job_id, 'waiting'))
+            # 워커가 죽어 남은 표시는 순번 계산에서 뺀다.
+            if since is None or now - since > self.result_ttl or self.is_finished(job_id) \
+                    or not self.is_alive(job_id):
+                continue
+            waiting.append((since, job_id))
+        return [job_id for _, job_id in sorted(waiting)]
+
+    def queue_position(self, job_id):
+        """앞에서 기다리는 작업 수 + 1. 대기 중이 아니면 0."""
+        waiting = self._waiting_jobs()
+        return waiting.index(job_id) + 1 if job_id in waiting else 0
+
+    def record(self, name, amount=1):
+        """작업 지표를 누적한다. 워커 프로세스끼리 같은 파일을 flock으로 갱신한다."""
+        path = os.path.join(self.directory, 'metrics.json')
+        with self._metrics_lock, open(path + '.lock', 'a') as lock_handle:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX)
+            try:
+                counters = self._read_metrics(path)
+                counters[name] = counters.get(name, 0) + amount
+                if name == 'queue_wait_seconds':
+                    counters['queue_wait_max_seconds'] = max(counters.get('queue_wait_max_seconds', 0), amount)
+                temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as handle:
+                    json.dump(counters, handle)
+                os.replace(temp_path, path)
+            finally:
+                fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+    def metrics(self):
+        """누적 지표와 지금 대기 중인 작업 수."""
+        counters = self._read_metrics(os.path.join(self.directory, 'metrics.json'))
+        counters['waiting'] = len(self._waiting_jobs())
+        counters['max_concurrent'] = self.max_concurrent
+        return counters
+
+    @staticmethod
+    def _read_metrics(path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    # --- 상태 조회 ---
+
+    def exists(self, job_id):
+        return bool(job_id) and os.path.exists(self.path(job_id, 'events'))
+
+    def is_finished(self, job_id):
+        return os.path.exists(self.path(job_id, 'done'))
+
+    def is_alive(self, job_id):
+        """작업을 가진 프로세스가 heartbeat_timeout 안에 .alive를 갱신했는지."""
+        beat = self._mtime(self.path(job_id, 'alive'))
+        return beat is not None and time.time() - beat <= self.heartbeat_timeout
+
+    def touch_listener(self, job_id):
+        try:
+            with open(self.path(job_id, 'listen'), 'a'):
+                pass
+            os.utime(self.path(job_id, 'listen'))
+        except OSError:
+            pass
+
+    # --- 이벤트 재생 ---
+
+    def events(self, job_id, last_event_id=None, keep_alive=KEEP_ALIVE_SECONDS):
+        """last_event_id 다음 이벤트부터 끝날 때까지 내보낸다.
+
+        새 이벤트가 keep_alive초 동안 없으면 None을 내보내 호출자가 연결 유지 주석을 보내게 한다.
+        호출자가 순회하는 동안은 구독자 heartbeat를 갱신한다. 작업 파일이 지워졌거나 작업을 가진
+        프로세스가 사라져 종료 이벤트가 오지 않으면 error 이벤트를 하나 내보내고 끝낸다.
+        """
+        offset = 0
+        pending = ''
+        last_sent = time.monotonic()
+        last_beat = 0.0
+        after = -1 if last_event_id is None else int(last_event_id)
+        while True:
+            now = time.monotonic()
+            if now - last_beat >= 1.0:
+                self.touch_listener(job_id)
+                last_beat = now
+            # 파일을 읽기 전에 판단해야 죽기 직전에 기록된 종료 이벤트를 놓치지 않는다.
+            finished = self.is_finished(job_id)
+            lost = not finished and not self.is_alive(job_id)
+            try:
+                with open(self.path(job_id, 'events'), encoding='utf-8') as handle:
+                    handle.seek(offset)
+                    chunk = handle.read()
+                    offset = handle.tell()
+            except FileNotFoundError:
+                yield self._lost_record(after)
+                return
+            pending += chunk
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record['id'] <= after:
+                    continue
+                after = record['id']
+                last_sent = time.monotonic()
+                yield record
+                if record['event'] in TERMINAL_EVENTS:
+                    return
+            if finished and not pending:
+                # 종료 이벤트를 이미 보낸 뒤 다시 붙은 경우
+                return
+            if lost:
+                logger.warning("[job %s] heartbeat가 끊겨 구독을 끝냄", job_id)
+                yield self._lost_record(after)
+                return
+            if time.monotonic() - last_sent >= keep_alive:
+                last_sent = time.monotonic()
+                yield None
+            time.sleep(POLL_SECONDS)
+
+    @staticmethod
+    def _lost_record(after):
+        return {'id': after + 1, 'event': 'error', 'data': {'error': LOST_JOB_MESSAGE}}
+
+    # --- 정리 ---
+
+    def purge_expired(self):
+        """끝난 지 RESULT_TTL이 지난 작업, heartbeat가 RESULT_TTL 넘게 끊긴 작업의 파일을 지운다."""
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith('.events'):
+                continue
+            job_id = name[:-len('.events')]
+            done_at = self._mtime(self.path(job_id, 'done'))
+            touched = self._mtime(self.path(job_id, 'alive')) or self._mtime(self.path(job_id, 'events'))
+            expired = (done_at is not None and now - done_at > self.result_ttl) or (
+                done_at is None and touched is not None and now - touched > self.result_ttl
+            )
+            if expired:
+                for suffix in ('events', 'done', 'listen', 'cancel', 'meta', 'waiting', 'alive'):
+                    self._remove(self.path(job_id, suffix))
+        for name in names:
+            if name.endswith('.key'):
+                key_path = os.path.join(self.directory, name)
+                if not self.exists(self._read_text(key_path)):
+                    self._remove(key_path)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_text(path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                return handle.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def format_sse(record):
+    """이벤트 기록 하나를 SSE 문자열로 바꾼다. None이면 연결 유지 주석."""
+    if record is None:
+        return ": keep-alive\n\n"
+    data = json.dumps(record['data'], ensure_ascii=False)
+    return f"id: {record['id']}\nevent: {record['event']}\ndata: {data}\n\n"
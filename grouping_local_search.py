@@ -0,0 +1,431 @@
+"""NumPy 기반 지역 탐색 조 편성 엔진.
+
+CP-SAT과 같은 GroupingProblem을 받아 같은 하드 제약(조 크기, 발제자 분산,
+비공개 편성 제한)과 같은 목적함수를 쓴다.  OR-Tools를 불러오지 않으므로
+관리자가 가볍게 여러 번 다시 돌려볼 때 쓴다.
+
+상태는 참석자별 그룹 번호 배열 하나와, 이를 요약한 몇 개의 행렬로 유지한다.
+  - pair_sum[i, g] : i가 g조 사람들과 이미 만난 페널티 합
+  - restricted_sum[i, g] : g조에 i와 함께 둘 수 없는 사람 수
+그래서 한 사람을 옮기거나 두 사람을 바꾸는 비용을 전체 재계산 없이
+벡터 연산 한 번으로 모든 후보에 대해 구할 수 있다.
+"""
+
+import logging
+import math
+import time
+
+import numpy as np
+
+from grouping_problem import SCALE, grouping_signature, score_grouping
+
+
+logger = logging.getLogger(__name__)
+
+# 재시작마다 참석자 1명당 시도할 이동 횟수. 40명이면 재시작당 400회.
+MOVES_PER_ATTENDEE = 10
+# 추천안 수를 다 채우지 못해도 이 시간이 지나면 찾은 것까지만 돌려준다.
+TIME_BUDGET = 0.8
+# 제약을 지키는 초기 배치를 찾기 위한 최대 시도 횟수
+CONSTRUCTION_TRIES = 50
+# 인원 변경 반영(repair_neighborhood)에서 다시 푸는 조의 최소 개수와 재시작 횟수·시간
+REPAIR_MIN_GROUPS = 2
+REPAIR_RESTARTS = 4
+REPAIR_TIME_BUDGET = 0.3
+
+
+class ProblemArrays:
+    """GroupingProblem을 벡터 연산용 배열로 바꾼 값."""
+
+    def __init__(self, problem):
+        n = problem.n
+        self.n = n
+        self.num_groups = problem.num_groups
+        self.min_size = problem.min_size
+        self.max_size = problem.max_size
+        self.gender_cost = SCALE * problem.gender_weight
+        # 남성 +1, 여성 -1, 미상 0
+        self.gender = np.array(problem.is_male, dtype=np.int64) - np.array(problem.is_female, dtype=np.int64)
+
+        self.pair_loss = np.zeros((n, n), dtype=np.int64)
+        for (i, j), count in problem.pair_counts.items():
+            loss = problem.pair_loss(count)
+            self.pair_loss[i, j] = self.pair_loss[j, i] = loss
+
+        self.restricted = np.zeros((n, n), dtype=np.int64)
+        for i, j in problem.restricted_index_pairs:
+            self.restricted[i, j] = self.restricted[j, i] = 1
+
+        self.presenter = np.zeros(n, dtype=np.int64)
+        if problem.spread_presenters:
+            self.presenter[problem.presenter_indices] = 1
+
+
+class _SearchState:
+    def __init__(self, arrays, assignment):
+        self.arrays = arrays
+        self.assignment = np.array(assignment, dtype=np.int64)
+        one_hot = np.zeros((arrays.n, arrays.num_groups), dtype=np.int64)
+        one_hot[np.arange(arrays.n), self.assignment] = 1
+        self.sizes = one_hot.sum(axis=0)
+        self.gender_sum = arrays.gender @ one_hot
+        self.presenters = arrays.presenter @ one_hot
+        self.pair_sum = arrays.pair_loss @ one_hot
+        self.restricted_sum = arrays.restricted @ one_hot
+
+    def cost(self):
+        arrays = self.arrays
+        pair_cost = self.pair_sum[np.arange(arrays.n), self.assignment].sum() // 2
+        return int(arrays.gender_cost * np.abs(self.gender_sum).sum() + pair_cost)
+
+    def _relocate(self, person, source, target):
+        arrays = self.arrays
+        self.assignment[person] = target
+        self.sizes[source] -= 1
+        self.sizes[target] += 1
+        self.gender_sum[source] -= arrays.gender[person]
+        self.gender_sum[target] += arrays.gender[person]
+        self.presenters[source] -= arrays.presenter[person]
+        self.presenters[target] += arrays.presenter[person]
+        self.pair_sum[:, source] -= arrays.pair_loss[:, person]
+        self.pair_sum[:, target] += arrays.pair_loss[:, person]
+        self.restricted_sum[:, source] -= arrays.restricted[:, person]
+        self.restricted_sum[:, target] += arrays.restricted[:, person]
+
+    def move_deltas(self, person):
+        """person을 각 조로 옮길 때의 비용 변화. 불가능한 이동은 inf."""
+        arrays = self.arrays
+        source = self.assignment[person]
+        value = arrays.gender[person]
+        gender_delta = (
+            np.abs(self.gender_sum + value) - np.abs(self.gender_sum)
+            + abs(self.gender_sum[source] - value) - abs(self.gender_sum[source])
+        )
+        deltas = (arrays.gender_cost * gender_delta
+                  + self.pair_sum[person] - self.pair_sum[person, source]).astype(float)
+        blocked = (
+            (self.sizes + 1 > arrays.max_size)
+            | (self.restricted_sum[person] > 0)
+            | ((arrays.presenter[person] == 1) & (self.presenters > 0))
+        )
+        if self.sizes[source] - 1 < arrays.min_size:
+            blocked[:] = True
+        blocked[source] = True
+        deltas[blocked] = np.inf
+        return deltas
+
+    def swap_deltas(self, person):
+        """person과 각 참석자를 맞바꿀 때의 비용 변화. 불가능한 교환은 inf."""
+        arrays = self.arrays
+        source = self.assignment[person]
+        others = self.assignment
+        pair_row = arrays.pair_loss[person]
+        pair_delta = (
+            self.pair_sum[person, others] - self.pair_sum[person, source]
+            + self.pair_sum[np.arange(arrays.n), source] - self.pair_sum[np.arange(arrays.n), others]
+            - 2 * pair_row
+        )
+        shift = arrays.gender[person] - arrays.gender
+        gender_delta = (
+            np.abs(self.gender_sum[source] - shift) - abs(self.gender_sum[source])
+            + np.abs(self.gender_sum[others] + shift) - np.abs(self.gender_sum[others])
+        )
+        deltas = (arrays.gender_cost * gender_delta + pair_delta).astype(float)
+
+        restricted_row = arrays.restricted[person]
+        presenter_shift = arrays.presenter[person] - arrays.presenter
+        blocked = (
+            (others == source)
+            | (self.restricted_sum[person, others] - restricted_row > 0)
+            | (self.restricted_sum[np.arange(arrays.n), source] - restricted_row > 0)
+            | (self.presenters[others] + presenter_shift > 1)
+            | (self.presenters[source] - presenter_shift > 1)
+        )
+        deltas[blocked] = np.inf
+        return deltas
+
+    def apply_move(self, person, target):
+        self._relocate(person, self.assignment[person], target)
+
+    def apply_swap(self, person, other):
+        source, target = self.assignment[person], self.assignment[other]
+        self._relocate(person, source, target)
+        self._relocate(other, target, source)
+
+
+def _construct(arrays, rng, preferred=None):
+    """제약을 지키는 무작위 탐욕 초기 배치. 실패하면 None.
+
+    preferred[i]가 0 이상이면 제약이 허락하는 한 i를 그 조에 먼저 넣는다.
+    """
+    n, num_groups = arrays.n, arrays.num_groups
+    # 모든 조가 최소 인원을 채우도록 목표 인원을 먼저 나눈다.
+    base, extra = divmod(n, num_groups)
+    capacity = np.full(num_groups, base, dtype=np.int64)
+    group_order = rng.permutation(num_groups)
+    if preferred is not None:
+        # 한 명 더 받는 자리는 이전 편성에서 인원이 많던 조에 준다.
+        wanted = np.bincount(preferred[preferred >= 0], minlength=num_groups)
+        group_order = group_order[np.argsort(-wanted[group_order], kind='stable')]
+    capacity[group_order[:extra]] += 1
+
+    # 발제자, 제한이 많은 사람부터 배치해야 막다른 길에 덜 빠진다.
+    # 선호 조가 있는 사람은 새로 온 사람보다 먼저 자리를 잡아야 원래 조를 지킨다.
+    priority = arrays.presenter * n + arrays.restricted.sum(axis=1)
+    keys = (rng.random(n), -priority)
+    if preferred is not None:
+        keys += (preferred < 0,)
+    order = np.lexsort(keys)
+
+    assignment = np.full(n, -1, dtype=np.int64)
+    sizes = np.zeros(num_groups, dtype=np.int64)
+    gender_sum = np.zeros(num_groups, dtype=np.int64)
+    presenters = np.zeros(num_groups, dtype=np.int64)
+    for person in order:
+        members = assignment >= 0
+        in_group = np.zeros((num_groups,), dtype=np.int64)
+        np.add.at(in_group, assignment[members], arrays.restricted[person, members])
+        pair_cost = np.zeros(num_groups, dtype=np.int64)
+        np.add.at(pair_cost, assignment[members], arrays.pair_loss[person, members])
+        cost = (arrays.gender_cost * np.abs(gender_sum + arrays.gender[person])
+                + pair_cost + rng.random(num_groups) * SCALE).astype(float)
+        cost[(sizes >= capacity) | (in_group > 0)
+             | ((arrays.presenter[person] == 1) & (presenters > 0))] = np.inf
+        target = int(np.argmin(cost))
+        if preferred is not None and preferred[person] >= 0 and np.isfinite(cost[preferred[person]]):
+            target = int(preferred[person])
+        if not np.isfinite(cost[target]):
+            return None
+        assignment[person] = target
+        sizes[target] += 1
+        gender_sum[target] += arrays.gender[person]
+        presenters[target] += arrays.presenter[person]
+    return assignment
+
+
+def _anneal(state, rng, iterations, movable_groups=None):
+    """한 사람씩 골라 최선의 이동/교환을 적용한다. 나빠지는 수는 온도에 따라 허용한다.
+
+    movable_groups(조별 bool 배열)를 주면 그 조들 안에서만 옮기고 바꾸며, 나머지 조는 그대로 둔다.
+    """
+    n = state.arrays.n
+    movable = np.arange(n)
+    if movable_groups is not None:
+        movable = np.flatnonzero(movable_groups[state.assignment])
+        if len(movable) == 0:
+            return state.cost(), state.assignment.copy()
+    cost = state.cost()
+    best_cost, best_assignment = cost, state.assignment.copy()
+    temperature = SCALE * 2.0
+    cooling = (0.01) ** (1.0 / max(1, iterations))
+    for _ in range(iterations):
+        person = int(movable[rng.integers(len(movable))])
+        moves = state.move_deltas(person)
+        swaps = state.swap_deltas(person)
+        if movable_groups is not None:
+            moves[~movable_groups] = np.inf
+            swaps[~movable_groups[state.assignment]] = np.inf
+        target = int(np.argmin(moves))
+        other = int(np.argmin(swaps))
+        use_swap = swaps[other] < moves[target]
+        delta = swaps[other] if use_swap else moves[target]
+        if not np.isfinite(delta):
+            continue
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            if use_swap:
+                state.apply_swap(person, other)
+            else:
+                state.apply_move(person, target)
+            cost += int(delta)
+            if cost < best_cost:
+                best_cost, best_assignment = cost, state.assignment.copy()
+        temperature *= cooling
+    return best_cost, best_assignment
+
+
+def warm_start_assignment(problem, previous_groups=None, seed=0, polish_moves=3):
+    """CP-SAT 힌트로 쓸 참석자별 그룹 번호 목록. 만들 수 없으면 None.
+
+    탐욕 배치를 짧게 다듬은 안과, previous_groups(직전에 저장한 같은 명단의 조 편성)를
+    제약에 맞게 고친 안 중 목적함수가 더 좋은 쪽을 고른다.
+    """
+    arrays = ProblemArrays(problem)
+    rng = np.random.default_rng(seed)
+    candidates = []
+    preferences = [None]
+    if previous_groups:
+        preferences.append(_preferred_groups(problem, previous_groups))
+    for preferred in preferences:
+        assignment = None
+        for _ in range(CONSTRUCTION_TRIES):
+            assignment = _construct(arrays, rng, preferred)
+            if assignment is not None:
+                break
+        if assignment is None:
+            continue
+        if preferred is None:
+            _, assignment = _anneal(_SearchState(arrays, assignment), rng, polish_moves * problem.n)
+        candidates.append((_SearchState(arrays, assignment).cost(), assignment.tolist()))
+    if not candidates:
+        return None
+    return min(candidates)[1]
+
+
+def repair_groups(problem, previous_groups, seed=0):
+    """previous_groups를 현재 참석자와 제약에 맞게 고친 조 편성. 고칠 수 없으면 None.
+
+    남아 있는 사람은 제약이 허락하는 한 원래 조에 두고, 새로 온 사람과 자리를
+    옮겨야 하는 사람만 탐욕적으로 배치한다. 담금질을 하지 않으므로 배치가 거의 그대로다.
+    """
+    arrays = ProblemArrays(problem)
+    rng = np.random.default_rng(seed)
+    preferred = _preferred_groups(problem, _surviving_groups(problem, previous_groups))
+    for _ in range(CONSTRUCTION_TRIES):
+        assignment = _construct(arrays, rng, preferred)
+        if assignment is not None:
+            return problem.groups_from_assignment(assignment.tolist())
+    return None
+
+
+def _surviving_groups(problem, previous_groups):
+    """조 수가 줄어야 하면 남은 인원이 가장 적은 이전 조부터 해체한다(나머지 조 순서는 유지).
+
+    해체된 조의 사람은 선호 조가 없는 것으로 보고 새로 배치된다.
+    """
+    surplus = len(previous_groups) - problem.num_groups
+    if surplus <= 0:
+        return previous_groups
+    names = set(problem.names)
+    remaining = [sum(1 for name in group if str(name).strip() in names) for group in previous_groups]
+    dissolved = set(sorted(range(len(previous_groups)), key=lambda index: remaining[index])[:surplus])
+    return [group for index, group in enumerate(previous_groups) if index not in dissolved]
+
+
+def _changed_groups(problem, assignment, preferred, previous_groups):
+    """이전 편성과 구성원이 달라진 조(bool 배열): 빠진 사람, 새로 온 사람, 자리를 옮긴 사람이 있는 조."""
+    num_groups = problem.num_groups
+    changed = np.zeros(num_groups, dtype=bool)
+    moved = assignment != preferred
+    changed[assignment[moved]] = True
+    changed[preferred[moved & (preferred >= 0)]] = True
+    previous_sizes = np.zeros(num_groups, dtype=np.int64)
+    for group_index, group in enumerate(previous_groups):
+        previous_sizes[group_index % num_groups] += len(group)
+    kept_sizes = np.bincount(preferred[preferred >= 0], minlength=num_groups)
+    changed |= kept_sizes < previous_sizes
+    return changed
+
+
+def repair_neighborhood(problem, previous_groups, seed=0, time_budget=REPAIR_TIME_BUDGET):
+    """인원이 바뀐 조와 그 이웃만 다시 풀고 나머지 조는 그대로 둔 조 편성.
+
+    previous_groups를 repair_groups처럼 현재 참석자에 맞춘 뒤, 구성원이 바뀐 조만
+    담금질로 다듬는다. 바뀐 조가 REPAIR_MIN_GROUPS개보다 적으면 비용이 큰 조를 더해
+    조 사이에서 사람을 바꿀 수 있게 한다. 다른 조는 한 명도 움직이지 않는다.
+    반환은 score_grouping 결과에 'changed_groups'(다시 푼 조 번호)와 'moved'(원래 조를
+    떠난 기존 참석자)를 더한 사전이고, 고칠 수 없으면 None이다.
+    """
+    arrays = ProblemArrays(problem)
+    rng = np.random.default_rng(seed)
+    previous_groups = _surviving_groups(problem, previous_groups)
+    preferred = _preferred_groups(problem, previous_groups)
+    started = time.monotonic()
+    best = None
+    for _ in range(REPAIR_RESTARTS):
+        if best is not None and time.monotonic() - started > time_budget:
+            break
+        assignment = None
+        for _ in range(CONSTRUCTION_TRIES):
+            assignment = _construct(arrays, rng, preferred)
+            if assignment is not None:
+                break
+        if assignment is None:
+            break
+        state = _SearchState(arrays, assignment)
+        changed = _changed_groups(problem, assignment, preferred, previous_groups)
+        extra = min(REPAIR_MIN_GROUPS, problem.num_groups) - int(changed.sum())
+        if extra > 0:
+            group_cost = arrays.gender_cost * np.abs(state.gender_sum)
+            np.add.at(group_cost, assignment, state.pair_sum[np.arange(arrays.n), assignment])
+            group_cost[changed] = -1
+            changed[np.argsort(-group_cost, kind='stable')[:extra]] = True
+        iterations = MOVES_PER_ATTENDEE * 3 * int(changed[assignment].sum())
+        cost, repaired = _anneal(state, rng, iterations, movable_groups=changed)
+        if best is None or cost < best[0]:
+            best = (cost, repaired, changed)
+    if best is None:
+        return None
+
+    _, assignment, changed = best
+    groups = problem.groups_from_assignment(assignment.tolist())
+    # groups_from_assignment는 빈 조를 빼므로 결과 목록 기준의 조 번호로 옮긴다.
+    used = [group_index for group_index in range(problem.num_groups) if (assignment == group_index).any()]
+    result = score_grouping(problem, groups)
+    result['changed_groups'] = [position for position, group_index in enumerate(used) if changed[group_index]]
+    result['moved'] = [
+        problem.names[index] for index in range(problem.n)
+        if preferred[index] >= 0 and assignment[index] != preferred[index]
+    ]
+    logger.info("[repair] 조 %d개 중 %d개 다시 편성, %.3fs",
+                len(groups), len(result['changed_groups']), time.monotonic() - started)
+    return result
+
+
+def _preferred_groups(problem, previous_groups):
+    """이전 조 편성을 현재 참석자 인덱스 기준의 선호 조 번호로 옮긴다(없으면 -1)."""
+    name_to_index = {name: index for index, name in enumerate(problem.names)}
+    preferred = np.full(problem.n, -1, dtype=np.int64)
+    for group_index, group in enumerate(previous_groups):
+        for name in group:
+            index = name_to_index.get(str(name).strip())
+            if index is not None:
+                preferred[index] = group_index % problem.num_groups
+    return preferred
+
+
+def local_search_groupings(problem, top_n=10, progress_callback=None, seed=0,
+                           time_budget=TIME_BUDGET, previous_groups=None,
+                           solution_callback=None, stop_event=None):
+    """재시작마다 새 초기 배치에서 담금질을 돌려 서로 다른 추천안을 모은다.
+
+    previous_groups가 있으면 첫 재시작은 그 조 편성에 가깝게 배치하고 출발한다.
+    solution_callback은 새 추천안을 찾는 즉시 하나씩 받는다.
+    반환 형식은 CP-SAT 엔진과 같고 목적함수가 좋은 순서로 정렬한다.
+    """
+    arrays = ProblemArrays(problem)
+    preferred = _preferred_groups(problem, previous_groups) if previous_groups else None
+    rng = np.random.default_rng(seed)
+    iterations = MOVES_PER_ATTENDEE * problem.n
+    started = time.monotonic()
+
+    found = {}
+    for restart in range(top_n * 3):
+        if len(found) >= top_n:
+            break
+        if time_budget is not None and time.monotonic() - started > time_budget:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+        assignment = None
+        for _ in range(CONSTRUCTION_TRIES):
+            assignment = _construct(arrays, rng, preferred if restart == 0 else None)
+            if assignment is not None:
+                break
+        if assignment is None:
+            logger.warning("[local-search] 제약을 만족하는 초기 배치를 찾지 못함")
+            break
+
+        cost, best_assignment = _anneal(_SearchState(arrays, assignment), rng, iterations)
+        groups = problem.groups_from_assignment(best_assignment.tolist())
+        signature = grouping_signature(groups)
+        if signature in found:
+            continue
+        found[signature] = (cost, groups)
+        if solution_callback:
+            solution_callback(score_grouping(problem, groups))
+        if progress_callback:
+            progress_callback(min(85, 12 + int((len(found) / top_n) * 73)))
+
+    ranked = sorted(found.values(), key=lambda item: item[0])
+    logger.info("[local-search] %d개, %.2fs", len(ranked), time.monotonic() - started)
+    return [score_grouping(problem, groups) for _, groups in ranked]
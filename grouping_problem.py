@@ -0,0 +1,172 @@
+"""조 편성 엔진이 공유하는 입력 정리와 점수 계산 순수 함수.
+
+앱은 이름으로 사람을 다루지만, 엔진은 참석자 인덱스로 제약과 점수를 계산한다.
+이 모듈은 OR-Tools에 의존하지 않으므로 어떤 엔진에서도 가볍게 가져다 쓸 수 있다.
+"""
+
+import math
+
+from group_history import canonical_pair_key
+
+
+MIN_GROUP_SIZE = 4
+# CP-SAT 목적함수는 정수만 다루므로 가중치를 SCALE배 한 값으로 계산한다.
+SCALE = 1000
+
+
+class GroupingProblem:
+    """한 번의 조 편성 요청을 엔진 입력 형태로 정리한 값."""
+
+    def __init__(self, names, genders, presenter_indices, pair_counts,
+                 restricted_index_pairs, num_groups, min_size, max_size,
+                 optimize_for='combined', requested_groups=None):
+        self.names = list(names)
+        self.n = len(self.names)
+        # 'M' / 'W' / None(미상). 미상은 어느 쪽으로도 세지 않는다.
+        self.genders = list(genders)
+        self.is_male = [1 if g == 'M' else 0 for g in self.genders]
+        self.is_female = [1 if g == 'W' else 0 for g in self.genders]
+        self.presenter_indices = list(presenter_indices)
+        # (i, j) -> 과거 같은 조였던 횟수. i < j이고 한 번 이상 만난 쌍만 담는다.
+        self.pair_counts = dict(pair_counts)
+        self.restricted_index_pairs = list(restricted_index_pairs)
+        self.num_groups = num_groups
+        # 관리자가 지정한 조 수. 최소 인원을 못 채워 줄였으면 num_groups와 다르다.
+        self.requested_groups = requested_groups
+        self.min_size = min_size
+        self.max_size = max_size
+        self.optimize_for = optimize_for
+
+    @property
+    def spread_presenters(self):
+        """발제자 수가 그룹 수 이하일 때만 한 조에 한 명씩 흩어 놓는다."""
+        return 0 < len(self.presenter_indices) <= self.num_groups
+
+    @property
+    def gender_weight(self):
+        return 40 if self.optimize_for in ('gender', 'combined') else 6
+
+    @property
+    def new_face_weight(self):
+        return 10 if self.optimize_for in ('new_face', 'combined') else 6
+
+    def pair_loss(self, count):
+        """이미 만난 쌍이 다시 같은 조가 될 때의 정수 페널티."""
+        if count <= 0:
+            return 0
+        max_value = SCALE * self.new_face_weight
+        return max_value - max_value // (count + 1)
+
+    def groups_from_assignment(self, assignment):
+        """참석자별 그룹 번호 목록을 이름 목록의 목록으로 바꾼다(빈 조 제외)."""
+        groups = [[] for _ in range(self.num_groups)]
+        for index, group_index in enumerate(assignment):
+            groups[group_index].append(self.names[index])
+        return [group for group in groups if group]
+
+
+def build_grouping_problem(attendee_names, presenter_names, gender_by_name, co_matrix,
+                           restricted_pairs=None, group_count_override=None,
+                           optimize_for='combined'):
+    """이름 기반 요청을 GroupingProblem으로 변환한다.
+
+    co_matrix는 `canonical_pair_key` -> 만남 횟수 사전이거나 co_matrix.CoMatrix다.
+    CoMatrix면 참석자 부분 행렬을 한 번에 꺼내 쓴다.
+    참석자가 3명 미만이면 None을 반환한다.
+    """
+    names = list(attendee_names)
+    n = len(names)
+    if n < 3:
+        return None
+
+    # 그룹 수 결정
+    requested_groups = group_count_override if group_count_override and group_count_override > 0 else None
+    if requested_groups:
+        num_groups = requested_groups
+    else:
+        q, r = divmod(n, 4)
+        num_groups = q if r == 0 else q + 1
+    # 모든 그룹이 최소 MIN_GROUP_SIZE명 이상 가질 수 있도록 그룹 수 상한선 적용
+    num_groups = max(1, min(num_groups, n // MIN_GROUP_SIZE))
+    # 일부 조에 여유가 생겨 3인조가 만들어지지 않도록 +1 여유를 두지 않는다.
+    max_size = math.ceil(n / num_groups)
+
+    presenter_set = set(presenter_names or [])
+    presenter_indices = [i for i, name in enumerate(names) if name in presenter_set]
+
+    name_to_index = {name: index for index, name in enumerate(names)}
+    restricted_index_pairs = []
+    for first_name, second_name in (restricted_pairs or set()):
+        if first_name in name_to_index and second_name in name_to_index:
+            restricted_index_pairs.append(
+                tuple(sorted((name_to_index[first_name], name_to_index[second_name])))
+            )
+
+    if hasattr(co_matrix, 'pair_counts_for'):
+        pair_counts = co_matrix.pair_counts_for(names)
+    else:
+        pair_counts = {}
+        for i in range(n):
+            for j in range(i + 1, n):
+                count = co_matrix.get(canonical_pair_key(names[i], names[j]), 0)
+                if count > 0:
+                    pair_counts[(i, j)] = count
+
+    return GroupingProblem(
+        names,
+        [gender_by_name.get(name) for name in names],
+        presenter_indices,
+        pair_counts,
+        restricted_index_pairs,
+        num_groups,
+        MIN_GROUP_SIZE,
+        max_size,
+        optimize_for=optimize_for,
+        requested_groups=requested_groups,
+    )
+
+
+def grouping_signature(groups):
+    """조 순서와 조 안의 이름 순서를 무시한 중복 판별 키."""
+    return frozenset(frozenset(group) for group in groups)
+
+
+def grouping_objectives(problem, groups):
+    """(성비 불균형 합, 재만남 페널티 합). CP-SAT 모델의 두 목적과 같은 정수 값이다."""
+    name_to_index = {name: index for index, name in enumerate(problem.names)}
+    imbalance = 0
+    penalty = 0
+    for group in groups:
+        indices = sorted(name_to_index[name] for name in group)
+        imbalance += abs(sum(problem.is_male[i] - problem.is_female[i] for i in indices))
+        for left_pos, i in enumerate(indices):
+            for j in indices[left_pos + 1:]:
+                penalty += problem.pair_loss(problem.pair_counts.get((i, j), 0))
+    return imbalance, penalty
+
+
+def score_grouping(problem, groups):
+    """결과 화면에 표시할 점수(combined 가중치 40:10)와 조 목록을 묶어 반환한다.
+
+    성별 미상자는 분모/분자에서 모두 제외해 점수 왜곡을 막는다.
+    """
+    name_to_index = {name: index for index, name in enumerate(problem.names)}
+    gender_score = 0.0
+    new_face_score = 0.0
+    for group in groups:
+        indices = [name_to_index[name] for name in group]
+        males = sum(problem.is_male[i] for i in indices)
+        females = sum(problem.is_female[i] for i in indices)
+        if males > 0 and females > 0:
+            gender_score += min(males, females) / max(males, females)
+        ordered = sorted(indices)
+        for left_pos, i in enumerate(ordered):
+            for j in ordered[left_pos + 1:]:
+                new_face_score += 1.0 / (problem.pair_counts.get((i, j), 0) + 1)
+
+    total_score = gender_score * 40 + new_face_score * 10
+    return {
+        'score': f"{total_score:.2f}",
+        'details': [f"{gender_score:.2f}", f"{new_face_score:.2f}", "0.00", "0.00"],
+        'groups': groups,
+    }
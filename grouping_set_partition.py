@@ -0,0 +1,275 @@
+"""후보 조(열)를 미리 만들어 두고 CP-SAT로 조합만 고르는 집합 분할 조 편성 엔진.
+
+할당 모형(참석자 × 조 BoolVar)은 특별 행사나 월·목 합반처럼 100명이 넘는 명단에서
+모델이 커지고 첫 해를 찾는 데도 오래 걸린다. 이 엔진은 일을 두 단계로 나눈다.
+
+1. 후보 생성: 지역 탐색 엔진으로 좋은 편성을 여러 개 만든 뒤, 각 편성에서 두 조씩 골라
+   한 명씩 맞바꾼 안과 무작위로 다시 나눈 안을 많이 만들어 그중 좋은 것만 후보로 남긴다.
+   후보는 모두 조 크기·발제자 분산·편성 제한을 지키는 조이며, 점수(성비 불균형,
+   과거 만남 페널티)는 NumPy로 한꺼번에 미리 계산한다.
+2. 선택: 후보마다 BoolVar 하나를 두고 "모든 참석자가 정확히 한 후보에 속하고 후보 수가
+   조 수와 같다"는 집합 분할 모델을 푼다. 솔버는 점수 계산 없이 열만 고른다.
+
+다시 나눈 두 조는 원래 두 조를 그대로 대신할 수 있으므로, 서로 다른 조 쌍의 대안을
+섞은 새 편성도 후보 안에서 만들어진다. 후보에는 출발 편성 자체도 들어 있으므로 결과는
+지역 탐색의 최선안보다 나빠지지 않는다.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from grouping_local_search import ProblemArrays, local_search_groupings
+from grouping_problem import grouping_signature, score_grouping
+from grouping_solver import RELATIVE_GAP_LIMIT, SOLVER_WORKERS, STALL_SECONDS, stop_when_stalled
+
+
+logger = logging.getLogger(__name__)
+
+# 후보를 만들 출발 편성 수와 그 지역 탐색에 쓸 시간
+SEED_SOLUTIONS = 12
+SEED_TIME_BUDGET = 3.0
+# 출발 편성 하나에서 다시 나눌 조 쌍 수(조 수의 배수)와 쌍마다 더 시도할 무작위 분할 수,
+# 보관할 분할 수
+PAIRS_PER_GROUP = 2
+SPLITS_PER_PAIR = 8
+SPLITS_KEPT = 3
+# 다시 나눈 안이 원래보다 좋으면 그 안에서 맞바꾸기를 다시 시도하는 최대 횟수
+IMPROVE_ROUNDS = 3
+# 솔버에 넘길 후보 수 상한. 비용이 낮은 후보부터 남기고 출발 편성의 조는 항상 남긴다.
+# 후보가 많을수록 라운드마다 presolve가 길어진다(200명 기준 2천 개에 1초 안팎).
+MAX_CANDIDATES = 2000
+ROUND_TIME_LIMIT = 2.0
+
+
+def _index_groups(problem, groups):
+    name_to_index = {name: index for index, name in enumerate(problem.names)}
+    return [sorted(name_to_index[name] for name in group) for group in groups]
+
+
+def _split_costs(arrays, lefts, rights):
+    """두 조 분할안 여러 개의 (비용 합, 실현 가능 여부). lefts, rights는 (분할 수, 인원) 배열."""
+    cost = np.zeros(len(lefts), dtype=np.int64)
+    feasible = np.ones(len(lefts), dtype=bool)
+    for half in (lefts, rights):
+        pair_loss = arrays.pair_loss[half[:, :, None], half[:, None, :]].sum(axis=(1, 2)) // 2
+        restricted = arrays.restricted[half[:, :, None], half[:, None, :]].sum(axis=(1, 2))
+        cost += arrays.gender_cost * np.abs(arrays.gender[half].sum(axis=1)) + pair_loss
+        feasible &= (restricted == 0) & (arrays.presenter[half].sum(axis=1) <= 1)
+    return cost, feasible
+
+
+def _pair_alternatives(arrays, rng, left, right):
+    """두 조의 인원을 크기는 그대로 두고 다시 나눈 안 중 좋은 것들.
+
+    현재 분할에서 한 명씩 맞바꾼 모든 안과 무작위 분할 몇 개를 한꺼번에 채점해
+    SPLITS_KEPT개를 남긴다. 가장 좋은 안이 현재보다 나으면 그 안에서 다시 반복한다.
+    """
+    left = np.array(left, dtype=np.int64)
+    right = np.array(right, dtype=np.int64)
+    size = len(left)
+    union = np.concatenate([left, right])
+    kept = []
+    current_cost = _split_costs(arrays, left[None, :], right[None, :])[0][0]
+    for _ in range(IMPROVE_ROUNDS):
+        # 맞바꾸기: lefts[k]는 left의 i번째 자리에 right의 j번째 사람을 넣은 안
+        i, j = np.divmod(np.arange(size * len(right)), len(right))
+        lefts = np.tile(left, (len(i), 1))
+        rights = np.tile(right, (len(i), 1))
+        lefts[np.arange(len(i)), i] = right[j]
+        rights[np.arange(len(i)), j] = left[i]
+        shuffled = rng.permuted(np.tile(union, (SPLITS_PER_PAIR, 1)), axis=1)
+        lefts = np.vstack([lefts, shuffled[:, :size]])
+        rights = np.vstack([rights, shuffled[:, size:]])
+
+        cost, feasible = _split_costs(arrays, lefts, rights)
+        order = [row for row in np.argsort(cost, kind='stable') if feasible[row]][:SPLITS_KEPT]
+        kept.extend((lefts[row].tolist(), rights[row].tolist()) for row in order)
+        if not order or cost[order[0]] >= current_cost:
+            break
+        left, right, current_cost = lefts[order[0]], rights[order[0]], cost[order[0]]
+    return [(sorted(a), sorted(b)) for a, b in kept]
+
+
+def generate_candidate_groups(problem, seed_groupings, seed=0):
+    """출발 편성들과 그 조 쌍을 다시 나눈 안으로 후보 조 목록(참석자 인덱스 튜플)을 만든다."""
+    arrays = ProblemArrays(problem)
+    rng = np.random.default_rng(seed)
+    candidates = set()
+    for groups in seed_groupings:
+        indexed = _index_groups(problem, groups)
+        candidates.update(tuple(group) for group in indexed)
+        if len(indexed) < 2:
+            continue
+        for _ in range(PAIRS_PER_GROUP * len(indexed)):
+            first, second = rng.choice(len(indexed), size=2, replace=False)
+            for left, right in _pair_alternatives(arrays, rng, indexed[first], indexed[second]):
+                candidates.add(tuple(left))
+                candidates.add(tuple(right))
+    return sorted(candidates)
+
+
+def score_candidate_groups(problem, candidates):
+    """후보 조마다 (비용, 실현 가능 여부)를 행렬 연산 한 번으로 계산한다.
+
+    비용은 CP-SAT 목적함수와 같은 단위(성비 불균형 × 가중치 + 재만남 페널티)다.
+    """
+    arrays = ProblemArrays(problem)
+    columns = np.zeros((len(candidates), problem.n), dtype=np.int64)
+    for row, members in enumerate(candidates):
+        columns[row, list(members)] = 1
+    sizes = columns.sum(axis=1)
+    pair_loss = ((columns @ arrays.pair_loss) * columns).sum(axis=1) // 2
+    restricted = ((columns @ arrays.restricted) * columns).sum(axis=1)
+    presenters = columns @ arrays.presenter
+    cost = arrays.gender_cost * np.abs(columns @ arrays.gender) + pair_loss
+    feasible = (
+        (sizes >= problem.min_size) & (sizes <= problem.max_size)
+        & (restricted == 0) & (presenters <= 1)
+    )
+    return cost, feasible
+
+
+class _PartitionCollector(cp_model.CpSolverSolutionCallback):
+    def __init__(self, choices):
+        super().__init__()
+        self._choices = choices
+        self.chosen = None
+        self.last_improvement = None
+
+    def on_solution_callback(self):
+        self.last_improvement = time.monotonic()
+        self.chosen = [index for index, var in enumerate(self._choices) if self.Value(var)]
+
+
+class SetPartitionModel:
+    """후보 조 중 num_groups개를 골라 참석자를 정확히 한 번씩 덮는 모델."""
+
+    def __init__(self, problem, candidates, costs):
+        self.problem = problem
+        self.candidates = candidates
+        self.model = cp_model.CpModel()
+        self.choices = [self.model.NewBoolVar(f'c_{index}') for index in range(len(candidates))]
+        covering = [[] for _ in range(problem.n)]
+        for index, members in enumerate(candidates):
+            for person in members:
+                covering[person].append(self.choices[index])
+        for person_choices in covering:
+            self.model.AddExactlyOne(person_choices)
+        self.model.Add(sum(self.choices) == problem.num_groups)
+        self.model.Minimize(sum(int(cost) * var for cost, var in zip(costs, self.choices)))
+        self._index = {members: index for index, members in enumerate(candidates)}
+
+    def indices_of(self, groups):
+        indexed = _index_groups(self.problem, groups)
+        return [self._index.get(tuple(group)) for group in indexed]
+
+    def hint(self, chosen):
+        chosen = set(chosen)
+        self.model.ClearHints()
+        for index, var in enumerate(self.choices):
+            self.model.AddHint(var, 1 if index in chosen else 0)
+
+    def forbid(self, chosen):
+        self.model.Add(sum(self.choices[index] for index in chosen) <= len(chosen) - 1)
+
+    def solve(self, seed, time_limit=ROUND_TIME_LIMIT, stop_event=None):
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_workers = SOLVER_WORKERS
+        solver.parameters.random_seed = seed
+        solver.parameters.relative_gap_limit = RELATIVE_GAP_LIMIT
+        collector = _PartitionCollector(self.choices)
+        finished = threading.Event()
+        watcher = threading.Thread(
+            target=stop_when_stalled,
+            args=(solver, collector, finished, STALL_SECONDS, stop_event),
+            daemon=True,
+        )
+        watcher.start()
+        try:
+            status = solver.Solve(self.model, collector)
+        finally:
+            finished.set()
+            watcher.join()
+        return status, collector.chosen
+
+    def groups_from(self, chosen):
+        return [[self.problem.names[person] for person in self.candidates[index]] for index in chosen]
+
+
+def set_partition_groupings(problem, top_n=10, progress_callback=None, seed=0,
+                            seed_time_budget=SEED_TIME_BUDGET, previous_groups=None,
+                            solution_callback=None, stop_event=None):
+    """후보 조를 만들고 집합 분할 모델로 서로 다른 추천안을 최대 top_n개 고른다.
+
+    입력과 반환 형식은 다른 엔진과 같다. previous_groups는 출발 편성을 만들 때 쓴다.
+    """
+    started = time.monotonic()
+    seeds = local_search_groupings(
+        problem, top_n=max(SEED_SOLUTIONS, top_n), seed=seed, time_budget=seed_time_budget,
+        previous_groups=previous_groups, stop_event=stop_event,
+    )
+    if not seeds:
+        logger.warning("[set-partition] 출발 편성을 만들지 못함")
+        return []
+    if progress_callback:
+        progress_callback(20)
+
+    seed_groupings = [result['groups'] for result in seeds]
+    candidates = generate_candidate_groups(problem, seed_groupings, seed=seed)
+    costs, feasible = score_candidate_groups(problem, candidates)
+    seed_columns = {
+        tuple(group) for groups in seed_groupings for group in _index_groups(problem, groups)
+    }
+    cheapest = set(np.argsort(np.where(feasible, costs, np.iinfo(np.int64).max),
+                              kind='stable')[:MAX_CANDIDATES].tolist())
+    kept = [
+        row for row, members in enumerate(candidates)
+        if feasible[row] and (row in cheapest or members in seed_columns)
+    ]
+    candidates = [candidates[row] for row in kept]
+    costs = costs[kept]
+    logger.info("[set-partition] 출발 편성 %d개, 후보 조 %d개 (%.2fs)",
+                len(seeds), len(candidates), time.monotonic() - started)
+    if progress_callback:
+        progress_callback(30)
+
+    partition_model = SetPartitionModel(problem, candidates, costs)
+    unused_seeds = [partition_model.indices_of(result['groups']) for result in seeds]
+    results = []
+    seen = set()
+    for attempt in range(top_n * 2):
+        if len(results) >= top_n:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+        if unused_seeds:
+            partition_model.hint(unused_seeds.pop(0))
+        status, chosen = partition_model.solve(seed=seed + attempt * 13 + 7, stop_event=stop_event)
+        if status == cp_model.INFEASIBLE:
+            logger.info("[set-partition] attempt %d: 후보로 만들 수 있는 조합을 모두 찾음", attempt)
+            break
+        if chosen is None:
+            logger.warning("[set-partition] attempt %d: 실패 status=%s", attempt, status)
+            continue
+        partition_model.forbid(chosen)
+        chosen_set = set(chosen)
+        unused_seeds = [indices for indices in unused_seeds if set(indices) != chosen_set]
+        groups = partition_model.groups_from(chosen)
+        signature = grouping_signature(groups)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        result = score_grouping(problem, groups)
+        results.append(result)
+        if solution_callback:
+            solution_callback(result)
+        if progress_callback:
+            progress_callback(min(85, 30 + int((len(results) / top_n) * 55)))
+
+    logger.info("[set-partition] %d개, %.2fs", len(results), time.monotonic() - started)
+    return results
@@ -0,0 +1,660 @@
+"""OR-Tools CP-SAT 기반 조 편성 엔진.
+
+모델은 요청마다 한 번만 만든다.  해를 하나 찾을 때마다 "이번 조합에서 같은 조였던
+쌍 중 적어도 하나는 갈라져야 한다"는 다양성 컷을 같은 모델에 덧붙이고 다시 풀어
+서로 다른 추천안을 차례로 모은다.
+
+쌍 인코딩(pair_encoding):
+  - 'pair'      : 참석자마다 그룹 번호 IntVar를 두고, 쌍마다 "같은 조" 리터럴 하나를
+                  만든다.  리터럴이 거짓이면 두 그룹 번호가 달라야 한다.  목적함수와
+                  다양성 컷이 같은 리터럴을 공유하므로 변수·제약이 쌍 수(E)에 비례한다.
+  - 'per_group' : 예전 방식. 쌍마다 그룹 수(G)만큼 BoolVar를 만든다(E·G).
+
+여러 코어를 쓸 수 있으면 enumerate_groupings_parallel이 서로 다른 시드와 하위 문제를
+프로세스 풀에 나눠 맡기고, 돌아온 추천안을 조합 서명으로 중복 제거해 합친다.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from ortools.sat.python import cp_model
+
+from grouping_local_search import warm_start_assignment
+from grouping_problem import SCALE, grouping_objectives, grouping_signature, score_grouping
+
+
+logger = logging.getLogger(__name__)
+
+# 라운드별 최대 탐색 시간. 실제로는 해가 STALL_SECONDS 동안 나아지지 않거나
+# 상한과의 차이가 RELATIVE_GAP_LIMIT 이하가 되면 그보다 일찍 끝난다.
+# 첫 라운드는 탐욕 힌트에서, 이후 라운드는 직전 해(컷 하나만 어긋남)에서 출발한다.
+FIRST_ROUND_TIME_LIMIT = 3.0
+ROUND_TIME_LIMIT = 1.5
+STALL_SECONDS = 0.3
+RELATIVE_GAP_LIMIT = 0.01
+# 라운드가 해 없이 끝나면(큰 명단에서 presolve가 길 때) 다음 라운드 시간을 두 배로 늘린다.
+MAX_ROUND_TIME_LIMIT = 8.0
+# 파레토 모드에서 돌려줄 최대 절충안 수(양 끝 둘 + 그 사이 엡실론 지점)
+PARETO_POINTS = 5
+PARETO_TAGS = ('gender_first', 'balanced', 'new_face_first')
+PAIR_ENCODINGS = ('pair', 'per_group')
+# 운영 중 문제가 생기면 환경변수로 예전 인코딩으로 되돌릴 수 있다.
+DEFAULT_PAIR_ENCODING = os.environ.get('GROUPING_PAIR_ENCODING', 'pair')
+
+
+def available_cpu_count():
+    """컨테이너에 실제로 할당된 CPU 수(최소 1).
+
+    os.cpu_count()는 호스트 코어 수를 돌려주므로, cgroup CPU 할당량(v2 cpu.max,
+    v1 cfs_quota_us)과 CPU affinity 중 가장 작은 값을 쓴다.
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        count = os.cpu_count() or 1
+
+    quota = None
+    try:
+        with open('/sys/fs/cgroup/cpu.max', encoding='utf-8') as handle:
+            limit, period = handle.read().split()[:2]
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', encoding='utf-8') as handle:
+                limit = int(handle.read().strip())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', encoding='utf-8') as handle:
+                period = int(handle.read().strip())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        count = min(count, math.ceil(quota))
+    return max(1, count)
+
+
+# CP-SAT는 워커 하나로는 feasibility jump·LNS 같은 보조 탐색을 돌리지 않아 큰 모델에서
+# 해를 못 찾기도 한다. 코어가 부족해도 포트폴리오는 최소 크기로 유지하고,
+# 병렬 실행의 프로세스마다 최소 MIN_PROCESS_WORKERS개를 남긴다.
+MIN_SOLVER_WORKERS = 4
+MIN_PROCESS_WORKERS = 2
+SOLVER_WORKERS = max(MIN_SOLVER_WORKERS, available_cpu_count())
+
+
+class _SolutionCollector(cp_model.CpSolverSolutionCallback):
+    """탐색 중 발견한 개선해를 기록한다. 마지막 기록이 해당 라운드의 최선해다.
+
+    stop_event가 켜져 있으면 해를 기록한 직후 탐색을 멈춘다(감시 스레드보다 빠르다).
+    """
+
+    def __init__(self, model, stop_event=None):
+        super().__init__()
+        self._model = model
+        self._stop_event = stop_event
+        self.solutions = []
+        self.last_improvement = None
+
+    def on_solution_callback(self):
+        self.last_improvement = time.monotonic()
+        self.solutions.append({
+            'assignment': self._model.assignment_from(self.Value),
+            'objective': self.ObjectiveValue(),
+            'wall_time': self.WallTime(),
+        })
+        if self._stop_event is not None and self._stop_event.is_set():
+            self.StopSearch()
+
+
+def stop_when_stalled(solver, collector, finished, stall_seconds, stop_event=None):
+    """첫 해를 찾은 뒤 stall_seconds 동안 개선이 없거나 stop_event가 켜지면 탐색을 끝낸다.
+
+    해 콜백은 새 해가 나올 때만 불리므로, 개선이 멈춘 것은 별도 스레드에서 확인한다.
+    collector는 last_improvement(monotonic 시각, 첫 해 전에는 None)를 가진 해 콜백이다.
+    집합 분할 엔진(grouping_set_partition)도 같은 규칙으로 멈춘다.
+    """
+    while not finished.wait(0.05):
+        if stop_event is not None and stop_event.is_set():
+            solver.StopSearch()
+            return
+        last = collector.last_improvement
+        if stall_seconds and last is not None and time.monotonic() - last >= stall_seconds:
+            solver.StopSearch()
+            return
+
+
+class GroupingModel:
+    """GroupingProblem 하나에 대한 CP-SAT 모델과 누적된 다양성 컷."""
+
+    def __init__(self, problem, pair_encoding=DEFAULT_PAIR_ENCODING):
+        if pair_encoding not in PAIR_ENCODINGS:
+            raise ValueError(f'알 수 없는 쌍 인코딩입니다: {pair_encoding}')
+        self.problem = problem
+        self.pair_encoding = pair_encoding
+        self.model = cp_model.CpModel()
+        self._same_group = {}
+        self.cut_count = 0
+        self._build()
+
+    def _build(self):
+        problem = self.problem
+        model = self.model
+        n = problem.n
+        groups = range(problem.num_groups)
+
+        # x[i][g]: 멤버 i가 그룹 g에 소속
+        self.x = x = [[model.NewBoolVar(f'x_{i}_{g}') for g in groups] for i in range(n)]
+
+        # 대칭성 파괴: 첫 번째 사람을 그룹 0에 고정해 자리바꿈 탐색 공간을 줄인다.
+        model.Add(x[0][0] == 1)
+
+        for i in range(n):
+            model.AddExactlyOne(x[i][g] for g in groups)
+
+        for g in groups:
+            size = sum(x[i][g] for i in range(n))
+            model.Add(size >= problem.min_size)
+            model.Add(size <= problem.max_size)
+
+        # 비공개 관리자 제한: 지정된 두 사람은 어떤 추천안에서도 같은 조가 될 수 없다.
+        for left_index, right_index in problem.restricted_index_pairs:
+            for g in groups:
+                model.Add(x[left_index][g] + x[right_index][g] <= 1)
+
+        # 발제자 분산: 그룹 수 >= 발제자 수일 때 각 그룹에 1명씩
+        if problem.spread_presenters:
+            for g in groups:
+                model.AddAtMostOne(x[i][g] for i in problem.presenter_indices)
+
+        if self.pair_encoding == 'pair':
+            # group_index[i] == g  <=>  x[i][g]
+            self.group_index = [
+                model.NewIntVar(0, problem.num_groups - 1, f'gi_{i}') for i in range(n)
+            ]
+            for i in range(n):
+                model.Add(self.group_index[i] == sum(g * x[i][g] for g in groups))
+
+        # 성비 점수: 각 그룹 내 성별 불균형(|남-여|)을 최소화한다.
+        imbalance = []
+        for g in groups:
+            diff = model.NewIntVar(-n, n, f'd_{g}')
+            model.Add(diff == sum(
+                (problem.is_male[i] - problem.is_female[i]) * x[i][g] for i in range(n)
+            ))
+            abs_diff = model.NewIntVar(0, n, f'ad_{g}')
+            model.AddAbsEquality(abs_diff, diff)
+            imbalance.append(abs_diff)
+
+        # 새만남 점수: 이미 만난 쌍이 다시 같은 조가 될 때만 페널티를 준다.
+        penalties = []
+        for (i, j), count in problem.pair_counts.items():
+            loss = problem.pair_loss(count)
+            if loss <= 0:
+                continue
+            if self.pair_encoding == 'pair':
+                penalties.append(self.same_group_literal(i, j) * loss)
+                continue
+            for g in groups:
+                together = model.NewBoolVar(f's_{i}_{j}_{g}')
+                model.Add(x[i][g] + x[j][g] - 1 <= together)
+                penalties.append(together * loss)
+
+        # 두 목적을 따로 들고 있어야 파레토 모드에서 한쪽을 상한 제약으로 돌릴 수 있다.
+        self.gender_imbalance = sum(imbalance)
+        self.repeat_penalty = sum(penalties)
+        self._caps = {}
+        self.use_objective('combined')
+
+    def use_objective(self, kind):
+        """목적함수를 바꾼다. 'combined'(가중합 최대화) / 'gender' / 'new_face'(각각 최소화)."""
+        if kind == 'gender':
+            self.model.Minimize(self.gender_imbalance)
+        elif kind == 'new_face':
+            self.model.Minimize(self.repeat_penalty)
+        else:
+            self.model.Maximize(
+                self.gender_imbalance * (-SCALE * self.problem.gender_weight) - self.repeat_penalty
+            )
+
+    def cap(self, kind, upper):
+        """'gender' / 'new_face' 목적값에 상한을 둔다(None이면 해제).
+
+        상한은 변수 하나의 정의역으로 두므로, 모델을 다시 만들지 않고 정의역만 바꿔
+        엡실론 제약을 옮길 수 있다.
+        """
+        if kind not in self._caps:
+            if upper is None:
+                return
+            expression = self.gender_imbalance if kind == 'gender' else self.repeat_penalty
+            limit = self.problem.n if kind == 'gender' else sum(
+                self.problem.pair_loss(count) for count in self.problem.pair_counts.values()
+            )
+            variable = self.model.NewIntVar(0, limit, f'cap_{kind}')
+            self.model.Add(expression <= variable)
+            self._caps[kind] = (variable, limit)
+        variable, limit = self._caps[kind]
+        domain = self.model.Proto().variables[variable.Index()].domain
+        del domain[:]
+        domain.extend([0, limit] if upper is None else [0, int(upper)])
+
+    def same_group_literal(self, i, j):
+        """i, j가 같은 조면 반드시 참이 되는 리터럴. 쌍마다 한 번만 만든다.
+
+        반대 방향(참이면 같은 조)은 강제하지 않는다. 리터럴은 목적함수에서 페널티,
+        다양성 컷에서 상한으로만 쓰이므로 솔버가 굳이 참으로 둘 이유가 없다.
+        """
+        key = (i, j) if i < j else (j, i)
+        literal = self._same_group.get(key)
+        if literal is None:
+            literal = self.model.NewBoolVar(f't_{key[0]}_{key[1]}')
+            if self.pair_encoding == 'pair':
+                self.model.Add(
+                    self.group_index[key[0]] != self.group_index[key[1]]
+                ).OnlyEnforceIf(literal.Not())
+            else:
+                for g in range(self.problem.num_groups):
+                    self.model.Add(self.x[key[0]][g] + self.x[key[1]][g] - 1 <= literal)
+            self._same_group[key] = literal
+        return literal
+
+    def require_together(self, i, j):
+        """하위 문제 분할용: i, j를 반드시 같은 조에 둔다."""
+        if self.pair_encoding == 'pair':
+            self.model.Add(self.group_index[i] == self.group_index[j])
+        else:
+            for g in range(self.problem.num_groups):
+                self.model.Add(self.x[i][g] == self.x[j][g])
+
+    def forbid(self, assignment):
+        """이미 찾은 조합의 같은 조 쌍 중 하나 이상은 이번엔 갈라지도록 컷을 추가한다."""
+        same_pairs = [
+            (i, j)
+            for i in range(self.problem.n)
+            for j in range(i + 1, self.problem.n)
+            if assignment[i] == assignment[j]
+        ]
+        if not same_pairs:
+            return
+        self.model.Add(
+            sum(self.same_group_literal(i, j) for i, j in same_pairs) <= len(same_pairs) - 1
+        )
+        self.cut_count += 1
+
+    def hint(self, assignment):
+        """이전 할당을 x 변수 힌트로 넣는다. 기존 힌트는 지운다.
+
+        0번 참석자는 0번 조로 고정되어 있으므로 필요하면 조 번호를 맞바꿔 넣는다.
+        """
+        first = assignment[0]
+        relabel = {first: 0, 0: first}
+        self.model.ClearHints()
+        for i, row in enumerate(self.x):
+            group = relabel.get(assignment[i], assignment[i])
+            for g, var in enumerate(row):
+                self.model.AddHint(var, 1 if group == g else 0)
+
+    def assignment_from(self, value):
+        """value(변수) -> 정수 함수를 받아 참석자별 그룹 번호 목록을 만든다."""
+        assignment = []
+        for row in self.x:
+            assignment.append(next(g for g, var in enumerate(row) if value(var)))
+        return assignment
+
+    def solve(self, seed, time_limit=ROUND_TIME_LIMIT, num_workers=SOLVER_WORKERS,
+              stall_seconds=STALL_SECONDS, stop_event=None):
+        """현재 모델(누적 컷 포함)을 한 번 풀고 (status, 최선 할당, 수집기)를 반환한다."""
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_workers = num_workers
+        solver.parameters.random_seed = seed
+        solver.parameters.relative_gap_limit = RELATIVE_GAP_LIMIT
+        collector = _SolutionCollector(self, stop_event)
+        finished = threading.Event()
+        watcher = None
+        if stall_seconds or stop_event is not None:
+            watcher = threading.Thread(
+                target=stop_when_stalled,
+                args=(solver, collector, finished, stall_seconds, stop_event),
+                daemon=True,
+            )
+            watcher.start()
+        try:
+            status = solver.Solve(self.model, collector)
+        finally:
+            finished.set()
+            if watcher:
+                watcher.join()
+        assignment = collector.solutions[-1]['assignment'] if collector.solutions else None
+        return status, assignment, collector
+
+
+def enumerate_groupings(problem, top_n=10, progress_callback=None, solution_callback=None,
+                        first_round_time_limit=FIRST_ROUND_TIME_LIMIT,
+                        round_time_limit=ROUND_TIME_LIMIT, num_workers=None,
+                        pair_encoding=DEFAULT_PAIR_ENCODING, seed_offset=0, together_pairs=(),
+                        previous_groups=None, stall_seconds=STALL_SECONDS, stop_event=None):
+    """하나의 모델에서 서로 다른 추천안을 최대 top_n개까지 모은다.
+
+    첫 라운드는 탐욕 배치(또는 previous_groups를 고친 안)를 힌트로 받는다.
+    찾은 조합은 컷으로 금지하고 동시에 다음 라운드의 힌트로 넘긴다. 힌트는 컷 하나만
+    어긋나므로 솔버는 처음부터 탐색하지 않고 가까운 좋은 해를 빠르게 찾는다.
+    together_pairs는 병렬 실행에서 하위 문제를 나눌 때만 쓴다.
+    solution_callback은 중복을 거른 추천안을 찾는 즉시 하나씩 받는다.
+    stop_event가 켜지면 진행 중인 탐색을 끊고 그때까지 찾은 추천안만 반환한다.
+    """
+    num_workers = num_workers or SOLVER_WORKERS
+    grouping_model = GroupingModel(problem, pair_encoding=pair_encoding)
+    for i, j in together_pairs:
+        grouping_model.require_together(i, j)
+    warm_start = warm_start_assignment(problem, previous_groups, seed=seed_offset)
+    if warm_start is not None:
+        grouping_model.hint(warm_start)
+    results = []
+    seen = set()
+    # 해를 찾은 시간 한도는 유지한다. 개선이 멈추면 어차피 일찍 끝나므로 비용이 작다.
+    time_limit = first_round_time_limit
+
+    for attempt in range(top_n * 2):
+        if len(results) >= top_n:
+            break
+        if stop_event is not None and stop_event.is_set():
+            logger.info("[CP-SAT] attempt %d: 중단 요청", attempt)
+            break
+
+        status, assignment, _ = grouping_model.solve(
+            seed=(seed_offset + attempt) * 13 + 7,
+            time_limit=time_limit,
+            num_workers=num_workers,
+            stall_seconds=stall_seconds,
+            stop_event=stop_event,
+        )
+        if status == cp_model.INFEASIBLE:
+            # 컷은 누적되기만 하므로 더 풀어도 새로운 조합이 나오지 않는다.
+            logger.info("[CP-SAT] attempt %d: 더 이상 다른 조합이 없음", attempt)
+            break
+        if assignment is None:
+            logger.warning("[CP-SAT] attempt %d: 실패 status=%s", attempt, status)
+            time_limit = min(time_limit * 2, max(MAX_ROUND_TIME_LIMIT, first_round_time_limit))
+            continue
+        if not results:
+            time_limit = round_time_limit
+
+        grouping_model.forbid(assignment)
+        grouping_model.hint(assignment)
+        groups = problem.groups_from_assignment(assignment)
+        signature = grouping_signature(groups)
+        if signature in seen:
+            logger.info("[CP-SAT] attempt %d: 중복, 스킵", attempt)
+            continue
+        seen.add(signature)
+
+        result = score_grouping(problem, groups)
+        results.append(result)
+        logger.info("[CP-SAT] attempt %d: 성공 %d/%d, score=%s",
+                    attempt, len(results), top_n, result['score'])
+        if solution_callback:
+            solution_callback(result)
+
+        # 10~85% 범위를 찾은 결과 수에 비례해 배분한다.
+        if progress_callback:
+            progress_callback(min(85, 12 + int((len(results) / top_n) * 73)))
+
+    return results
+
+
+def pareto_groupings(problem, points=PARETO_POINTS, progress_callback=None,
+                     solution_callback=None, time_limit=FIRST_ROUND_TIME_LIMIT, num_workers=None,
+                     pair_encoding=DEFAULT_PAIR_ENCODING, previous_groups=None,
+                     stall_seconds=STALL_SECONDS, stop_event=None):
+    """성비와 새만남 사이의 절충안(파레토 전선)을 모델 하나로 구한다.
+
+    1. 성비 우선: 성비 불균형을 최소화한 뒤, 그 값을 상한으로 두고 재만남 페널티를 줄인다.
+    2. 새만남 우선: 반대 순서로 같은 일을 한다.
+    3. 두 끝의 성비 불균형 사이를 고르게 나눈 값을 차례로 상한(엡실론)으로 두고 재만남
+       페널티를 최소화한다. 상한이 조금씩 느슨해지므로 직전 해가 그대로 다음 힌트가 된다.
+
+    모델과 누적 힌트는 모든 풀이에서 공유하고 상한 변수의 정의역만 바꾼다.
+    결과는 성비 우선 → 균형 → 새만남 우선 순서이며, 각 추천안에 'tag'와 두 목적값
+    ('objectives')을 덧붙인다. 다른 안에 지배되는 안과 중복 조합은 뺀다.
+    """
+    num_workers = num_workers or SOLVER_WORKERS
+    grouping_model = GroupingModel(problem, pair_encoding=pair_encoding)
+    warm_start = warm_start_assignment(problem, previous_groups)
+    if warm_start is not None:
+        grouping_model.hint(warm_start)
+    found = []
+    solves = [0]
+    total_solves = 4 + max(0, points - 2)
+
+    def solve(objective, caps):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        grouping_model.use_objective(objective)
+        for kind in ('gender', 'new_face'):
+            grouping_model.cap(kind, caps.get(kind))
+        _, assignment, _ = grouping_model.solve(
+            seed=len(found) * 13 + 7, time_limit=time_limit, num_workers=num_workers,
+            stall_seconds=stall_seconds, stop_event=stop_event,
+        )
+        solves[0] += 1
+        if progress_callback:
+            progress_callback(min(85, 12 + int(solves[0] / total_solves * 73)))
+        if assignment is None:
+            return None
+        grouping_model.hint(assignment)
+        groups = problem.groups_from_assignment(assignment)
+        return grouping_objectives(problem, groups), groups
+
+    def lexicographic(first, second):
+        best = solve(first, {})
+        if best is None:
+            return None
+        (imbalance, penalty), _ = best
+        bound = {'gender': imbalance} if first == 'gender' else {'new_face': penalty}
+        return solve(second, bound) or best
+
+    gender_first = lexicographic('gender', 'new_face')
+    if gender_first is not None:
+        found.append(gender_first)
+    new_face_first = lexicographic('new_face', 'gender')
+
+    if gender_first is not None and new_face_first is not None:
+        low, high = gender_first[0][0], new_face_first[0][0]
+        steps = max(0, points - 2)
+        epsilons = sorted({low + (high - low) * step // (steps + 1) for step in range(1, steps + 1)})
+        for epsilon in epsilons:
+            if epsilon <= low or epsilon >= high:
+                continue
+            point = solve('new_face', {'gender': epsilon})
+            if point is not None:
+                found.append(point)
+    if new_face_first is not None:
+        found.append(new_face_first)
+
+    # 지배되는 안(두 목적 모두 같거나 나쁜 안)과 같은 조합을 뺀다.
+    front = []
+    seen = set()
+    for objectives, groups in found:
+        signature = grouping_signature(groups)
+        if signature in seen:
+            continue
+        dominated = any(
+            other[0] <= objectives[0] and other[1] <= objectives[1] and other != objectives
+            for other, _ in found
+        )
+        if dominated:
+            continue
+        seen.add(signature)
+        front.append((objectives, groups))
+    front.sort(key=lambda item: (item[0][0], item[0][1]))
+
+    results = []
+    for index, ((imbalance, penalty), groups) in enumerate(front):
+        if len(front) == 1:
+            # 두 목적이 충돌하지 않으면 한 안이 양쪽 모두 최선이다.
+            tag = 'balanced'
+        elif index == 0:
+            tag = 'gender_first'
+        elif index == len(front) - 1:
+            tag = 'new_face_first'
+        else:
+            tag = 'balanced'
+        result = score_grouping(problem, groups)
+        result['tag'] = tag
+        result['objectives'] = {'gender_imbalance': imbalance, 'repeat_penalty': penalty}
+        results.append(result)
+        if solution_callback:
+            solution_callback(result)
+    logger.info("[CP-SAT] 파레토 절충안 %d개 (풀이 %d회)", len(results), solves[0])
+    return results
+
+
+_process_pool = None
+_process_manager = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """요청 간에 재사용하는 (프로세스 풀, 중단 신호용 Manager).
+
+    gunicorn 스레드 여럿이 함께 쓰므로 크기는 CPU 수로 한 번만 정하고 잠금 안에서 만든다.
+    요청마다 필요한 만큼만 작업을 넣으며 풀 크기를 바꾸지 않는다(다른 요청의 작업이 취소된다).
+    gunicorn 스레드에서 fork하지 않도록 spawn을 쓴다.
+    """
+    global _process_pool, _process_manager
+    with _process_pool_lock:
+        if _process_pool is None:
+            context = multiprocessing.get_context('spawn')
+            if _process_manager is None:
+                _process_manager = context.Manager()
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max(1, available_cpu_count() // MIN_PROCESS_WORKERS), mp_context=context,
+            )
+        return _process_pool, _process_manager
+
+
+def _discard_process_pool(pool):
+    """깨진 풀을 버려 다음 요청이 새 풀을 만들게 한다. 이미 다른 풀로 바뀌었으면 그대로 둔다."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _diversifying_partners(problem, count):
+    """하위 문제마다 0번 참석자와 같은 조에 묶을 상대를 고른다.
+
+    과거에 적게 만난 사람부터 고르므로 강제 묶음이 새만남 점수를 크게 해치지 않는다.
+    함께 둘 수 없는 상대(제한 쌍, 발제자끼리)는 제외한다.
+    """
+    blocked = {j for i, j in problem.restricted_index_pairs if i == 0}
+    if problem.spread_presenters and 0 in problem.presenter_indices:
+        blocked |= set(problem.presenter_indices)
+    candidates = [j for j in range(1, problem.n) if j not in blocked]
+    candidates.sort(key=lambda j: (problem.pair_counts.get((0, j), 0), j))
+    return candidates[:count]
+
+
+def _enumerate_subproblem(problem, top_n, seed_offset, together_pairs, num_workers,
+                          pair_encoding, previous_groups, stop_event=None):
+    return enumerate_groupings(
+        problem, top_n=top_n, num_workers=num_workers, pair_encoding=pair_encoding,
+        seed_offset=seed_offset, together_pairs=together_pairs,
+        previous_groups=previous_groups, stop_event=stop_event,
+    )
+
+
+def enumerate_groupings_parallel(problem, top_n=10, progress_callback=None, processes=None,
+                                 pair_encoding=DEFAULT_PAIR_ENCODING, previous_groups=None,
+                                 solution_callback=None, stop_event=None):
+    """서로 다른 하위 문제를 프로세스 풀에서 동시에 풀고 결과를 합친다.
+
+    하위 문제 k는 "0번 참석자와 k번째 상대가 같은 조"인 조합만 탐색하므로 프로세스끼리
+    같은 해를 반복해서 찾는 일이 드물다.  첫 작업만은 제약 없이 전체 공간을 탐색해
+    단일 실행과 같은 품질의 최선해를 보장한다.  프로세스 하나에 CPU를
+    MIN_PROCESS_WORKERS개씩 나눌 수 없으면 순차 실행으로 돌아간다.
+    병렬 실행에서는 solution_callback이 하위 문제가 끝날 때마다 새 추천안을 받는다.
+    서로 다른 추천안이 top_n개 모이면 거기서 멈추므로, 스트리밍된 카드가 곧 최종 결과다.
+    그때나 stop_event가 켜지면 Manager 이벤트로 실행 중인 하위 문제까지 멈춰 풀을 비운다.
+    풀이 깨지면(자식 프로세스 종료 등) 풀을 버리고 남은 추천안을 순차로 찾는다.
+    """
+    cpu_count = available_cpu_count()
+    processes = processes or min(cpu_count // MIN_PROCESS_WORKERS, top_n)
+    if processes <= 1:
+        return enumerate_groupings(
+            problem, top_n=top_n, progress_callback=progress_callback,
+            solution_callback=solution_callback, pair_encoding=pair_encoding,
+            previous_groups=previous_groups, stop_event=stop_event,
+        )
+
+    num_workers = max(MIN_PROCESS_WORKERS, cpu_count // processes)
+    per_task = max(1, math.ceil(top_n / processes))
+    partners = _diversifying_partners(problem, processes - 1)
+    subproblems = [()] + [((0, partner),) for partner in partners]
+
+    results = []
+    seen = set()
+
+    def merge(found):
+        for result in found:
+            if len(results) >= top_n:
+                return
+            signature = grouping_signature(result['groups'])
+            if signature in seen:
+                continue
+            seen.add(signature)
+            results.append(result)
+            if solution_callback:
+                solution_callback(result)
+            if progress_callback:
+                progress_callback(min(85, 12 + int((len(results) / top_n) * 73)))
+
+    pool = None
+    task_stop = None
+    try:
+        pool, manager = _get_process_pool()
+        # 하위 프로세스까지 닿는 중단 신호. 켜면 실행 중인 하위 문제도 곧바로 탐색을 끝낸다.
+        task_stop = manager.Event()
+        pending = {
+            pool.submit(
+                _enumerate_subproblem, problem, per_task, index * top_n, together_pairs,
+                num_workers, pair_encoding, previous_groups, task_stop,
+            )
+            for index, together_pairs in enumerate(subproblems)
+        }
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                merge(future.result())
+            if len(results) >= top_n or (stop_event is not None and stop_event.is_set()):
+                task_stop.set()
+                for future in pending:
+                    future.cancel()
+                pending = set()
+    except (BrokenProcessPool, CancelledError, OSError, EOFError) as error:
+        # 자식 프로세스가 죽었거나 풀을 쓸 수 없다. 풀을 버리고 이 요청은 순차로 마저 찾는다.
+        logger.warning("[CP-SAT] 프로세스 풀 실패, 순차 실행으로 전환: %r", error)
+        if task_stop is not None:
+            try:
+                task_stop.set()
+            except (OSError, EOFError):
+                pass
+        if pool is not None:
+            _discard_process_pool(pool)
+        if len(results) < top_n and not (stop_event is not None and stop_event.is_set()):
+            merge(enumerate_groupings(
+                problem, top_n=top_n, pair_encoding=pair_encoding,
+                previous_groups=previous_groups, stop_event=stop_event,
+            ))
+
+    results.sort(key=lambda result: float(result['score']), reverse=True)
+    logger.info("[CP-SAT] 병렬 %d개 프로세스, 결과 %d개", processes, len(results))
+    return results
@@ -0,0 +1,147 @@
+"""조 편성 이력(history)을 한 번 훑어 만든 조회용 인덱스.
+
+만남 매트릭스, 결과 화면의 만남 날짜, 회원명부의 세미나·발제 횟수, 회원 프로필의 참여 기록,
+세미나 기록 목록이 모두 같은 history.groups를 각자 다시 훑던 것을 하나로 모았다.
+이름은 정수 ID로 한 번만 바꿔 두고(intern), 행별 참석자 배열, 쌍별 횟수·날짜, 회원별
+세미나·발제 횟수와 참여 행 목록을 함께 만든다. 이력 버전마다 한 번 만들어 여러 화면이 나눠 쓴다.
+
+- 출석(세미나·발제 횟수, 참여 기록)은 저장된 조 명단 그대로 센다.
+- 만남(쌍 횟수·날짜)은 미연락 불참자(excluded_names)를 뺀 실제 참석 기준이다.
+"""
+
+import itertools
+
+import numpy as np
+
+from group_history import canonical_pair_key, day_from_ordinal, day_ordinal
+
+
+class HistoryIndex:
+    """history 행 목록(최근 날짜 순으로 정렬해 보관)에서 만든 읽기 전용 인덱스."""
+
+    def __init__(self, history_rows):
+        self.rows = sorted(history_rows or [], key=lambda row: str(row.get('date') or ''), reverse=True)
+        self.names = []
+        self.name_id = {}
+        # 행 위치별 참석자·발제자 ID 배열
+        self.row_members = []
+        self.row_facilitators = []
+        self.row_group_counts = []
+        # (작은 ID, 큰 ID) -> [만난 횟수, 마지막 만남 날짜 문자열, 만난 날짜 서수 목록]
+        self.pairs = {}
+
+        for row in self.rows:
+            meeting_date = str(row.get('date') or '').strip()
+            day = day_ordinal(meeting_date)
+            excluded = {str(name).strip() for name in row.get('excluded_names') or [] if str(name).strip()}
+            members = []
+            group_count = 0
+            for group in row.get('groups') or []:
+                if isinstance(group, str):
+                    # 예전 기록은 조 없이 이름만 나열되어 있다.
+                    if group.strip():
+                        members.append(self.intern(group))
+                    continue
+                if not isinstance(group, list):
+                    continue
+                group_count += 1
+                names = [str(name).strip() for name in group if str(name).strip()]
+                members.extend(self.intern(name) for name in names)
+                met = [self.name_id[name] for name in names if name not in excluded]
+                for a, b in itertools.combinations(met, 2):
+                    if a == b:
+                        continue
+                    item = self.pairs.setdefault((a, b) if a < b else (b, a), [0, None, []])
+                    item[0] += 1
+                    if meeting_date and (not item[1] or meeting_date > item[1]):
+                        item[1] = meeting_date
+                    if day and day not in item[2]:
+                        item[2].append(day)
+            self.row_members.append(np.unique(np.array(members, dtype=np.int32)))
+            self.row_facilitators.append(np.unique(np.array([
+                self.intern(name) for name in row.get('facilitators') or [] if str(name).strip()
+            ], dtype=np.int32)))
+            self.row_group_counts.append(group_count)
+        for item in self.pairs.values():
+            item[2].sort(reverse=True)
+
+        self.seminar_counts = np.zeros(len(self.names), dtype=np.int32)
+        self.facilitator_counts = np.zeros(len(self.names), dtype=np.int32)
+        self.member_row_positions = [[] for _ in self.names]
+        for position, (members, facilitators) in enumerate(zip(self.row_members, self.row_facilitators)):
+            self.seminar_counts[members] += 1
+            self.facilitator_counts[facilitators] += 1
+            for member in members.tolist():
+                self.member_row_positions[member].append(position)
+
+    def intern(self, name):
+        name = str(name).strip()
+        member = self.name_id.get(name)
+        if member is None:
+            member = self.name_id[name] = len(self.names)
+            self.names.append(name)
+        return member
+
+    # --- 만남 ---
+
+    def pair_counts(self):
+        """{canonical_pair_key: 만난 횟수}. 조 편성 엔진의 co_matrix 입력이다."""
+        return {
+            canonical_pair_key(self.names[a], self.names[b]): item[0]
+            for (a, b), item in self.pairs.items()
+        }
+
+    def pair_rows(self, names=None):
+        """DB 함수 history_pair_counts(031 마이그레이션)와 같은 형식의 행 목록.
+
+        [{'pair_key', 'count', 'last_met', 'days'}], days는 최근 순 'YYYY-MM-DD'다.
+        names가 주어지면 그 이름끼리의 쌍만 담는다. RPC를 쓸 수 없을 때 대신 쓴다.
+        """
+        members = None
+        if names is not None:
+            members = {self.name_id[name] for name in (str(n).strip() for n in names) if name in self.name_id}
+        rows = []
+        for (a, b), (count, last_met, days) in self.pairs.items():
+            if members is not None and (a not in members or b not in members):
+                continue
+            rows.append({
+                'pair_key': canonical_pair_key(self.names[a], self.names[b]),
+                'count': count,
+                'last_met': last_met[:10] if last_met else None,
+                'days': [day_from_ordinal(day) for day in days],
+            })
+        return rows
+
+    # --- 출석 ---
+
+    def member_counts(self):
+        """{이름: (세미나 출석 횟수, 발제 횟수)}."""
+        return {
+            name: (int(self.seminar_counts[member]), int(self.facilitator_counts[member]))
+            for member, name in enumerate(self.names)
+        }
+
+    def member_records(self, name):
+        """회원이 조 명단에 있었던 (행, 발제 여부) 목록(최근 순)."""
+        member = self.name_id.get(str(name).strip())
+        if member is None:
+            return []
+        return [
+            (self.rows[position], bool(np.isin(member, self.row_facilitators[position])))
+            for position in self.member_row_positions[member]
+        ]
+
+    def row_summaries(self, start=None, end=None):
+        """세미나 기록 목록용 (행, 참석 인원, 조 수, 발제자 수). start~end는 날짜 범위(포함)."""
+        summaries = []
+        for position, row in enumerate(self.rows):
+            meeting_date = str(row.get('date') or '')
+            if start and end and not (str(start) <= meeting_date[:10] <= str(end)):
+                continue
+            summaries.append((
+                row,
+                len(self.row_members[position]),
+                self.row_group_counts[position],
+                len(self.row_facilitators[position]),
+            ))
+        return summaries
@@ -0,0 +1,26 @@
+begin;
+
+create table public.seminar_group_plans (
+  session_id uuid primary key references public.seminar_sessions(id) on delete cascade,
+  term_id uuid not null references public.seminar_terms(id) on delete cascade,
+  expected_attendees jsonb not null default '[]'::jsonb,
+  facilitators jsonb not null default '[]'::jsonb,
+  groups jsonb not null default '[]'::jsonb,
+  score numeric,
+  error text,
+  created_by_member_id bigint references public.members(id) on delete set null,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now()
+);
+
+comment on table public.seminar_group_plans is
+  '학기 단위로 미리 만든 회차별 조 편성 초안. 세미나 직전에는 실제 참석자에 맞게 고쳐서 쓴다.';
+
+create index seminar_group_plans_term_idx
+  on public.seminar_group_plans (term_id);
+
+alter table public.seminar_group_plans enable row level security;
+revoke all on table public.seminar_group_plans from public, anon, authenticated;
+grant select, insert, update, delete on table public.seminar_group_plans to service_role;
+
+commit;
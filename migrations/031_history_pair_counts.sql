@@ -0,0 +1,73 @@
+begin;
+
+-- history.groups의 조 명단을 DB 안에서 풀어 쌍별 만남 횟수를 센다.
+-- 앱의 group_history.matrix_rows_from_history / HistoryIndex.pair_rows와 같은 규칙이다.
+--   * 조(배열)만 센다. 예전 기록의 이름만 나열된 항목은 만남이 아니다.
+--   * 이름은 앞뒤 공백을 떼고, 빈 이름과 같은 이름끼리의 쌍은 건너뛴다.
+--   * 취소되지 않은 seminar_no_shows(미연락 불참자)는 연결된 회차의 만남에서 뺀다.
+--   * pair_key는 두 이름을 코드 포인트 순으로 정렬해 '-'로 잇는다(collate "C").
+-- p_names가 주어지면 그 이름끼리의 쌍만 돌려준다(조 편성 참석자).
+create or replace function public.history_pair_counts(p_names text[] default null)
+returns table (pair_key text, count integer, last_met date, days date[])
+language sql
+stable
+security invoker
+set search_path = ''
+as $$
+  with excluded as (
+    select distinct ns.session_id, btrim(m.name) as name
+      from public.seminar_no_shows ns
+      join public.members m on m.id = ns.member_id
+     where ns.cancelled_at is null
+  ),
+  seats as (
+    select h.id as history_id,
+           nullif(left(btrim(h.date::text), 10), '')::date as meeting_date,
+           g.group_no,
+           s.seat_no,
+           btrim(s.name) as name
+      from public.history h
+     cross join lateral jsonb_array_elements(
+             case when jsonb_typeof(h.groups) = 'array' then h.groups else '[]'::jsonb end
+           ) with ordinality as g(members, group_no)
+     cross join lateral jsonb_array_elements_text(
+             case when jsonb_typeof(g.members) = 'array' then g.members else '[]'::jsonb end
+           ) with ordinality as s(name, seat_no)
+     where btrim(s.name) <> ''
+       and (p_names is null or btrim(s.name) = any (p_names))
+       and not exists (
+             select 1 from excluded e
+              where e.session_id = h.seminar_session_id
+                and e.name = btrim(s.name)
+           )
+  ),
+  pairs as (
+    select least(a.name collate "C", b.name collate "C")
+             || '-' || greatest(a.name collate "C", b.name collate "C") as pair_key,
+           a.meeting_date
+      from seats a
+      join seats b
+        on b.history_id = a.history_id
+       and b.group_no = a.group_no
+       and b.seat_no > a.seat_no
+       and b.name <> a.name
+  )
+  select p.pair_key,
+         count(*)::integer,
+         max(p.meeting_date),
+         coalesce(
+           array_agg(distinct p.meeting_date order by p.meeting_date desc)
+             filter (where p.meeting_date is not null),
+           '{}'
+         )
+    from pairs p
+   group by p.pair_key;
+$$;
+
+comment on function public.history_pair_counts(text[]) is
+  'history 조 명단에서 미연락 불참자를 뺀 쌍별 만남 횟수·마지막 만남일·만난 날짜(최근 순). p_names가 있으면 그 이름끼리의 쌍만.';
+
+revoke all privileges on function public.history_pair_counts(text[]) from public, anon, authenticated;
+grant execute on function public.history_pair_counts(text[]) to service_role;
+
+commit;
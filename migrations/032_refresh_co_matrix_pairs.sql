@@ -0,0 +1,58 @@
+begin;
+
+-- history 한 건이 바뀐 뒤 그 기록이 건드린 쌍만 이력에서 다시 세어 bookclub_co_matrix에 덮어쓴다.
+-- 앱이 현재 값을 읽어 +1/−1 한 뒤 upsert하면 동시에 저장한 두 요청 중 한쪽의 증감이 사라진다.
+-- 이 함수는
+--   * 표 단위 advisory lock으로 같은 표를 고치는 호출끼리 차례로 돌게 하고,
+--   * 잠금을 잡은 뒤의 문장이 새 스냅샷으로 먼저 커밋된 history를 모두 보게 하며,
+--   * 더하기가 아니라 history_pair_counts(031) 결과로 덮어쓴다.
+-- 그래서 호출 순서와 관계없이 마지막 호출이 끝나면 p_pair_keys 쌍은 history와 같아진다.
+-- p_names는 바뀐 기록의 조 명단에 있는 이름(옛 명단과 새 명단 모두), p_pair_keys는 그 쌍 키다.
+-- 이력에서 사라진 쌍은 지운다. {pair_count, removed_count}를 돌려준다.
+create or replace function public.refresh_co_matrix_pairs(p_names text[], p_pair_keys text[])
+returns jsonb
+language plpgsql
+volatile
+security invoker
+set search_path = ''
+as $$
+declare
+  v_pair_count integer;
+  v_removed_count integer;
+begin
+  perform pg_advisory_xact_lock(hashtext('public.bookclub_co_matrix'));
+
+  with counted as (
+    select c.pair_key, c.count, c.last_met
+      from public.history_pair_counts(p_names) c
+     where c.pair_key = any (p_pair_keys)
+  ),
+  upserted as (
+    insert into public.bookclub_co_matrix (pair_key, count, last_met)
+    select c.pair_key, c.count, c.last_met
+      from counted c
+    on conflict (pair_key) do update
+      set count = excluded.count,
+          last_met = excluded.last_met
+    returning 1
+  ),
+  removed as (
+    delete from public.bookclub_co_matrix m
+     where m.pair_key = any (p_pair_keys)
+       and not exists (select 1 from counted c where c.pair_key = m.pair_key)
+    returning 1
+  )
+  select (select count(*) from upserted), (select count(*) from removed)
+    into v_pair_count, v_removed_count;
+
+  return jsonb_build_object('pair_count', v_pair_count, 'removed_count', v_removed_count);
+end;
+$$;
+
+comment on function public.refresh_co_matrix_pairs(text[], text[]) is
+  'p_pair_keys 쌍의 만남 횟수·마지막 만남일을 history에서 다시 세어 덮어쓴다. 동시 호출은 advisory lock으로 차례로 돈다.';
+
+revoke all privileges on function public.refresh_co_matrix_pairs(text[], text[]) from public, anon, authenticated;
+grant execute on function public.refresh_co_matrix_pairs(text[], text[]) to service_role;
+
+commit;
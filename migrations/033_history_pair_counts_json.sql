@@ -0,0 +1,37 @@
+begin;
+
+-- history_pair_counts(031)는 행 집합을 돌려주므로 PostgREST RPC로 부르면 max-rows(Supabase
+-- 기본 1000행)에서 말없이 잘린다. 참석자가 40명이면 쌍이 780개라 금방 넘는다.
+-- 앱은 이 함수로 결과 전체를 jsonb 값 하나로 받는다. 값 하나는 max-rows에 걸리지 않는다.
+--   {"rows": [{pair_key, count, last_met, days}, ...], "row_count": n}
+-- row_count는 rows 길이와 같아야 한다. 앱은 모양이 다르거나 수가 맞지 않으면 잘린 응답으로 보고
+-- 이력 인덱스로 계산한다. DB 안에서 쓰는 refresh_co_matrix_pairs(032)는 행 집합 함수를 그대로 쓴다.
+create or replace function public.history_pair_counts_json(p_names text[] default null)
+returns jsonb
+language sql
+stable
+security invoker
+set search_path = ''
+as $$
+  select jsonb_build_object(
+           'rows', coalesce(
+             jsonb_agg(jsonb_build_object(
+               'pair_key', c.pair_key,
+               'count', c.count,
+               'last_met', c.last_met,
+               'days', to_jsonb(c.days)
+             )),
+             '[]'::jsonb
+           ),
+           'row_count', count(*)
+         )
+    from public.history_pair_counts(p_names) c;
+$$;
+
+comment on function public.history_pair_counts_json(text[]) is
+  'history_pair_counts 결과 전체를 {rows, row_count} jsonb 하나로. PostgREST max-rows에 잘리지 않게 RPC로 부를 때 쓴다.';
+
+revoke all privileges on function public.history_pair_counts_json(text[]) from public, anon, authenticated;
+grant execute on function public.history_pair_counts_json(text[]) to service_role;
+
+commit;
@@ -0,0 +1,187 @@
+"""요청 하나 안에서 같은 Supabase(PostgREST) 조회를 한 번만 보내는 얇은 층.
+
+한 화면을 그리는 동안 같은 표를 같은 조건으로 여러 번 읽는 일이 많다(활성 회원 목록,
+로그인한 회원의 역할 확인 등). CoalescingClient는 Supabase 클라이언트를 감싸
+`table(...)` 호출 사슬을 기록해 두었다가 execute() 때 실제로 보낸다.
+
+- 읽기(select)는 (표, 열, 필터·정렬 등 호출 사슬)을 키로 요청 동안 결과를 기억한다.
+  같은 키가 다시 오면 DB에 가지 않고 복사본을 돌려준다.
+- `in_` 하나로 찾는 조회(정렬·limit 없음)는 같은 표·열·나머지 필터끼리 묶는다.
+  이미 읽은 값은 기억한 행으로 채우고, 처음 보는 값만 모아 한 번에 읽는다.
+- 쓰기(insert/update/upsert/delete)는 그대로 보내고 그 표의 기억을 지운다.
+  rpc는 어떤 표를 바꿀지 모르므로 요청의 기억을 모두 지운다.
+- scope 함수가 None을 돌려주면(요청 밖, 예: 작업 스레드) 아무것도 기억하지 않는다.
+
+QueryScope.stats()는 요청별로 실제로 보낸 조회 수와 기억으로 답한 수를 센다.
+"""
+
+import copy
+import json
+
+# execute() 전에 붙는 호출 중 결과 행 집합을 바꾸지 않는 필터. in_ 묶음은 이것들만 허용한다.
+_LOOKUP_FILTERS = {'eq', 'neq', 'is_', 'gt', 'gte', 'lt', 'lte'}
+_WRITES = {'insert', 'update', 'upsert', 'delete'}
+
+
+class QueryResult:
+    """기억에서 꺼낸 결과. postgrest 응답처럼 data/count를 가진다."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class QueryScope:
+    """요청 하나 동안의 조회 기억과 통계."""
+
+    def __init__(self):
+        self.results = {}
+        self.lookups = {}
+        self.issued = 0
+        self.hits = 0
+        self.merged = 0
+
+    def forget(self, table=None):
+        """table의 기억을 지운다. table이 None이면 모두 지운다."""
+        if table is None:
+            self.results.clear()
+            self.lookups.clear()
+            return
+        self.results = {key: value for key, value in self.results.items() if key[0] != table}
+        self.lookups = {key: value for key, value in self.lookups.items() if key[0] != table}
+
+    def stats(self):
+        """{'issued': 보낸 조회 수, 'hits': 기억으로 답한 조회 수, 'merged': in_ 묶음으로 아낀 값 수}."""
+        return {'issued': self.issued, 'hits': self.hits, 'merged': self.merged}
+
+
+def _freeze(value):
+    return json.dumps(value, default=str, ensure_ascii=False, sort_keys=True)
+
+
+def _selected_columns(steps):
+    args = steps[0][1] or ('*',)
+    return {column.strip() for arg in args for column in str(arg).split(',')}
+
+
+class _Step:
+    """`query.not_`처럼 호출하지 않고 쓰는 속성과 `query.eq(...)` 호출을 모두 기록한다."""
+
+    def __init__(self, query, name):
+        self._query = query
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        return self._query._record(self._name, args, kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._query._record(self._name, None, None), name)
+
+
+class CoalescingQuery:
+    """`table(name)` 이후의 호출 사슬. postgrest 빌더처럼 자신을 돌려주며 쌓는다."""
+
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._steps = []
+
+    def _record(self, name, args, kwargs):
+        self._steps.append((name, args, kwargs))
+        return self
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _Step(self, name)
+
+    def _send(self, steps=None):
+        builder = self._client.client.table(self._table)
+        for name, args, kwargs in steps or self._steps:
+            attribute = getattr(builder, name)
+            builder = attribute if args is None else attribute(*args, **kwargs)
+        return builder.execute()
+
+    def execute(self):
+        scope = self._client.scope()
+        first = self._steps[0][0] if self._steps else None
+        if first in _WRITES:
+            if scope is not None:
+                scope.forget(self._table)
+            return self._send()
+        if scope is None or first != 'select':
+            return self._send()
+        lookup = self._lookup_key()
+        if lookup is not None:
+            return self._execute_lookup(scope, *lookup)
+
+        key = (self._table, _freeze(self._steps))
+        if key in scope.results:
+            scope.hits += 1
+            data, count = scope.results[key]
+            return QueryResult(copy.deepcopy(data), count)
+        scope.issued += 1
+        response = self._send()
+        scope.results[key] = (copy.deepcopy(response.data), getattr(response, 'count', None))
+        return response
+
+    def _lookup_key(self):
+        """in_ 하나로 찾는 조회면 (묶음 키, in_ 열, 찾는 값 목록, in_ 위치)."""
+        name, args, kwargs = self._steps[0]
+        if kwargs:
+            return None
+        found = None
+        for position, (step, step_args, _) in enumerate(self._steps[1:], start=1):
+            if step == 'in_' and found is None and step_args and len(step_args) == 2:
+                found = position
+            elif step not in _LOOKUP_FILTERS or step_args is None:
+                return None
+        if found is None:
+            return None
+        column, values = self._steps[found][1]
+        if '*' not in _selected_columns(self._steps) and column not in _selected_columns(self._steps):
+            return None
+        others = self._steps[:found] + self._steps[found + 1:]
+        return (self._table, _freeze(others), column), column, list(values), found
+
+    def _execute_lookup(self, scope, key, column, values, position):
+        rows_by_value = scope.lookups.setdefault(key, {})
+        wanted = list(dict.fromkeys(str(value) for value in values))
+        missing = [value for value in dict.fromkeys(values) if str(value) not in rows_by_value]
+        if missing:
+            steps = list(self._steps)
+            steps[position] = ('in_', (column, missing), {})
+            scope.issued += 1
+            rows = self._send(steps).data or []
+            for value in missing:
+                rows_by_value.setdefault(str(value), [])
+            for row in rows:
+                rows_by_value.setdefault(str(row.get(column)), []).append(copy.deepcopy(row))
+            scope.merged += len(wanted) - len({str(value) for value in missing})
+        else:
+            scope.hits += 1
+            scope.merged += len(wanted)
+        return QueryResult(copy.deepcopy([row for value in wanted for row in rows_by_value[value]]))
+
+
+class CoalescingClient:
+    """Supabase 클라이언트를 감싼다. table()만 가로채고 나머지(storage 등)는 그대로 넘긴다.
+
+    scope는 현재 요청의 QueryScope(요청 밖이면 None)를 돌려주는 함수다.
+    """
+
+    def __init__(self, client, scope):
+        self.client = client
+        self.scope = scope
+
+    def table(self, name):
+        return CoalescingQuery(self, name)
+
+    def rpc(self, *args, **kwargs):
+        scope = self.scope()
+        if scope is not None:
+            scope.forget()
+        return self.client.rpc(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,69 @@
+"""Supabase(PostgREST) 전체 읽기를 키셋 페이지로 나눠 읽는 도우미.
+
+`table(...).select(...).execute()` 한 번으로 표 전체를 읽으면 PostgREST의 max-rows
+설정(Supabase 기본 1000행)에서 말없이 잘리고, 응답 JSON 전체를 한꺼번에 메모리에 올린다.
+iter_rows는 기본 키 순서로 `key > 마지막 값` 조건을 붙여 page_size씩 읽으며 행을 하나씩 내준다.
+OFFSET 없이 인덱스만 타므로 뒤 페이지도 앞 페이지만큼 빠르고, 읽는 도중 행이 추가·삭제되어도
+이미 지나간 행이 다시 나오거나 건너뛰어지지 않는다.
+
+page_size는 서버 max-rows보다 작아야 한다. 한 페이지가 page_size보다 적게 오면 끝으로 본다.
+
+RPC가 행 집합을 돌려주면 같은 이유로 잘린다. rpc_rows는 결과 전체를 {rows, row_count} jsonb 값
+하나로 돌려주는 함수를 부르고, 모양이나 수가 맞지 않으면 잘린 응답으로 보고 예외를 낸다.
+"""
+
+import os
+
+# 한 번에 읽는 행 수. Supabase 기본 max-rows(1000)보다 작게 둔다.
+PAGE_SIZE = max(1, int(os.environ.get('SUPABASE_PAGE_SIZE', '500')))
+
+
+def _with_key_column(columns, key):
+    """select 열 목록에 키 열이 없으면 붙인다(다음 페이지 조건에 필요하다)."""
+    if columns.strip() == '*':
+        return columns
+    names = [column.strip() for column in columns.split(',')]
+    return columns if key in names else f'{columns}, {key}'
+
+
+def iter_rows(client, table, columns='*', key='id', page_size=None, where=None):
+    """table을 key 순서로 page_size씩 읽어 행을 하나씩 내준다.
+
+    key는 유일하고 인덱스가 있는 열(기본 키 등)이어야 한다.
+    where는 필터를 붙이는 함수다. 예: `lambda q: q.gte('date', start)`.
+    키 열은 다음 페이지를 찾는 데 쓰므로 columns에 없으면 함께 읽는다.
+    """
+    page_size = page_size or PAGE_SIZE
+    columns = _with_key_column(columns, key)
+    last = None
+    while True:
+        query = client.table(table).select(columns)
+        if where is not None:
+            query = where(query)
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.order(key).limit(page_size).execute().data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][key]
+
+
+def read_all(client, table, columns='*', key='id', page_size=None, where=None):
+    """iter_rows 결과를 목록으로. 행 목록 전체가 필요한 호출부(여러 번 훑는 화면 등)용."""
+    return list(iter_rows(client, table, columns, key=key, page_size=page_size, where=where))
+
+
+def rpc_rows(client, function, params=None):
+    """{'rows': [...], 'row_count': n} jsonb 하나를 돌려주는 RPC를 불러 rows를 돌려준다.
+
+    행 집합 그대로(목록) 오거나 row_count가 rows 길이와 다르면 max-rows 등에서 잘린 것으로
+    보고 ValueError를 낸다. 호출부는 이때 다른 방법으로 계산해야 한다.
+    """
+    data = client.rpc(function, params or {}).execute().data
+    if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+        raise ValueError(f'{function}: {{rows, row_count}} 형식이 아닌 응답')
+    rows = data['rows']
+    if data.get('row_count') != len(rows):
+        raise ValueError(f'{function}: {data.get("row_count")}행 중 {len(rows)}행만 받음')
+    return rows
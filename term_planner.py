@@ -0,0 +1,108 @@
+"""학기 단위 조 편성 초안 계획.
+
+한 학기(seminar_terms)의 남은 회차를 날짜순으로 돌며 조 편성 초안을 미리 만든다.
+회차마다 예상 참석자(투표·불참 입력)로 조를 짜고, 그 조에서 만나게 될 쌍을
+다음 회차의 만남 기록에 더해 두므로 학기 전체에서 같은 사람을 다시 만나는 일이
+줄어든다(social golfer 문제를 회차 단위로 푸는 rolling horizon 근사).
+
+세미나 직전에는 저장된 초안을 실제 참석 명단에 맞게 고치기만 하면 된다.
+DB에 의존하지 않는 순수 함수만 둔다.
+"""
+
+import logging
+import time
+
+from group_history import pair_keys_from_groups
+from grouping_feasibility import find_infeasibility
+from grouping_local_search import local_search_groupings
+from grouping_problem import build_grouping_problem
+
+
+logger = logging.getLogger(__name__)
+
+# 회차 하나의 초안을 찾는 데 쓰는 시간. 한 학기 20여 회차면 수십 초 안에 끝난다.
+SESSION_TIME_BUDGET = 1.5
+# 회차마다 비교해 보는 후보 수. 가장 좋은 하나만 초안으로 남긴다.
+SESSION_CANDIDATES = 5
+
+
+def expected_session_attendees(seminar_session, active_member_ids, attending_vote_ids=(),
+                               absent_ids=()):
+    """회차의 참여 방식에 따라 예상 참석 회원 ID 집합을 구한다.
+
+    absence_only는 활성 회원에서 불참 입력을 뺀 인원, opt_in과 legacy_explicit는
+    참석으로 투표한 인원이다. 아직 열리지 않은 회차라 출석부(attendance)는 보지 않는다.
+    """
+    mode = seminar_session.get('participation_mode') or 'legacy_explicit'
+    if mode == 'absence_only':
+        return set(active_member_ids) - set(absent_ids)
+    return set(attending_vote_ids) & set(active_member_ids)
+
+
+def plan_term_groupings(sessions, gender_by_name, co_matrix, restricted_pairs=None, seed=0,
+                        time_budget=SESSION_TIME_BUDGET, session_callback=None,
+                        stop_event=None):
+    """회차별 조 편성 초안 목록을 날짜순으로 만든다.
+
+    sessions는 {'id', 'meeting_date', 'attendees', 'facilitators'} 사전 목록이다.
+    앞 회차 초안에서 같은 조가 된 쌍은 뒤 회차에서 이미 한 번 더 만난 것으로 센다.
+    편성할 수 없는 회차(인원 부족, 제약 모순)는 'error'에 이유를 담고 건너뛴다.
+    session_callback은 회차 초안이 하나 나올 때마다 (초안, 완료 회차 수)를 받는다.
+    """
+    working_matrix = dict(co_matrix)
+    ordered = sorted(sessions, key=lambda item: str(item['meeting_date']))
+    plans = []
+    started = time.monotonic()
+    for session_index, seminar_session in enumerate(ordered):
+        if stop_event is not None and stop_event.is_set():
+            break
+        attendees = sorted(seminar_session['attendees'])
+        attendee_set = set(attendees)
+        facilitators = [name for name in seminar_session.get('facilitators') or [] if name in attendee_set]
+        plan = {
+            'session_id': seminar_session['id'],
+            'meeting_date': seminar_session['meeting_date'],
+            'expected_attendees': attendees,
+            'facilitators': facilitators,
+            'groups': [],
+            'score': None,
+        }
+        problem = build_grouping_problem(
+            attendees, facilitators, gender_by_name, working_matrix,
+            restricted_pairs=restricted_pairs,
+        )
+        infeasibility = find_infeasibility(problem) if problem is not None else []
+        if problem is None:
+            plan['error'] = '예상 참석자가 3명 미만입니다.'
+        elif infeasibility:
+            plan['error'] = ' '.join(item['message'] for item in infeasibility)
+        else:
+            results = local_search_groupings(
+                problem, top_n=SESSION_CANDIDATES, seed=seed + session_index,
+                time_budget=time_budget, stop_event=stop_event,
+            )
+            if results:
+                best = results[0]
+                plan['groups'] = best['groups']
+                plan['score'] = best['score']
+                for key in pair_keys_from_groups(best['groups']):
+                    working_matrix[key] = working_matrix.get(key, 0) + 1
+            else:
+                plan['error'] = '제한 시간 안에 초안을 찾지 못했습니다.'
+        plans.append(plan)
+        if session_callback:
+            session_callback(plan, len(plans))
+
+    logger.info("[term-plan] 회차 %d개 초안, %.2fs", len(plans), time.monotonic() - started)
+    return plans
+
+
+def planned_repeat_count(plans, co_matrix):
+    """초안 전체에서 이미 만난 쌍(이력 또는 앞 회차 초안)이 다시 같은 조가 되는 횟수."""
+    seen = {key for key, count in co_matrix.items() if count > 0}
+    repeats = 0
+    for plan in sorted(plans, key=lambda item: str(item['meeting_date'])):
+        keys = pair_keys_from_groups(plan['groups'])
+        repeats += len(keys & seen)
+        seen |= keys
+    return repeats
@@ -0,0 +1,292 @@
+"""조 편성 엔진 벤치마크 (DB·네트워크 없이 합성 데이터로 실행).
+
+    python testing/benchmark_grouping.py --sizes 20 40 80 150 200 --output bench.json
+    python testing/benchmark_grouping.py --engine local_search --top-n 5
+    python testing/benchmark_grouping.py --encodings --sizes 24 40 60 --time-limit 1.0
+
+기본 모드는 규모별 합성 동아리(성별 미상 포함, 여러 해의 조 편성 이력, 발제자,
+편성 제한 쌍)로 실제 추천 흐름(enumerate_groupings_parallel)을 돌려 첫 추천안까지의
+시간, top_n개를 모두 찾을 때까지의 시간, 모델 변수/제약 수, 추천안 점수, 최대 RSS를
+기록한다. 규모마다 새 프로세스에서 돌리므로 최대 RSS가 앞선 규모의 영향을 받지 않는다.
+--output을 주면 커밋 해시와 함께 JSON으로 저장해 커밋 사이의 회귀를 비교할 수 있다.
+
+--encodings는 CP-SAT 쌍 인코딩별 모델 크기, presolve 이후 크기, 첫 실현가능해까지의
+시간, 제한 시간 안의 최선 목적값을 비교한다.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+
+# --- 상위 폴더(app.py가 있는 곳)를 import 경로에 추가 ---
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from ortools.sat.python import cp_model
+
+from group_history import matrix_rows_from_history
+from grouping_local_search import local_search_groupings
+from grouping_problem import build_grouping_problem
+from grouping_set_partition import set_partition_groupings
+from grouping_solver import (
+    PAIR_ENCODINGS,
+    SOLVER_WORKERS,
+    GroupingModel,
+    enumerate_groupings_parallel,
+)
+
+DEFAULT_SIZES = [20, 40, 80, 150, 200]
+ENGINES = ('cp_sat', 'local_search', 'set_partition')
+
+
+def synthetic_club(member_count, sessions=60, seed=1, years=1, presenter_count=0,
+                   restriction_count=0):
+    """회원 이름, 성별, 과거 조 편성 이력을 무작위로 만든다.
+
+    years만큼 모임 이력을 만들고(sessions는 해마다의 모임 수, 한 해에 고르게 퍼진다),
+    매 모임에는 회원의 60~80%가 참석한다. 성별은 남/여/미상이 섞인다. presenter_count, restriction_count를
+    주면 발제자 이름 목록과 편성 제한 쌍도 함께 만든다.
+    """
+    rnd = random.Random(seed)
+    names = [f'회원{index:03d}' for index in range(member_count)]
+    genders = {name: rnd.choice(['M', 'W', 'W', None]) for name in names}
+    history_rows = []
+    start = datetime.date(2026 - years, 1, 3)
+    for session_index in range(sessions * years):
+        present = rnd.sample(names, max(4, int(member_count * rnd.uniform(0.6, 0.8))))
+        group_count = max(1, len(present) // 5)
+        history_rows.append({
+            'date': (start + datetime.timedelta(days=365 * session_index // sessions)).isoformat(),
+            'groups': [present[offset::group_count] for offset in range(group_count)],
+        })
+    co_matrix = {
+        key: row['count'] for key, row in matrix_rows_from_history(history_rows).items()
+    }
+    presenters = rnd.sample(names, min(presenter_count, member_count))
+    restricted = set()
+    while len(restricted) < min(restriction_count, member_count // 2):
+        restricted.add(tuple(sorted(rnd.sample(names, 2))))
+    return {
+        'names': names,
+        'genders': genders,
+        'history_rows': history_rows,
+        'co_matrix': co_matrix,
+        'presenters': presenters,
+        'restricted_pairs': restricted,
+    }
+
+
+def peak_rss_mb():
+    """이 프로세스(와 끝난 자식 프로세스)의 최대 RSS. 리눅스 ru_maxrss 단위는 KB다."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(max(own, children) / scale, 1)
+
+
+def run_case(size, engine='cp_sat', top_n=10, seed=1, years=3):
+    """한 규모의 합성 동아리로 추천 흐름을 한 번 돌리고 측정값 사전을 반환한다."""
+    club = synthetic_club(size, sessions=24, seed=seed, years=years,
+                          presenter_count=max(1, size // 5), restriction_count=max(1, size // 20))
+    problem = build_grouping_problem(
+        club['names'], club['presenters'], club['genders'], club['co_matrix'],
+        restricted_pairs=club['restricted_pairs'],
+    )
+    case = {
+        'n': size,
+        'engine': engine,
+        'top_n': top_n,
+        'groups': problem.num_groups,
+        'group_size': [problem.min_size, problem.max_size],
+        'presenters': len(problem.presenter_indices),
+        'restricted_pairs': len(problem.restricted_index_pairs),
+        'history_rows': len(club['history_rows']),
+        'met_pairs': len(problem.pair_counts),
+    }
+
+    if engine == 'cp_sat':
+        started = time.perf_counter()
+        proto = GroupingModel(problem).model.Proto()
+        case['model_build_s'] = round(time.perf_counter() - started, 3)
+        case['variables'] = len(proto.variables)
+        case['constraints'] = len(proto.constraints)
+        search = enumerate_groupings_parallel
+    else:
+        case['variables'] = case['constraints'] = None
+        search = set_partition_groupings if engine == 'set_partition' else local_search_groupings
+
+    first_found = []
+    started = time.perf_counter()
+
+    def on_solution(result):
+        if not first_found:
+            first_found.append(time.perf_counter() - started)
+
+    results = search(problem, top_n=top_n, solution_callback=on_solution)
+    elapsed = time.perf_counter() - started
+    scores = [float(result['score']) for result in results]
+    case.update({
+        'time_to_first_s': round(first_found[0], 3) if first_found else None,
+        'time_to_top_n_s': round(elapsed, 3),
+        'solutions': len(results),
+        'best_score': max(scores) if scores else None,
+        'scores': scores,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+    return case
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, engine, top_n, seed, years):
+    """규모마다 자식 프로세스에서 run_case를 돌려 결과 목록을 모은다."""
+    cases = []
+    for size in sizes:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--case', str(size),
+             '--engine', engine, '--top-n', str(top_n), '--seed', str(seed),
+             '--years', str(years)],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr)
+            cases.append({'n': size, 'engine': engine, 'error': completed.stderr.strip()[-500:]})
+            continue
+        cases.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        case = cases[-1]
+        first = case['time_to_first_s']
+        print(' | '.join(str(value) for value in (
+            size, case['groups'], case['variables'], case['constraints'],
+            f'{first:.2f}' if first is not None else '-', f"{case['time_to_top_n_s']:.2f}",
+            case['solutions'], case['best_score'], case['peak_rss_mb'],
+        )), flush=True)
+    return {
+        'commit': _git_commit(),
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'engine': engine,
+        'top_n': top_n,
+        'seed': seed,
+        'cases': cases,
+    }
+
+
+class _FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first_wall_time = None
+
+    def on_solution_callback(self):
+        if self.first_wall_time is None:
+            self.first_wall_time = self.WallTime()
+
+
+def _presolved_size(log_lines):
+    text = '\n'.join(log_lines)
+    match = re.search(r'Presolved optimization model.*?#Variables: ([\d\']+)', text, re.S)
+    variables = int(match.group(1).replace("'", '')) if match else None
+    summary = text[match.end():] if match else ''
+    constraints = sum(
+        int(count.replace("'", ''))
+        for count in re.findall(r'^#k\w+: ([\d\']+)', summary, re.M)
+    )
+    return variables, constraints or None
+
+
+def measure(problem, pair_encoding, time_limit, seed=7):
+    grouping_model = GroupingModel(problem, pair_encoding=pair_encoding)
+    proto = grouping_model.model.Proto()
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = SOLVER_WORKERS
+    solver.parameters.random_seed = seed
+    solver.parameters.log_search_progress = True
+    solver.parameters.log_to_stdout = False
+    log_lines = []
+    solver.log_callback = log_lines.append
+    timer = _FirstSolutionTimer()
+    status = solver.Solve(grouping_model.model, timer)
+    presolved_variables, presolved_constraints = _presolved_size(log_lines)
+    return {
+        'encoding': pair_encoding,
+        'variables': len(proto.variables),
+        'constraints': len(proto.constraints),
+        'presolved_variables': presolved_variables,
+        'presolved_constraints': presolved_constraints,
+        'first_feasible_s': timer.first_wall_time,
+        'objective': solver.ObjectiveValue() if timer.first_wall_time is not None else None,
+        'status': solver.StatusName(status),
+    }
+
+
+def compare_encodings(sizes, time_limit, presenters):
+    club = synthetic_club(max(sizes))
+    header = ('n', 'encoding', 'vars', 'cons', 'presolved vars', 'presolved cons',
+              'first feasible(s)', 'objective')
+    print(' | '.join(header))
+    for size, pair_encoding in itertools.product(sizes, PAIR_ENCODINGS):
+        attendees = club['names'][:size]
+        problem = build_grouping_problem(
+            attendees, attendees[:presenters], club['genders'], club['co_matrix'],
+        )
+        row = measure(problem, pair_encoding, time_limit)
+        first = row['first_feasible_s']
+        print(' | '.join(str(value) for value in (
+            size, row['encoding'], row['variables'], row['constraints'],
+            row['presolved_variables'], row['presolved_constraints'],
+            f'{first:.2f}' if first is not None else '-', row['objective'],
+        )))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--engine', choices=ENGINES, default='cp_sat')
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--years', type=int, default=3, help='합성 이력 기간(년)')
+    parser.add_argument('--output', help='결과 JSON 파일 경로')
+    parser.add_argument('--encodings', action='store_true', help='쌍 인코딩 비교 모드')
+    parser.add_argument('--time-limit', type=float, default=1.0, help='--encodings 전용')
+    parser.add_argument('--presenters', type=int, default=5, help='--encodings 전용')
+    parser.add_argument('--case', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case is not None:
+        # run_suite가 띄운 자식 프로세스: 측정값 한 줄만 출력한다.
+        print(json.dumps(run_case(args.case, args.engine, args.top_n, args.seed, args.years),
+                         ensure_ascii=False))
+        return
+    if args.encodings:
+        compare_encodings(args.sizes, args.time_limit, args.presenters)
+        return
+
+    print(' | '.join(('n', 'groups', 'vars', 'cons', 'first(s)', 'top_n(s)', 'found',
+                      'best score', 'peak RSS(MB)')))
+    report = run_suite(args.sizes, args.engine, args.top_n, args.seed, args.years)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        print(f'저장: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
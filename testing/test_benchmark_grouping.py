@@ -0,0 +1,30 @@
+import unittest
+
+from testing.benchmark_grouping import run_case, synthetic_club
+
+
+class SyntheticClubTests(unittest.TestCase):
+    def test_club_is_reproducible_and_spans_years(self):
+        first = synthetic_club(40, sessions=10, seed=3, years=2, presenter_count=4,
+                               restriction_count=3)
+        second = synthetic_club(40, sessions=10, seed=3, years=2, presenter_count=4,
+                                restriction_count=3)
+        self.assertEqual(first['co_matrix'], second['co_matrix'])
+        self.assertEqual(len(first['history_rows']), 20)
+        self.assertEqual(len(first['presenters']), 4)
+        self.assertEqual(len(first['restricted_pairs']), 3)
+        self.assertIn(None, first['genders'].values())
+        years = {row['date'][:4] for row in first['history_rows']}
+        self.assertGreaterEqual(len(years), 2)
+
+    def test_case_reports_timings_scores_and_memory(self):
+        case = run_case(20, engine='local_search', top_n=2, years=1)
+        self.assertEqual(case['solutions'], 2)
+        self.assertIsNotNone(case['time_to_first_s'])
+        self.assertLessEqual(case['time_to_first_s'], case['time_to_top_n_s'])
+        self.assertEqual(len(case['scores']), 2)
+        self.assertGreater(case['peak_rss_mb'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
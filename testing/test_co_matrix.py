@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from co_matrix import CoMatrix
+from group_history import canonical_pair_key, day_ordinal, matrix_rows_from_history
+from grouping_problem import build_grouping_problem
+
+
+MEMBERS = [
+    {'id': 'id-ga', 'name': '가'},
+    {'id': 'id-na', 'name': '나'},
+    {'id': 'id-da', 'name': '다'},
+    {'id': 'id-ra', 'name': '라'},
+]
+HISTORY = [
+    {'date': '2026-01-01', 'groups': [['가', '나', '다'], ['라', '탈퇴']]},
+    {'date': '2026-03-01', 'groups': [['나', '가', '라']], 'excluded_names': ['라']},
+    {'date': '2026-02-01', 'groups': [['다', '라', '가']]},
+]
+
+
+class CoMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self.matrix = CoMatrix(MEMBERS, HISTORY)
+
+    def test_pair_counts_match_name_keyed_history(self):
+        names = ['가', '나', '다', '라', '탈퇴']
+        expected = matrix_rows_from_history(HISTORY)
+        pair_counts = self.matrix.pair_counts_for(names)
+        self.assertEqual(
+            {canonical_pair_key(names[i], names[j]): count for (i, j), count in pair_counts.items()},
+            {key: row['count'] for key, row in expected.items()},
+        )
+        self.assertEqual(self.matrix.counts.dtype, np.uint16)
+
+    def test_submatrix_follows_attendee_order(self):
+        counts, last_met = self.matrix.submatrix(['다', '가', '신입', '다'])
+        self.assertEqual(counts.tolist(), [[0, 2, 0, 0], [2, 0, 0, 2], [0, 0, 0, 0], [0, 2, 0, 0]])
+        self.assertEqual(last_met[0, 1], day_ordinal('2026-02-01'))
+        self.assertEqual(last_met[0, 3], 0)
+
+    def test_grouping_problem_accepts_matrix_or_dict(self):
+        names = ['라', '가', '나', '다', '신입']
+        genders = dict.fromkeys(names, 'M')
+        from_matrix = build_grouping_problem(names, [], genders, self.matrix)
+        pair_dict = {key: row['count'] for key, row in matrix_rows_from_history(HISTORY).items()}
+        from_dict = build_grouping_problem(names, [], genders, pair_dict)
+        self.assertEqual(from_matrix.pair_counts, from_dict.pair_counts)
+
+    def test_negative_updates_never_wrap(self):
+        self.matrix.add_group(['가', '나'], times=-5)
+        counts, _ = self.matrix.submatrix(['가', '나'])
+        self.assertEqual(counts.tolist(), [[0, 0], [0, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
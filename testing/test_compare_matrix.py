@@ -0,0 +1,139 @@
+import contextlib
+import io
+import unittest
+
+import compare_matrix
+from group_history import matrix_rows_from_history
+
+
+class _Query:
+    """compare_matrix가 쓰는 만큼만 흉내 내는 Supabase 표 대역."""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.filters = []
+        self.key = None
+        self.size = None
+        self.action = None
+        self.payload = None
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def in_(self, column, values):
+        self.client.in_sizes.append((self.name, len(values)))
+        self.filters.append(lambda row: row[column] in values)
+        return self
+
+    def order(self, column):
+        self.key = column
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self.action, self.payload = 'upsert', rows
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def execute(self):
+        table = self.client.tables[self.name]
+        matched = [row for row in table if all(check(row) for check in self.filters)]
+        if self.action:
+            self.client.calls.append((self.action, len(self.payload or matched)))
+        if self.action == 'upsert':
+            keys = {row['pair_key'] for row in self.payload}
+            table[:] = [row for row in table if row['pair_key'] not in keys] + [dict(row) for row in self.payload]
+            matched = []
+        elif self.action == 'delete':
+            table[:] = [row for row in table if row not in matched]
+        else:
+            matched.sort(key=lambda row: row[self.key])
+            matched = matched[:self.size]
+        return type('Result', (), {'data': matched})()
+
+
+class _Client:
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = []
+        self.in_sizes = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+HISTORY = [
+    {'id': 1, 'date': '2026-01-01', 'groups': [['가', '나', '다']], 'seminar_session_id': 's1'},
+    {'id': 2, 'date': '2026-02-01', 'groups': [['가', '나'], ['다', '라']], 'seminar_session_id': 's2'},
+]
+
+
+class CompareMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self.client = _Client({
+            'history': [dict(row) for row in HISTORY],
+            'seminar_no_shows': [
+                {'id': 'n1', 'session_id': 's2', 'member_id': 3, 'cancelled_at': None},
+                {'id': 'n2', 'session_id': 's1', 'member_id': 1, 'cancelled_at': '2026-01-02'},
+            ],
+            'members': [{'id': 1, 'name': '가'}, {'id': 3, 'name': '다'}],
+            'bookclub_co_matrix': [
+                {'pair_key': '가-나', 'count': 2, 'last_met': '2026-02-01'},
+                {'pair_key': '다-라', 'count': 1, 'last_met': '2026-02-01'},
+                {'pair_key': '가-다', 'count': 5, 'last_met': '2026-01-01'},
+            ],
+        })
+
+    def _run(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return compare_matrix.run(self.client, chunk_size=1, workers=2, page_size=1, **kwargs)
+
+    def test_dry_run_reports_changes_without_writing(self):
+        self.assertEqual(self._run(dry_run=True), {'upsert_count': 2, 'delete_count': 1})
+        self.assertEqual(self.client.calls, [])
+
+    def test_applies_only_the_diff_and_deletes_last(self):
+        self._run()
+        self.assertEqual([action for action, _ in self.client.calls], ['upsert', 'upsert', 'delete'])
+        expected = matrix_rows_from_history([
+            HISTORY[0], {**HISTORY[1], 'excluded_names': ['다']},
+        ])
+        stored = {row['pair_key']: row for row in self.client.tables['bookclub_co_matrix']}
+        self.assertEqual(stored, expected)
+        self.client.calls.clear()
+        self.assertEqual(self._run(), {'upsert_count': 0, 'delete_count': 0})
+        self.assertEqual(self.client.calls, [])
+
+    def test_deletes_and_member_lookups_keep_in_filters_short(self):
+        stale = [{'pair_key': f'x{index}-y{index}', 'count': 1, 'last_met': '2026-01-01'} for index in range(120)]
+        self.client.tables['bookclub_co_matrix'].extend(stale)
+        self.client.tables['seminar_no_shows'].extend(
+            {'id': f'm{index}', 'session_id': 's9', 'member_id': 100 + index, 'cancelled_at': None}
+            for index in range(120))
+        with contextlib.redirect_stdout(io.StringIO()):
+            compare_matrix.run(self.client, chunk_size=500, workers=2)
+        self.assertTrue(self.client.in_sizes)
+        self.assertLessEqual(max(size for _, size in self.client.in_sizes), compare_matrix.IN_CHUNK_SIZE)
+        deletes = [count for action, count in self.client.calls if action == 'delete']
+        self.assertEqual(sum(deletes), 121)
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(len([name for name, _ in self.client.in_sizes if name == 'members']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
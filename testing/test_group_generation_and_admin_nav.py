@@ -17,6 +17,79 @@ class GroupGenerationStreamTests(unittest.TestCase):
             self.source,
         )
 
+    def test_solutions_stream_as_json_events_and_complete_carries_ranking(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        index = (ROOT / 'templates' / 'bookclub_index.html').read_text(encoding='utf-8')
+        self.assertIn("job.publish('context'", self.source)
+        self.assertIn("job.publish('solution'", self.source)
+        self.assertIn("job.publish('complete', {'ranking': ranking})", self.source)
+        self.assertNotIn("json.dumps({'html': final_html})", self.source)
+        self.assertIn("@app.route('/making_team/results')", self.source)
+        self.assertIn("eventSource.addEventListener('solution'", results)
+        self.assertIn('function renderSolutionCard(result, rank)', results)
+        self.assertIn('window.location.href = `/making_team/results?${params}`', index)
+        self.assertNotIn('document.write(data.html)', index)
+
+    def test_results_page_runs_grouping_as_resumable_job(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        self.assertIn("@app.route('/jobs', methods=['POST'])", self.source)
+        self.assertIn("@app.route('/jobs/<job_id>/events')", self.source)
+        self.assertIn("request.headers.get('Last-Event-ID')", self.source)
+        self.assertIn('stop_event=job.stop_event', self.source)
+        self.assertIn("fetch('/jobs', {", results)
+        self.assertIn('new EventSource(`/jobs/${id}/events`)', results)
+        self.assertIn("url.searchParams.set('job', data.job_id)", results)
+
+    def test_queued_jobs_report_their_place_in_line(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        self.assertIn("@app.route('/jobs/metrics')", self.source)
+        self.assertIn('jsonify(grouping_jobs.metrics())', self.source)
+        self.assertIn("eventSource.addEventListener('queued'", results)
+
+    def test_pareto_engine_streams_tagged_recommendations(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        index = (ROOT / 'templates' / 'bookclub_index.html').read_text(encoding='utf-8')
+        self.assertIn("'pareto': run_pareto_grouping", self.source)
+        self.assertIn("solution['tag'] = result['tag']", self.source)
+        self.assertIn('<option value="pareto">', index)
+        self.assertIn('SOLUTION_TAG_LABELS[result.tag]', results)
+
+    def test_term_plan_is_stored_per_session_and_repaired_before_solving(self):
+        admin = (ROOT / 'templates' / 'admin_seminars.html').read_text(encoding='utf-8')
+        migration = (ROOT / 'migrations' / '030_seminar_group_plans.sql').read_text(encoding='utf-8')
+        self.assertIn("@app.route('/api/admin/seminar_terms/<term_id>/group_plan', methods=['POST'])", self.source)
+        self.assertIn("supabase.table('seminar_group_plans').upsert(", self.source)
+        self.assertIn("repaired = repair_groups(problem, plan_groups)", self.source)
+        self.assertIn("'tag': 'plan'", self.source)
+        self.assertIn('create table public.seminar_group_plans', migration)
+        self.assertIn("'/api/admin/seminar_terms/'+b.dataset.termId+'/group_plan'", admin)
+        self.assertIn("repeat_count = planned_repeat_count(plans, _history_index().pair_counts())", self.source)
+        self.assertIn("'repeat_count': planned_repeat_count(plans, co_matrix)", self.source)
+        self.assertIn('done.repeat_count', admin)
+
+    def test_results_page_repairs_a_grouping_for_late_changes(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        self.assertIn("@app.route('/api/bookclub/repair-groups', methods=['POST'])", self.source)
+        self.assertIn('result = repair_neighborhood(problem, groups)', self.source)
+        self.assertIn('else max(1, min(len(groups), len(attendees) // MIN_GROUP_SIZE))', self.source)
+        self.assertIn("fetch('/api/bookclub/repair-groups', {", results)
+        self.assertEqual(results.count('repair-groups-btn">인원'), 2)
+
+    def test_repaired_roster_stays_on_its_own_card(self):
+        results = (ROOT / 'templates' / 'bookclub_ga_results.html').read_text(encoding='utf-8')
+        self.assertIn('function cardRoster(card)', results)
+        self.assertIn('card.dataset.present = JSON.stringify(result.present)', results)
+        self.assertIn("saveGroups(groupsObject, cardRoster(e.target.closest('.result-card-combined')))", results)
+        self.assertNotIn('present.splice(0, present.length, ...result.present)', results)
+        self.assertNotIn('facilitators.splice(0, facilitators.length, ...result.facilitators)', results)
+
+    def test_manual_editor_live_scores_through_the_shared_index(self):
+        manual = (ROOT / 'templates' / 'manual_entry.html').read_text(encoding='utf-8')
+        self.assertIn("@app.route('/api/bookclub/score-batch', methods=['POST'])", self.source)
+        self.assertIn('grouping_index.get(grouping_history_version.current())', self.source)
+        self.assertNotIn('supabase.table("bookclub_co_matrix").select("pair_key, count, last_met")', self.source)
+        self.assertIn("fetch('/api/bookclub/score-batch', {", manual)
+
 
 class AdminNavigationTests(unittest.TestCase):
     @classmethod
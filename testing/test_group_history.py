@@ -1,9 +1,12 @@
+import datetime
 import unittest
 
 from group_history import (
     canonical_pair_key,
+    day_ordinal,
+    latest_matching_grouping,
+    matrix_drift,
     matrix_rows_from_history,
-    meeting_details_from_history,
     pair_keys_from_groups,
 )
 
@@ -48,16 +51,34 @@ class GroupHistoryTests(unittest.TestCase):
         result = matrix_rows_from_history(rows)
         self.assertEqual(set(result), {'가-다'})
 
-    def test_meeting_details_include_all_dates(self):
+    def test_day_ordinal_is_the_proleptic_ordinal(self):
+        self.assertEqual(day_ordinal('2026-03-01'), datetime.date(2026, 3, 1).toordinal())
+        self.assertEqual(day_ordinal(''), 0)
+
+    def test_drift_reports_missing_stale_and_mismatched_pairs(self):
+        expected = matrix_rows_from_history([{'date': '2026-01-01', 'groups': [['가', '나', '다']]}])
+        stored = {
+            '가-나': {'pair_key': '가-나', 'count': 1, 'last_met': '2026-01-01'},
+            '가-다': {'pair_key': '가-다', 'count': 2, 'last_met': '2026-01-01'},
+            '라-마': {'pair_key': '라-마', 'count': 1, 'last_met': None},
+        }
+        drift = matrix_drift(expected, stored)
+        self.assertEqual((drift['missing_count'], drift['stale_count'], drift['mismatched_count']), (1, 1, 1))
+        self.assertEqual(drift['samples'], ['나-다', '라-마', '가-다'])
+
+    def test_latest_matching_grouping_prefers_session_then_recent_overlap(self):
         rows = [
-            {'date': '2026-01-01', 'groups': [['가', '나']]},
-            {'date': '2026-03-01', 'groups': [['나', '가']]},
+            {'date': '2026-01-01', 'groups': [['가', '나'], ['다', '라']], 'seminar_session_id': 's1'},
+            {'date': '2026-02-01', 'groups': [['가', '다'], ['나', '라']]},
+            {'date': '2026-03-01', 'groups': [['가', '마']]},
         ]
-        self.assertEqual(meeting_details_from_history(rows)['가-나'], {
-            'count': 2,
-            'last_met': '2026-03-01',
-            'dates': ['2026-03-01', '2026-01-01'],
-        })
+        attendees = ['가', '나', '다', '라']
+        self.assertEqual(latest_matching_grouping(rows, attendees), [['가', '다'], ['나', '라']])
+        self.assertEqual(
+            latest_matching_grouping(rows, attendees, seminar_session_id='s1'),
+            [['가', '나'], ['다', '라']],
+        )
+        self.assertIsNone(latest_matching_grouping(rows, ['바', '사', '아']))
 
 
 if __name__ == '__main__':
@@ -34,6 +34,7 @@ class GroupRestrictionIntegrationContracts(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         cls.app_source = (ROOT / 'app.py').read_text(encoding='utf-8')
+        cls.solver_source = (ROOT / 'grouping_solver.py').read_text(encoding='utf-8')
         cls.index_source = (ROOT / 'templates' / 'bookclub_index.html').read_text(encoding='utf-8')
         cls.topic_admin = (ROOT / 'templates' / 'admin_topic_view.html').read_text(encoding='utf-8')
         cls.migration = (ROOT / 'migrations' / '027_group_pair_restrictions.sql').read_text(encoding='utf-8')
@@ -47,7 +48,7 @@ class GroupRestrictionIntegrationContracts(unittest.TestCase):
 
     def test_solver_and_final_outputs_enforce_restrictions(self):
         self.assertIn('restricted_pairs=restricted_pairs', self.app_source)
-        self.assertIn('model.Add(x[left_index][g] + x[right_index][g] <= 1)', self.app_source)
+        self.assertIn('model.Add(x[left_index][g] + x[right_index][g] <= 1)', self.solver_source)
         self.assertIn("@app.route('/api/bookclub/validate-groups'", self.app_source)
         self.assertIn('if not _validate_groups_against_restrictions(groups):', self.app_source)
 
@@ -0,0 +1,148 @@
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from grouping_cache import GroupingResultCache, HistoryRowsCache, HistoryVersion, grouping_cache_key
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class GroupingCacheKeyTests(unittest.TestCase):
+    def test_key_ignores_input_order(self):
+        self.assertEqual(
+            grouping_cache_key(['나', '가', '다'], ['가'], None, [('다', '가')], 'combined', 3),
+            grouping_cache_key(['가', '다', '나'], ['가'], None, [('가', '다')], 'combined', 3),
+        )
+
+    def test_history_version_and_restrictions_change_the_key(self):
+        base = grouping_cache_key(['가', '나'], ['가'], 2, [], 'combined', 1)
+        self.assertNotEqual(base, grouping_cache_key(['가', '나'], ['가'], 2, [], 'combined', 2))
+        self.assertNotEqual(base, grouping_cache_key(['가', '나'], ['가'], 2, [('가', '나')], 'combined', 1))
+        self.assertNotEqual(base, grouping_cache_key(['가', '나'], ['가'], 3, [], 'combined', 1))
+
+
+class GroupingResultCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = GroupingResultCache(max_entries=2, directory='')
+        cache.put('a', [1])
+        cache.put('b', [2])
+        self.assertEqual(cache.get('a'), [1])
+        cache.put('c', [3])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), [1])
+        self.assertEqual(cache.get('c'), [3])
+
+    def test_disk_tier_survives_a_new_process_cache(self):
+        GroupingResultCache(directory=self.directory.name).put('key', [{'groups': [['가']]}])
+        fresh = GroupingResultCache(directory=self.directory.name)
+        self.assertEqual(fresh.get('key'), [{'groups': [['가']]}])
+
+    def test_disk_tier_is_bounded(self):
+        cache = GroupingResultCache(directory=self.directory.name, max_disk_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, [key])
+        fresh = GroupingResultCache(directory=self.directory.name)
+        self.assertEqual(sum(fresh.get(key) is not None for key in ('a', 'b', 'c')), 2)
+
+    def test_history_version_is_shared_through_the_directory(self):
+        first = HistoryVersion(self.directory.name)
+        second = HistoryVersion(self.directory.name)
+        self.assertEqual(first.current(), 0)
+        first.bump()
+        self.assertEqual(second.bump(), 2)
+        self.assertEqual(first.current(), 2)
+
+    def test_history_version_without_directory_stays_in_process(self):
+        version = HistoryVersion('')
+        self.assertEqual(version.bump(), 1)
+        self.assertEqual(version.current(), 1)
+
+
+class HistoryRowsCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.version = HistoryVersion(self.directory.name)
+        self.table = {
+            '1': {'id': 1, 'date': '2026-01-01', 'groups': [['가', '나']], 'seminar_session_id': 's1'},
+            '2': {'id': 2, 'date': '2026-02-01', 'groups': [['다', '라']], 'seminar_session_id': 's2'},
+        }
+        self.calls = []
+
+        def loader():
+            self.calls.append('full')
+            return list(self.table.values())
+
+        def row_loader(history_ids, session_ids):
+            self.calls.append((sorted(history_ids), sorted(session_ids)))
+            return [
+                row for key, row in self.table.items()
+                if key in history_ids or row['seminar_session_id'] in session_ids
+            ]
+
+        self.cache = HistoryRowsCache(self.version, loader, row_loader)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ids(self):
+        return sorted(row['id'] for row in self.cache.get())
+
+    def test_unchanged_version_reuses_rows_and_derived_values(self):
+        self.assertEqual(self.ids(), [1, 2])
+        self.assertEqual(self.cache.derived('count', len), 2)
+        self.cache.derived('count', lambda rows: self.fail('다시 계산하면 안 된다'))
+        self.assertEqual(self.calls, ['full'])
+
+    def test_bumped_rows_are_refetched_alone(self):
+        self.ids()
+        self.table['3'] = {'id': 3, 'date': '2026-03-01', 'groups': [['가', '다']], 'seminar_session_id': 's3'}
+        HistoryVersion(self.directory.name).bump(history_ids=[3])
+        del self.table['1']
+        self.version.bump(history_ids=['1'])
+        self.table['2'] = {**self.table['2'], 'groups': [['다']]}
+        self.version.bump(session_ids=['s2'])
+        self.assertEqual(self.ids(), [2, 3])
+        self.assertEqual([row['groups'] for row in self.cache.get() if row['id'] == 2], [[['다']]])
+        self.assertEqual(self.calls, ['full', (['1', '3'], ['s2'])])
+        self.assertEqual(self.cache.derived('count', len), 2)
+
+    def test_unknown_change_or_refresh_reloads_everything(self):
+        self.ids()
+        self.version.bump()
+        self.ids()
+        self.cache.get(refresh=True)
+        self.assertEqual(self.calls, ['full', 'full', 'full'])
+        self.assertIsNone(self.version.changes_since(0))
+
+
+class GroupingCacheAppContractTests(unittest.TestCase):
+    def test_history_writes_bump_version_and_job_uses_cache(self):
+        source = (ROOT / 'app.py').read_text(encoding='utf-8')
+        self.assertGreaterEqual(source.count('grouping_history_version.bump('), 6)
+        self.assertIn('grouping_history_version.bump(session_ids=[session_id])', source)
+        self.assertIn('grouping_results.get(cache_key)', source)
+        self.assertIn('grouping_results.put(cache_key, combined_solutions)', source)
+
+    def test_every_history_write_is_followed_by_a_bump(self):
+        lines = (ROOT / 'app.py').read_text(encoding='utf-8').splitlines()
+        writes = [
+            index for index, line in enumerate(lines)
+            if re.search(r"""table\(['"]history['"]\)\.(insert|update|delete)\(""", line)
+        ]
+        self.assertGreaterEqual(len(writes), 7)
+        for index in writes:
+            with self.subTest(line=index + 1):
+                following = '\n'.join(lines[index:index + 5])
+                self.assertIn('grouping_history_version.bump(', following)
+
+
+if __name__ == '__main__':
+    unittest.main()
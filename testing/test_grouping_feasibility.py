@@ -0,0 +1,85 @@
+import time
+import unittest
+from pathlib import Path
+
+from grouping_feasibility import find_infeasibility
+from grouping_problem import build_grouping_problem
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _problem(n, presenters=(), restricted=(), group_count=None):
+    names = [f'm{i}' for i in range(n)]
+    return build_grouping_problem(
+        names, [names[i] for i in presenters], {}, {},
+        restricted_pairs={(names[a], names[b]) for a, b in restricted},
+        group_count_override=group_count,
+    )
+
+
+class FeasibilityCheckTests(unittest.TestCase):
+    def test_ordinary_request_is_feasible(self):
+        problem = _problem(16, presenters=(0, 1, 2, 3), restricted=[(4, 5), (6, 7)])
+        self.assertEqual(find_infeasibility(problem), [])
+
+    def test_too_few_attendees_for_minimum_group_size(self):
+        conflicts = find_infeasibility(_problem(3))
+        self.assertEqual(conflicts[0]['constraint'], 'size')
+        self.assertIn('3명', conflicts[0]['message'])
+
+    def test_group_count_override_beyond_minimum_size_is_reported(self):
+        problem = _problem(12, group_count=4)
+        self.assertEqual(problem.num_groups, 3)
+        conflicts = find_infeasibility(problem)
+        self.assertEqual(conflicts[0]['constraint'], 'size')
+        self.assertIn('지정한 4개 조', conflicts[0]['message'])
+        self.assertIn('3개 조까지', conflicts[0]['message'])
+        self.assertEqual(find_infeasibility(_problem(12, group_count=3)), [])
+
+    def test_presenters_and_restrictions_form_a_clique_larger_than_group_count(self):
+        # 발제자 3명은 3개 조에 한 명씩 들어가야 하는데, m3는 세 발제자 모두와 제한되어 있다.
+        problem = _problem(12, presenters=(0, 1, 2), restricted=[(3, 0), (3, 1), (3, 2)])
+        conflicts = find_infeasibility(problem)
+        self.assertEqual(conflicts[0]['constraint'], 'restrictions')
+        self.assertEqual(sorted(conflicts[0]['members']), ['m0', 'm1', 'm2', 'm3'])
+        self.assertIn('발제자', conflicts[0]['message'])
+
+    def test_person_restricted_with_almost_everyone_cannot_fill_a_group(self):
+        problem = _problem(8, restricted=[(0, other) for other in range(1, 6)])
+        conflicts = find_infeasibility(problem)
+        self.assertEqual(conflicts[0]['members'], ['m0'])
+
+    def test_colouring_respects_group_capacity(self):
+        # 2개 조(4명씩)에서 m0~m2와 m3~m5가 서로 모두 제한되어도 남은 두 명으로 채울 수 있다.
+        feasible = _problem(8, restricted=[(a, b) for a in range(3) for b in range(3, 6)])
+        self.assertEqual(find_infeasibility(feasible), [])
+        # 한 쪽을 다섯 명으로 늘리면 조당 최대 4명을 넘는다.
+        crowded = _problem(8, restricted=[(a, b) for a in range(5) for b in range(5, 7)])
+        self.assertEqual(find_infeasibility(crowded)[0]['constraint'], 'restrictions')
+
+    def test_check_is_fast_for_large_clubs(self):
+        problem = _problem(200, presenters=range(50), restricted=[(i, i + 1) for i in range(50, 199)])
+        started = time.perf_counter()
+        self.assertEqual(find_infeasibility(problem), [])
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+
+class FeasibilityAppContractTests(unittest.TestCase):
+    def test_job_reports_infeasibility_before_running_solver(self):
+        source = (ROOT / 'app.py').read_text(encoding='utf-8')
+        job_source = source.split('def _run_grouping_job', 1)[1].split('\ndef ', 1)[0]
+        self.assertLess(job_source.index('_prepare_grouping_problem('), job_source.index('grouping_runner('))
+        helper = source.split('def _prepare_grouping_problem', 1)[1].split('\ndef ', 1)[0]
+        self.assertIn('find_infeasibility(problem)', helper)
+        # 엔진은 만들어진 문제만 받으므로 같은 검사를 다시 하지 않는다.
+        for runner in ('run_cp_grouping', 'run_pareto_grouping', 'run_local_search_grouping',
+                       'run_set_partition_grouping'):
+            body = source.split(f'def {runner}(', 1)[1].split('\ndef ', 1)[0]
+            self.assertTrue(body.startswith('problem,'))
+            self.assertNotIn('find_infeasibility', body)
+        self.assertIn("job.publish('error', {", job_source)
+
+
+if __name__ == '__main__':
+    unittest.main()
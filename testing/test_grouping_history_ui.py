@@ -14,10 +14,20 @@ class GroupingHistoryUiContracts(unittest.TestCase):
         cls.record_source = (ROOT / 'templates' / 'records_seminar_detail.html').read_text(encoding='utf-8')
 
     def test_no_shows_are_removed_from_meeting_statistics(self):
-        self.assertIn('def _effective_group_history_rows():', self.app_source)
+        self.assertIn('def _effective_group_history_rows(refresh=False):', self.app_source)
         self.assertIn("'excluded_names': sorted", self.app_source)
-        self.assertIn("_rebuild_matrix_for_session(session_id)", self.app_source)
-        self.assertIn('_meeting_details_from_history(effective_history_rows)', self.app_source)
+        self.assertIn("_apply_no_show_change(session_id, new_member_ids, excluded=True)", self.app_source)
+        self.assertIn('pair_rows = _attendee_pair_rows(present_names)', self.app_source)
+        self.assertIn("_rpc_rows(supabase, 'history_pair_counts_json', {'p_names': names})", self.app_source)
+        self.assertNotIn("supabase.rpc('history_pair_counts', {'p_names': names})", self.app_source)
+
+    def test_history_changes_recount_affected_pairs_instead_of_adding(self):
+        migration = (ROOT / 'migrations' / '032_refresh_co_matrix_pairs.sql').read_text(encoding='utf-8')
+        self.assertIn("supabase.rpc('refresh_co_matrix_pairs', {", self.app_source)
+        self.assertNotIn('_apply_history_delta', self.app_source)
+        self.assertIn("perform pg_advisory_xact_lock(hashtext('public.bookclub_co_matrix'))", migration)
+        self.assertIn('from public.history_pair_counts(p_names) c', migration)
+        self.assertIn('set count = excluded.count', migration)
 
     def test_results_show_plain_single_line_names_and_counts(self):
         self.assertIn('white-space:nowrap', self.results_source)
@@ -37,7 +47,7 @@ class GroupingHistoryUiContracts(unittest.TestCase):
     def test_inline_edit_updates_all_meeting_dates_live(self):
         self.assertIn("resultContainer.addEventListener('input'", self.results_source)
         self.assertIn('function renderMeetingHistory(group, detailsDiv, live = false)', self.results_source)
-        self.assertIn("entry.dates", self.results_source)
+        self.assertIn("entry.days.map(dayFromOrdinal)", self.results_source)
         self.assertIn('수정 중 만남 기록', self.results_source)
         self.assertIn("card.querySelector('.result-total-count').textContent = total", self.results_source)
 
@@ -47,7 +57,7 @@ class GroupingHistoryUiContracts(unittest.TestCase):
         self.assertIn('class="gender-legend"', self.index_source)
         self.assertIn('gender-tag gender-female', self.index_source)
         self.assertIn('gender-tag gender-male', self.index_source)
-        self.assertIn('function renderMemberName(name)', self.results_source)
+        self.assertIn('function renderMemberName(name, cardFacilitators = facilitators)', self.results_source)
         self.assertIn('.group-member-name.gender-male', self.results_source)
         self.assertIn('.group-member-name.gender-female', self.results_source)
 
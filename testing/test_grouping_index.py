@@ -0,0 +1,74 @@
+import unittest
+
+from group_history import matrix_rows_from_history
+from grouping_index import GroupingIndex, SharedGroupingIndex
+from grouping_problem import build_grouping_problem, score_grouping
+
+
+MEMBERS = [
+    {'name': '가', 'gender': 'M'}, {'name': '나', 'gender': 'W'}, {'name': '다', 'gender': 'M'},
+    {'name': '라', 'gender': 'W'}, {'name': '마', 'gender': None}, {'name': '바', 'gender': 'W'},
+]
+HISTORY = [
+    {'date': '2026-03-02', 'groups': [['가', '나', '다'], ['라', '마', '바']]},
+    {'date': '2026-03-09', 'groups': [['가', '나', '탈퇴회원'], ['다', '라', '마', '바']],
+     'excluded_names': ['마']},
+]
+
+
+class GroupingIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = GroupingIndex(MEMBERS, HISTORY, restricted_pairs={('가', '라')})
+
+    def test_counts_and_last_met_match_history_matrix(self):
+        for key, row in matrix_rows_from_history(HISTORY).items():
+            first, second = key.split('-')
+            i, j = self.index.index[first], self.index.index[second]
+            self.assertEqual(self.index.counts[i, j], row['count'])
+            self.assertEqual(self.index.counts[j, i], row['count'])
+        scored = self.index.score([['가', '나'], ['라', '마']])
+        self.assertEqual(scored['group_analysis'][0]['past'],
+                         [{'pair': '가 & 나', 'count': 2, 'last_met': '2026-03-09'}])
+
+    def test_score_matches_solver_score(self):
+        groups = [['가', '나', '다'], ['라', '마', '바']]
+        co_matrix = {key: row['count'] for key, row in matrix_rows_from_history(HISTORY).items()}
+        problem = build_grouping_problem([name for group in groups for name in group], [],
+                                         {row['name']: row['gender'] for row in MEMBERS}, co_matrix)
+        expected = score_grouping(problem, groups)
+        scored = self.index.score(groups)
+        self.assertEqual(scored['score'], expected['score'])
+        self.assertEqual(scored['details'], expected['details'])
+
+    def test_batch_reports_conflicts_unknown_names_and_facilitator_marks(self):
+        results = self.index.score_batch([
+            [['가*', '라', '신입'], ['나', '다']],
+            [['가', '나'], ['다', '라']],
+        ])
+        first, second = results
+        self.assertEqual(first['groups'][0], ['가', '라', '신입'])
+        self.assertEqual(first['conflict_count'], 1)
+        self.assertEqual(first['group_analysis'][0]['conflicts'], ['가 & 라'])
+        self.assertEqual(first['group_analysis'][0]['gender_balance'], {'M': 1, 'W': 1, 'Unknown': 1})
+        self.assertEqual(first['group_analysis'][0]['new_pair_count'], 3)
+        self.assertEqual(second['conflict_count'], 0)
+        self.assertEqual(second['past_pair_count'], 2)
+
+
+class SharedGroupingIndexTests(unittest.TestCase):
+    def test_index_is_rebuilt_only_when_history_version_changes(self):
+        builds = []
+
+        def loader():
+            builds.append(1)
+            return GroupingIndex(MEMBERS, HISTORY)
+
+        shared = SharedGroupingIndex(loader)
+        first = shared.get(1)
+        self.assertIs(shared.get(1), first)
+        self.assertIsNot(shared.get(2), first)
+        self.assertEqual(len(builds), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from grouping_jobs import (
+    GroupingJob,
+    GroupingJobStore,
+    JobCancelled,
+    format_sse,
+    grouping_job_key,
+)
+
+
+class GroupingJobStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = GroupingJobStore(self.directory.name, max_workers=1, result_ttl=60,
+                                      disconnect_grace=60)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def collect(self, job_id, last_event_id=None):
+        return [record for record in self.store.events(job_id, last_event_id, keep_alive=5)
+                if record is not None]
+
+    def test_events_replay_and_resume_after_last_event_id(self):
+        def runner(job):
+            job.publish('progress', {'progress': 10})
+            job.publish('solution', {'id': 0})
+            job.publish('complete', {'ranking': [0]})
+
+        job_id, created = self.store.submit('key', runner)
+        self.assertTrue(created)
+        events = self.collect(job_id)
+        self.assertEqual([record['event'] for record in events], ['progress', 'solution', 'complete'])
+        resumed = self.collect(job_id, last_event_id=0)
+        self.assertEqual([record['id'] for record in resumed], [1, 2])
+        self.assertEqual(format_sse(resumed[0]), 'id: 1\nevent: solution\ndata: {"id": 0}\n\n')
+
+    def test_identical_running_request_joins_the_same_job(self):
+        release = threading.Event()
+
+        def runner(job):
+            release.wait(5)
+            job.publish('complete', {'ranking': []})
+
+        first, created = self.store.submit('same', runner)
+        second, joined_created = self.store.submit('same', runner)
+        self.assertEqual(first, second)
+        self.assertTrue(created)
+        self.assertFalse(joined_created)
+        release.set()
+        self.collect(first)
+        for _ in range(50):
+            if self.store.is_finished(first):
+                break
+            time.sleep(0.05)
+        # 끝난 작업에는 합류하지 않고 새 작업을 만든다.
+        third, created_again = self.store.submit('same', runner)
+        self.assertNotEqual(first, third)
+        self.assertTrue(created_again)
+
+    def test_cancel_stops_runner_and_records_cancelled(self):
+        started = threading.Event()
+
+        def runner(job):
+            started.set()
+            while not job.stop_event.wait(0.05):
+                pass
+            job.raise_if_cancelled()
+
+        job_id, _ = self.store.submit('cancel', runner)
+        started.wait(5)
+        self.store.cancel(job_id)
+        self.assertEqual(self.collect(job_id)[-1]['event'], 'cancelled')
+
+    def test_runner_error_is_published(self):
+        def runner(job):
+            raise ValueError('boom')
+
+        job_id, _ = self.store.submit('error', runner)
+        events = self.collect(job_id)
+        self.assertEqual(events[-1], {'id': 0, 'event': 'error', 'data': {'error': 'boom'}})
+
+    def test_finished_jobs_expire_after_ttl(self):
+        job_id, _ = self.store.submit('ttl', lambda job: job.publish('complete', {'ranking': []}))
+        self.collect(job_id)
+        for _ in range(50):
+            if self.store.is_finished(job_id):
+                break
+            time.sleep(0.05)
+        old = time.time() - 120
+        os.utime(self.store.path(job_id, 'done'), (old, old))
+        self.store.purge_expired()
+        self.assertFalse(self.store.exists(job_id))
+
+    def test_cancel_is_counted_separately_from_dropped_listeners(self):
+        job_id, _ = self.store.submit('counted', lambda job: job.publish('complete', {'ranking': []}))
+        self.collect(job_id)
+        started = threading.Event()
+
+        def runner(job):
+            started.set()
+            while not job.stop_event.wait(0.05):
+                pass
+            job.raise_if_cancelled()
+
+        cancelled_id, _ = self.store.submit('counted-cancel', runner)
+        started.wait(5)
+        self.store.cancel(cancelled_id)
+        self.assertEqual(self.collect(cancelled_id)[-1]['data'], {'reason': 'cancel requested'})
+        metrics = self.store.metrics()
+        self.assertEqual(metrics['submitted'], 2)
+        self.assertEqual(metrics['completed'], 1)
+        self.assertEqual(metrics['cancelled'], 1)
+        self.assertNotIn('dropped', metrics)
+
+    def orphan(self, key):
+        """워커가 재시작되어 heartbeat가 끊긴 작업을 흉내 낸다."""
+        job_id = 'f' * 32
+        self.store._create_job_files(job_id, key)
+        self.store._publish_key(self.store.path(key, 'key'), job_id)
+        with self.store._owned_lock:
+            self.store._owned.discard(job_id)
+        GroupingJob(self.store, job_id).publish('progress', {'progress': 10})
+        old = time.time() - 120
+        os.utime(self.store.path(job_id, 'alive'), (old, old))
+        return job_id
+
+    def test_subscribers_of_a_lost_job_get_an_error_and_stop(self):
+        job_id = self.orphan('lost')
+        started = time.monotonic()
+        events = self.collect(job_id)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual([record['event'] for record in events], ['progress', 'error'])
+        self.assertEqual(events[-1]['id'], 1)
+        # 파일까지 지워진 작업에 다시 붙어도 예외 대신 error로 끝난다.
+        os.remove(self.store.path(job_id, 'events'))
+        self.assertEqual([record['event'] for record in self.collect(job_id, last_event_id=0)], ['error'])
+
+    def test_identical_request_does_not_join_a_lost_job(self):
+        lost_id = self.orphan('again')
+        job_id, created = self.store.submit('again', lambda job: job.publish('complete', {'ranking': []}))
+        self.assertTrue(created)
+        self.assertNotEqual(job_id, lost_id)
+        self.assertEqual(self.collect(job_id)[-1]['event'], 'complete')
+
+    def test_key_is_published_with_the_job_id_after_the_job_files(self):
+        job_id, _ = self.store.submit('published', lambda job: job.publish('complete', {'ranking': []}))
+        with open(self.store.path('published', 'key'), encoding='utf-8') as handle:
+            self.assertEqual(handle.read(), job_id)
+        self.assertTrue(self.store.exists(job_id))
+        self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith('.tmp')])
+        self.collect(job_id)
+
+    def test_job_key_ignores_order(self):
+        self.assertEqual(
+            grouping_job_key(['나', '가'], ['가'], 3, engine='cp_sat'),
+            grouping_job_key(['가', '나'], ['가'], 3, engine='cp_sat'),
+        )
+        self.assertNotEqual(
+            grouping_job_key(['가', '나'], ['가'], 3),
+            grouping_job_key(['가', '나'], ['가'], 4),
+        )
+
+    def test_cancelled_exception_is_raised_when_stop_requested(self):
+        job_id, _ = self.store.submit('flag', lambda job: None)
+        self.collect(job_id)
+        self.store.cancel(job_id)
+        with self.assertRaises(JobCancelled):
+            GroupingJob(self.store, job_id).raise_if_cancelled()
+
+
+class SolveQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = GroupingJobStore(self.directory.name, max_workers=3, result_ttl=60,
+                                      disconnect_grace=1, max_concurrent=1)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_extra_solve_waits_in_line_and_runs_after_the_first(self):
+        release = threading.Event()
+        order = []
+
+        def slow(job):
+            order.append('slow')
+            release.wait(5)
+            job.publish('complete', {'ranking': []})
+
+        def fast(job):
+            order.append('fast')
+            job.publish('complete', {'ranking': []})
+
+        first, _ = self.store.submit('slow', slow)
+        for _ in range(50):
+            if order:
+                break
+            time.sleep(0.05)
+        second, _ = self.store.submit('fast', fast)
+        events = self.store.events(second, keep_alive=5)
+        queued = next(record for record in events if record is not None)
+        self.assertEqual(queued['event'], 'queued')
+        self.assertEqual(queued['data']['position'], 1)
+        self.assertEqual(self.store.metrics()['waiting'], 1)
+        release.set()
+        self.assertEqual([record['event'] for record in events if record is not None], ['complete'])
+        self.assertEqual(order, ['slow', 'fast'])
+        self.assertGreater(self.store.metrics()['queue_wait_seconds'], 0)
+        self.store.events(first, keep_alive=5)
+
+    def test_abandoned_queued_job_is_dropped_without_running(self):
+        release = threading.Event()
+        started = threading.Event()
+        ran = []
+
+        def slow(job):
+            started.set()
+            while not release.is_set():
+                self.store.touch_listener(job.id)
+                release.wait(0.1)
+            job.publish('complete', {'ranking': []})
+
+        self.store.submit('busy', slow)
+        started.wait(5)
+        waiting_id, _ = self.store.submit('abandoned', lambda job: ran.append(job.id))
+        # 대기 중인 작업의 구독자가 disconnect_grace보다 오래 없다.
+        for _ in range(100):
+            if self.store.is_finished(waiting_id):
+                break
+            time.sleep(0.05)
+        release.set()
+        self.assertTrue(self.store.is_finished(waiting_id))
+        self.assertEqual(ran, [])
+        self.assertEqual(self.store.metrics()['dropped_while_queued'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
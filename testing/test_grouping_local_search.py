@@ -0,0 +1,169 @@
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from grouping_local_search import (
+    ProblemArrays,
+    _SearchState,
+    _construct,
+    local_search_groupings,
+    repair_groups,
+    repair_neighborhood,
+    warm_start_assignment,
+)
+from grouping_problem import build_grouping_problem, grouping_signature
+
+
+ROOT = Path(__file__).resolve().parents[1]
+NAMES = [f'회원{index:02d}' for index in range(18)]
+GENDERS = {name: ('M' if index % 3 == 0 else 'W') for index, name in enumerate(NAMES)}
+CO_MATRIX = {
+    f'회원{left:02d}-회원{right:02d}': (left + right) % 3
+    for left in range(18) for right in range(left + 1, 18)
+}
+RESTRICTED = {('회원01', '회원02'), ('회원03', '회원04')}
+
+
+def make_problem():
+    return build_grouping_problem(
+        NAMES, NAMES[:4], GENDERS, CO_MATRIX, restricted_pairs=RESTRICTED,
+    )
+
+
+class LocalSearchStateTests(unittest.TestCase):
+    def setUp(self):
+        self.problem = make_problem()
+        self.arrays = ProblemArrays(self.problem)
+        self.rng = np.random.default_rng(3)
+        self.state = _SearchState(self.arrays, _construct(self.arrays, self.rng))
+
+    def test_incremental_deltas_match_full_recomputation(self):
+        for person in range(0, self.problem.n, 4):
+            before = self.state.cost()
+            swaps = self.state.swap_deltas(person)
+            for other in np.flatnonzero(np.isfinite(swaps))[:3]:
+                trial = _SearchState(self.arrays, self.state.assignment.copy())
+                trial.apply_swap(person, int(other))
+                self.assertEqual(trial.cost() - before, swaps[other])
+                self.assertEqual(trial.cost(), _SearchState(self.arrays, trial.assignment).cost())
+            moves = self.state.move_deltas(person)
+            for target in np.flatnonzero(np.isfinite(moves)):
+                trial = _SearchState(self.arrays, self.state.assignment.copy())
+                trial.apply_move(person, int(target))
+                self.assertEqual(trial.cost() - before, moves[target])
+
+    def test_blocked_swaps_would_break_hard_constraints(self):
+        swaps = self.state.swap_deltas(1)
+        partner_group = self.state.assignment[2]
+        if self.state.assignment[1] != partner_group:
+            # 2번과 같은 조의 다른 사람과 교환하면 1번이 2번과 같은 조가 된다.
+            same_group = np.flatnonzero(self.state.assignment == partner_group)
+            for other in same_group:
+                if other != 2:
+                    self.assertTrue(np.isinf(swaps[other]))
+
+
+class WarmStartTests(unittest.TestCase):
+    def test_previous_groups_are_kept_when_still_feasible(self):
+        problem = make_problem()
+        previous = local_search_groupings(problem, top_n=1, seed=2)[0]['groups']
+        assignment = warm_start_assignment(problem, previous, polish_moves=0)
+        self.assertEqual(
+            grouping_signature(problem.groups_from_assignment(assignment)),
+            grouping_signature(previous),
+        )
+
+    def test_greedy_start_respects_hard_constraints(self):
+        problem = make_problem()
+        groups = problem.groups_from_assignment(warm_start_assignment(problem))
+        for group in groups:
+            self.assertTrue(4 <= len(group) <= 5)
+            for pair in RESTRICTED:
+                self.assertFalse(set(pair) <= set(group))
+
+
+    def test_repair_keeps_remaining_members_in_their_groups(self):
+        previous = local_search_groupings(make_problem(), top_n=1, seed=2)[0]['groups']
+        attendees = [name for name in NAMES if name != '회원17'] + ['신입']
+        problem = build_grouping_problem(
+            attendees, NAMES[:4], GENDERS, CO_MATRIX, restricted_pairs=RESTRICTED,
+        )
+        repaired = repair_groups(problem, previous)
+        self.assertEqual(sorted(name for group in repaired for name in group), sorted(attendees))
+        kept = grouping_signature([[name for name in group if name != '회원17'] for group in previous])
+        moved = grouping_signature([[name for name in group if name != '신입'] for group in repaired])
+        self.assertEqual(moved, kept)
+
+
+class RepairNeighborhoodTests(unittest.TestCase):
+    def setUp(self):
+        self.previous = local_search_groupings(make_problem(), top_n=1, seed=2)[0]['groups']
+
+    def repair(self, attendees):
+        problem = build_grouping_problem(
+            attendees, NAMES[:4], GENDERS, CO_MATRIX, restricted_pairs=RESTRICTED,
+            group_count_override=len(self.previous),
+        )
+        return repair_neighborhood(problem, self.previous, seed=1)
+
+    def test_only_changed_groups_are_resolved(self):
+        dropped = self.previous[0][-1]
+        attendees = [name for name in NAMES if name != dropped] + ['신입']
+        started = time.monotonic()
+        result = self.repair(attendees)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(sorted(name for group in result['groups'] for name in group), sorted(attendees))
+        self.assertGreaterEqual(len(result['changed_groups']), 2)
+        for index, group in enumerate(result['groups']):
+            if index not in result['changed_groups']:
+                self.assertEqual(sorted(group), sorted(self.previous[index]))
+            members = set(group)
+            self.assertTrue(4 <= len(group) <= 5)
+            self.assertLessEqual(len(members & set(NAMES[:4])), 1)
+            for pair in RESTRICTED:
+                self.assertFalse(set(pair) <= members)
+
+    def test_smallest_group_is_dissolved_when_group_count_must_drop(self):
+        smallest = min(self.previous, key=len)
+        others = [name for group in self.previous if group is not smallest for name in group]
+        dropped = {smallest[0], others[0], others[-1]}
+        attendees = [name for name in NAMES if name not in dropped]
+        result = self.repair(attendees)
+        self.assertEqual(len(result['groups']), len(self.previous) - 1)
+        self.assertEqual(sorted(name for group in result['groups'] for name in group), sorted(attendees))
+
+
+class LocalSearchGroupingsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = local_search_groupings(make_problem(), top_n=6, seed=1)
+
+    def test_results_are_distinct_and_respect_hard_constraints(self):
+        self.assertEqual(len(self.results), 6)
+        self.assertEqual(
+            len({grouping_signature(result['groups']) for result in self.results}), 6,
+        )
+        for result in self.results:
+            self.assertEqual(sorted(name for group in result['groups'] for name in group), NAMES)
+            for group in result['groups']:
+                members = set(group)
+                self.assertTrue(4 <= len(group) <= 5)
+                self.assertLessEqual(len(members & set(NAMES[:4])), 1)
+                for pair in RESTRICTED:
+                    self.assertFalse(set(pair) <= members)
+
+    def test_engine_does_not_import_ortools(self):
+        output = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, grouping_local_search; print("ortools" in sys.modules)'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        self.assertEqual(output, 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from grouping_local_search import ProblemArrays, _SearchState, local_search_groupings
+from grouping_problem import build_grouping_problem, grouping_signature
+from grouping_set_partition import (
+    generate_candidate_groups,
+    score_candidate_groups,
+    set_partition_groupings,
+)
+
+
+NAMES = [f'회원{index:02d}' for index in range(18)]
+GENDERS = {name: ('M' if index % 3 == 0 else 'W') for index, name in enumerate(NAMES)}
+CO_MATRIX = {
+    f'회원{left:02d}-회원{right:02d}': (left + right) % 3
+    for left in range(18) for right in range(left + 1, 18)
+}
+RESTRICTED = {('회원01', '회원02'), ('회원03', '회원04')}
+
+
+def make_problem():
+    return build_grouping_problem(
+        NAMES, NAMES[:4], GENDERS, CO_MATRIX, restricted_pairs=RESTRICTED,
+    )
+
+
+class CandidateGroupTests(unittest.TestCase):
+    def setUp(self):
+        self.problem = make_problem()
+        self.seeds = [result['groups'] for result in local_search_groupings(self.problem, top_n=3, seed=2)]
+
+    def test_candidates_include_seed_groups_and_alternatives(self):
+        candidates = generate_candidate_groups(self.problem, self.seeds, seed=1)
+        name_to_index = {name: index for index, name in enumerate(NAMES)}
+        for groups in self.seeds:
+            for group in groups:
+                self.assertIn(tuple(sorted(name_to_index[name] for name in group)), candidates)
+        self.assertGreater(len(candidates), sum(len(groups) for groups in self.seeds))
+
+    def test_vectorized_costs_match_search_state_cost(self):
+        candidates = generate_candidate_groups(self.problem, self.seeds, seed=1)
+        costs, feasible = score_candidate_groups(self.problem, candidates)
+        index = {members: row for row, members in enumerate(candidates)}
+        name_to_index = {name: position for position, name in enumerate(NAMES)}
+        arrays = ProblemArrays(self.problem)
+        for groups in self.seeds:
+            assignment = np.zeros(self.problem.n, dtype=np.int64)
+            rows = []
+            for group_index, group in enumerate(groups):
+                members = tuple(sorted(name_to_index[name] for name in group))
+                assignment[list(members)] = group_index
+                rows.append(index[members])
+            self.assertTrue(all(feasible[row] for row in rows))
+            self.assertEqual(sum(costs[row] for row in rows), _SearchState(arrays, assignment).cost())
+
+    def test_infeasible_candidates_are_flagged(self):
+        costs, feasible = score_candidate_groups(self.problem, [(0, 1, 5, 6), (1, 2, 5, 6), (5, 6, 7)])
+        # 발제자 두 명, 제한 쌍(회원01-회원02), 최소 인원 미달
+        self.assertEqual(feasible.tolist(), [False, False, False])
+
+
+class SetPartitionGroupingsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = set_partition_groupings(make_problem(), top_n=5, seed=1, seed_time_budget=0.5)
+
+    def test_results_are_distinct_and_respect_hard_constraints(self):
+        self.assertEqual(len(self.results), 5)
+        self.assertEqual(
+            len({grouping_signature(result['groups']) for result in self.results}), 5,
+        )
+        for result in self.results:
+            self.assertEqual(sorted(name for group in result['groups'] for name in group), NAMES)
+            for group in result['groups']:
+                members = set(group)
+                self.assertTrue(4 <= len(group) <= 5)
+                self.assertLessEqual(len(members & set(NAMES[:4])), 1)
+                for pair in RESTRICTED:
+                    self.assertFalse(set(pair) <= members)
+
+
+if __name__ == '__main__':
+    unittest.main()
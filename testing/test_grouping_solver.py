@@ -0,0 +1,280 @@
+import threading
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+import grouping_solver
+from grouping_problem import build_grouping_problem, grouping_objectives, grouping_signature
+from grouping_solver import (
+    GroupingModel,
+    _diversifying_partners,
+    available_cpu_count,
+    enumerate_groupings,
+    enumerate_groupings_parallel,
+    pareto_groupings,
+)
+
+
+NAMES = [f'회원{index:02d}' for index in range(12)]
+GENDERS = {name: ('M' if index % 2 else 'W') for index, name in enumerate(NAMES)}
+
+
+def make_problem(**kwargs):
+    options = {
+        'presenter_names': NAMES[:3],
+        'co_matrix': {'회원00-회원01': 3, '회원02-회원03': 1},
+        'restricted_pairs': {('회원04', '회원05')},
+    }
+    options.update(kwargs)
+    return build_grouping_problem(
+        NAMES, options['presenter_names'], GENDERS, options['co_matrix'],
+        restricted_pairs=options['restricted_pairs'],
+    )
+
+
+class GroupingProblemTests(unittest.TestCase):
+    def test_group_count_and_sizes_follow_minimum_four(self):
+        problem = make_problem()
+        self.assertEqual(problem.num_groups, 3)
+        self.assertEqual((problem.min_size, problem.max_size), (4, 4))
+        self.assertEqual(problem.pair_counts, {(0, 1): 3, (2, 3): 1})
+        self.assertEqual(problem.restricted_index_pairs, [(4, 5)])
+
+    def test_too_few_attendees_returns_none(self):
+        self.assertIsNone(build_grouping_problem(NAMES[:2], [], GENDERS, {}))
+
+
+class EnumerateGroupingsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.problem = make_problem()
+        cls.results = enumerate_groupings(
+            cls.problem, top_n=4, first_round_time_limit=1.0, round_time_limit=0.5,
+        )
+
+    def test_results_are_distinct_and_respect_hard_constraints(self):
+        self.assertEqual(len(self.results), 4)
+        signatures = {grouping_signature(result['groups']) for result in self.results}
+        self.assertEqual(len(signatures), 4)
+        for result in self.results:
+            groups = result['groups']
+            self.assertEqual(sorted(name for group in groups for name in group), NAMES)
+            for group in groups:
+                self.assertEqual(len(group), 4)
+                self.assertLessEqual(len(set(group) & set(NAMES[:3])), 1)
+                self.assertFalse({'회원04', '회원05'} <= set(group))
+
+    def test_solution_callback_receives_each_result_as_found(self):
+        streamed = []
+        results = enumerate_groupings(
+            self.problem, top_n=2, first_round_time_limit=1.0, round_time_limit=0.5,
+            solution_callback=streamed.append,
+        )
+        self.assertEqual(streamed, results)
+
+    def test_model_is_reused_across_rounds(self):
+        grouping_model = GroupingModel(self.problem)
+        _, assignment, _ = grouping_model.solve(seed=1, time_limit=1.0)
+        grouping_model.forbid(assignment)
+        variable_count = len(grouping_model.model.Proto().variables)
+        grouping_model.forbid(assignment)
+        # 같은 쌍의 리터럴은 한 번만 만들어지므로 두 번째 컷은 변수를 늘리지 않는다.
+        self.assertEqual(len(grouping_model.model.Proto().variables), variable_count)
+        self.assertEqual(grouping_model.cut_count, 2)
+
+
+class WarmStartTests(unittest.TestCase):
+    def test_hint_is_relabelled_to_fixed_first_group(self):
+        grouping_model = GroupingModel(make_problem())
+        # 0번 참석자가 2번 조에 있는 힌트도 x[0][0] 고정에 맞게 조 번호를 바꿔 넣는다.
+        grouping_model.hint([2, 1, 0, 2, 0, 1, 0, 1, 2, 2, 0, 1])
+        hint = grouping_model.model.Proto().solution_hint
+        values = dict(zip(hint.vars, hint.values))
+        self.assertEqual(values[grouping_model.x[0][0].Index()], 1)
+        self.assertEqual(values[grouping_model.x[2][2].Index()], 1)
+
+    def test_stalled_round_stops_before_time_limit(self):
+        grouping_model = GroupingModel(make_problem())
+        status, assignment, collector = grouping_model.solve(
+            seed=1, time_limit=20.0, stall_seconds=0.2,
+        )
+        self.assertIsNotNone(assignment)
+        self.assertLess(collector.solutions[-1]['wall_time'], 20.0)
+        self.assertLess(collector.WallTime(), 10.0)
+
+
+class PairEncodingTests(unittest.TestCase):
+    def test_pair_encoding_keeps_one_literal_per_met_pair(self):
+        co_matrix = {
+            f'회원{left:02d}-회원{right:02d}': 1
+            for left in range(12) for right in range(left + 1, 12)
+        }
+        problem = make_problem(co_matrix=co_matrix)
+        pair_model = GroupingModel(problem, pair_encoding='pair')
+        per_group_model = GroupingModel(problem, pair_encoding='per_group')
+        self.assertEqual(len(pair_model._same_group), 66)
+        # per_group은 쌍마다 그룹 수(3)만큼, pair는 쌍마다 하나의 리터럴만 만든다.
+        self.assertLess(
+            len(pair_model.model.Proto().variables),
+            len(per_group_model.model.Proto().variables),
+        )
+
+    def test_both_encodings_find_valid_distinct_groupings(self):
+        for pair_encoding in ('pair', 'per_group'):
+            with self.subTest(pair_encoding=pair_encoding):
+                results = enumerate_groupings(
+                    make_problem(), top_n=2, first_round_time_limit=1.0,
+                    round_time_limit=0.5, pair_encoding=pair_encoding,
+                )
+                self.assertEqual(len(results), 2)
+                self.assertNotEqual(
+                    grouping_signature(results[0]['groups']),
+                    grouping_signature(results[1]['groups']),
+                )
+
+    def test_unknown_encoding_is_rejected(self):
+        with self.assertRaises(ValueError):
+            GroupingModel(make_problem(), pair_encoding='matrix')
+
+
+class ParallelGroupingTests(unittest.TestCase):
+    def test_cpu_count_is_at_least_one(self):
+        self.assertGreaterEqual(available_cpu_count(), 1)
+
+    def test_partners_skip_restricted_and_prefer_new_faces(self):
+        problem = make_problem(
+            co_matrix={'회원00-회원01': 3, '회원00-회원02': 1},
+            restricted_pairs={('회원00', '회원03')},
+        )
+        partners = _diversifying_partners(problem, 11)
+        self.assertNotIn(3, partners)
+        # 회원00은 발제자이므로 다른 발제자(1, 2)와도 묶지 않는다.
+        self.assertNotIn(1, partners)
+        self.assertNotIn(2, partners)
+        self.assertEqual(partners[0], 4)
+
+    def test_pool_results_are_merged_without_duplicates(self):
+        results = enumerate_groupings_parallel(make_problem(), top_n=4, processes=2)
+        self.assertEqual(len(results), 4)
+        signatures = {grouping_signature(result['groups']) for result in results}
+        self.assertEqual(len(signatures), 4)
+        for result in results:
+            for group in result['groups']:
+                self.assertFalse({'회원04', '회원05'} <= set(group))
+
+    def test_streamed_solutions_are_the_final_results(self):
+        # 프로세스마다 ceil(3/2)=2개를 찾아도 스트리밍은 top_n개에서 멈춰야 한다.
+        streamed = []
+        results = enumerate_groupings_parallel(
+            make_problem(), top_n=3, processes=2, solution_callback=streamed.append,
+        )
+        self.assertEqual(len(streamed), 3)
+        self.assertEqual(
+            sorted(grouping_signature(result['groups']) for result in streamed),
+            sorted(grouping_signature(result['groups']) for result in results),
+        )
+
+
+class _Manager:
+    def Event(self):
+        return threading.Event()
+
+
+class _InlinePool:
+    """submit을 그 자리에서 실행하는 풀. broken이면 자식 프로세스가 죽은 것처럼 실패한다."""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.calls = []
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        self.calls.append(args)
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool('child died'))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+class ProcessPoolTests(unittest.TestCase):
+    def test_finished_search_signals_running_subproblems_to_stop(self):
+        pool = _InlinePool()
+        with mock.patch.object(grouping_solver, '_get_process_pool', return_value=(pool, _Manager())):
+            results = enumerate_groupings_parallel(make_problem(), top_n=2, processes=2)
+        self.assertEqual(len(results), 2)
+        stop_events = {id(args[-1]): args[-1] for args in pool.calls}
+        self.assertEqual(len(stop_events), 1)
+        self.assertTrue(all(event.is_set() for event in stop_events.values()))
+
+    def test_broken_pool_is_discarded_and_search_finishes_sequentially(self):
+        pool = _InlinePool(broken=True)
+        streamed = []
+        with mock.patch.object(grouping_solver, '_process_pool', pool), \
+                mock.patch.object(grouping_solver, '_get_process_pool', return_value=(pool, _Manager())):
+            results = enumerate_groupings_parallel(
+                make_problem(), top_n=3, processes=2, solution_callback=streamed.append,
+            )
+            self.assertIsNone(grouping_solver._process_pool)
+        self.assertTrue(pool.shut_down)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(streamed), 3)
+
+    def test_pool_size_does_not_depend_on_the_request(self):
+        with mock.patch.object(grouping_solver, '_process_pool', None), \
+                mock.patch.object(grouping_solver, '_process_manager', _Manager()), \
+                mock.patch.object(grouping_solver, 'ProcessPoolExecutor') as executor:
+            first, _ = grouping_solver._get_process_pool()
+            second, _ = grouping_solver._get_process_pool()
+        self.assertIs(first, second)
+        self.assertEqual(executor.call_count, 1)
+
+
+class ParetoTests(unittest.TestCase):
+    """여자 넷(0~3), 남자 넷(4~7)이고 남녀는 이미 여러 번 만났다.
+
+    성비를 맞출수록 재만남이 늘어나므로 2:2 / 3:1 / 4:0 세 절충안이 모두 전선에 있다.
+    """
+
+    def setUp(self):
+        names = NAMES[:8]
+        genders = {name: ('W' if index < 4 else 'M') for index, name in enumerate(names)}
+        co_matrix = {
+            f'{names[left]}-{names[right]}': 3 for left in range(4) for right in range(4, 8)
+        }
+        self.problem = build_grouping_problem(names, [], genders, co_matrix)
+
+    def test_front_is_tagged_and_trades_gender_for_new_faces(self):
+        results = pareto_groupings(self.problem, points=3, time_limit=2.0, stall_seconds=None)
+        self.assertEqual([result['tag'] for result in results],
+                         ['gender_first', 'balanced', 'new_face_first'])
+        imbalances = [result['objectives']['gender_imbalance'] for result in results]
+        penalties = [result['objectives']['repeat_penalty'] for result in results]
+        self.assertEqual(imbalances, [0, 4, 8])
+        self.assertEqual(penalties, sorted(penalties, reverse=True))
+        self.assertEqual(penalties[-1], 0)
+        for result in results:
+            self.assertEqual(
+                grouping_objectives(self.problem, result['groups']),
+                (result['objectives']['gender_imbalance'], result['objectives']['repeat_penalty']),
+            )
+
+    def test_cap_bounds_objective_without_rebuilding_model(self):
+        grouping_model = GroupingModel(self.problem)
+        grouping_model.use_objective('new_face')
+        grouping_model.cap('gender', 0)
+        _, assignment, _ = grouping_model.solve(seed=1, time_limit=2.0, stall_seconds=None)
+        groups = self.problem.groups_from_assignment(assignment)
+        self.assertEqual(grouping_objectives(self.problem, groups)[0], 0)
+        grouping_model.cap('gender', None)
+        _, assignment, _ = grouping_model.solve(seed=1, time_limit=2.0, stall_seconds=None)
+        groups = self.problem.groups_from_assignment(assignment)
+        self.assertEqual(grouping_objectives(self.problem, groups), (8, 0))
+
+if __name__ == '__main__':
+    unittest.main()
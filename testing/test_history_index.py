@@ -0,0 +1,50 @@
+import unittest
+
+from group_history import matrix_rows_from_history
+from history_index import HistoryIndex
+
+
+HISTORY = [
+    {'id': 1, 'date': '2026-01-01', 'groups': [['가', '나', '다'], ['라', '탈퇴']], 'facilitators': ['가']},
+    {'id': 2, 'date': '2026-03-01', 'groups': [['나', '가', '라']], 'excluded_names': ['라'],
+     'facilitators': ['나', '라']},
+    {'id': 3, 'date': '2026-02-01', 'groups': [['다', '라', '가']]},
+    {'id': 4, 'date': '2025-12-01', 'groups': ['가', '마']},
+]
+
+
+class HistoryIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = HistoryIndex(HISTORY)
+
+    def test_pair_counts_match_the_full_history_scan(self):
+        expected = matrix_rows_from_history(HISTORY)
+        self.assertEqual(self.index.pair_counts(), {key: row['count'] for key, row in expected.items()})
+
+    def test_pair_rows_mirror_the_sql_function_format(self):
+        rows = self.index.pair_rows(['가', '다', '없음'])
+        self.assertEqual(rows, [{
+            'pair_key': '가-다', 'count': 2, 'last_met': '2026-02-01', 'days': ['2026-02-01', '2026-01-01'],
+        }])
+        self.assertEqual(len(self.index.pair_rows()), len(matrix_rows_from_history(HISTORY)))
+
+    def test_attendance_counts_keep_no_shows_and_name_only_rows(self):
+        counts = self.index.member_counts()
+        self.assertEqual(counts['가'], (4, 1))
+        self.assertEqual(counts['라'], (3, 1))
+        self.assertEqual(counts['마'], (1, 0))
+        records = self.index.member_records('나')
+        self.assertEqual([(row['id'], is_fac) for row, is_fac in records], [(2, True), (1, False)])
+        self.assertEqual(self.index.member_records('없음'), [])
+
+    def test_row_summaries_follow_term_range_newest_first(self):
+        summaries = self.index.row_summaries('2026-01-01', '2026-02-28')
+        self.assertEqual(
+            [(row['id'], present, groups, facilitators) for row, present, groups, facilitators in summaries],
+            [(3, 3, 1, 0), (1, 5, 2, 1)],
+        )
+        self.assertEqual(len(self.index.row_summaries()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
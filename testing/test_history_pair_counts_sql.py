@@ -0,0 +1,246 @@
+"""migrations/031~033(history_pair_counts, refresh_co_matrix_pairs, history_pair_counts_json)을
+로컬 Postgres에서 파이썬 계산과 맞춰 본다.
+
+Docker 없이 설치된 Postgres의 빈 데이터베이스 하나면 된다. 표·역할은 트랜잭션 안에서
+만들고 끝나면 되돌리므로 데이터베이스에는 아무것도 남지 않는다.
+
+    createdb bookclub_sql_test
+    LOCAL_POSTGRES_DSN=postgresql:///bookclub_sql_test python -m unittest testing.test_history_pair_counts_sql
+
+LOCAL_POSTGRES_DSN이 없거나 psycopg(3 또는 2)가 설치되어 있지 않으면 건너뛴다.
+"""
+
+import json
+import os
+import pathlib
+import threading
+import unittest
+import uuid
+
+from history_index import HistoryIndex
+
+try:
+    import psycopg as _pg
+except ImportError:
+    try:
+        import psycopg2 as _pg
+    except ImportError:
+        _pg = None
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+MIGRATIONS = [
+    ROOT / 'migrations' / '031_history_pair_counts.sql',
+    ROOT / 'migrations' / '032_refresh_co_matrix_pairs.sql',
+    ROOT / 'migrations' / '033_history_pair_counts_json.sql',
+]
+DSN = os.environ.get('LOCAL_POSTGRES_DSN')
+
+SESSION = str(uuid.uuid4())
+MEMBERS = [(1, '가'), (2, '나'), (3, ' 다 ')]
+NO_SHOWS = [(SESSION, 2, None), (SESSION, 3, '2026-03-02T00:00:00+09:00')]
+HISTORY = [
+    (1, '2026-01-01', [['가', '나', '다'], ['라', ' 마 ', '']], None),
+    (2, '2026-03-01', [['나', '가', 'B', 'a', '다']], SESSION),
+    (3, '2026-02-01', [['다', '가', '가']], None),
+    (4, '2025-12-01', ['가', '나'], None),
+    (5, '2026-01-01', [['가', '나']], None),
+]
+
+SCHEMA = """
+do $$ begin
+  if not exists (select 1 from pg_roles where rolname = 'anon') then create role anon; end if;
+  if not exists (select 1 from pg_roles where rolname = 'authenticated') then create role authenticated; end if;
+  if not exists (select 1 from pg_roles where rolname = 'service_role') then create role service_role; end if;
+end $$;
+create table public.members (id bigint primary key, name text);
+create table public.seminar_no_shows (session_id uuid, member_id bigint, cancelled_at timestamptz);
+create table public.history (id bigint primary key, date date, groups jsonb, seminar_session_id uuid);
+create table public.bookclub_co_matrix (
+  id bigserial primary key, pair_key text not null unique, count integer, last_met date
+);
+"""
+
+
+def _function_sql():
+    """마이그레이션의 begin/commit을 떼어 테스트 트랜잭션 안에서 실행한다."""
+    bodies = [path.read_text(encoding='utf-8').strip() for path in MIGRATIONS]
+    return '\n'.join(body.removeprefix('begin;').removesuffix('commit;') for body in bodies)
+
+
+def _load_fixture(cursor):
+    cursor.execute(SCHEMA)
+    cursor.executemany('insert into public.members values (%s, %s)', MEMBERS)
+    cursor.executemany('insert into public.seminar_no_shows values (%s, %s, %s)', NO_SHOWS)
+    cursor.executemany(
+        'insert into public.history values (%s, %s, %s::jsonb, %s)',
+        [(history_id, date, json.dumps(groups), session) for history_id, date, groups, session in HISTORY],
+    )
+    cursor.execute(_function_sql())
+
+
+def _refresh(cursor, names, pair_keys):
+    cursor.execute('select public.refresh_co_matrix_pairs(%s, %s)', (names, pair_keys))
+    result = cursor.fetchone()[0]
+    return json.loads(result) if isinstance(result, str) else result
+
+
+def _stored(cursor):
+    cursor.execute('select pair_key, count, last_met from public.bookclub_co_matrix')
+    return {
+        pair_key: (count, last_met.isoformat() if last_met else None)
+        for pair_key, count, last_met in cursor.fetchall()
+    }
+
+
+def _expected(names, pair_keys, history=HISTORY):
+    return {
+        row['pair_key']: (row['count'], row['last_met'])
+        for row in _python_rows(names, history) if row['pair_key'] in pair_keys
+    }
+
+
+def _python_rows(names=None, history=HISTORY):
+    """앱이 RPC 대신 쓰는 HistoryIndex.pair_rows 결과(미연락 불참자 반영)."""
+    member_name = {member_id: name.strip() for member_id, name in MEMBERS}
+    excluded = [member_name[member_id] for session, member_id, cancelled in NO_SHOWS if cancelled is None]
+    rows = [
+        {
+            'id': history_id, 'date': date, 'groups': groups,
+            'excluded_names': excluded if session == SESSION else [],
+        }
+        for history_id, date, groups, session in history
+    ]
+    return HistoryIndex(rows).pair_rows(names)
+
+
+def _database_dsn(database):
+    """DSN의 데이터베이스 이름만 바꾼다(postgresql://…/이름?옵션 형식)."""
+    prefix, _, rest = DSN.partition('://')
+    location, _, query = rest.partition('?')
+    host = location.split('/', 1)[0]
+    return f"{prefix}://{host}/{database}" + (f'?{query}' if query else '')
+
+
+def _as_set(rows):
+    return {(row['pair_key'], row['count'], row['last_met'], tuple(row['days'])) for row in rows}
+
+
+@unittest.skipUnless(DSN and _pg, 'LOCAL_POSTGRES_DSN과 psycopg가 있어야 실행한다')
+class HistoryPairCountsSqlTests(unittest.TestCase):
+    def setUp(self):
+        self.connection = _pg.connect(DSN)
+        self.cursor = self.connection.cursor()
+        _load_fixture(self.cursor)
+
+    def tearDown(self):
+        self.connection.rollback()
+        self.connection.close()
+
+    def _sql_rows(self, names=None):
+        self.cursor.execute(
+            'select pair_key, count, last_met, days from public.history_pair_counts(%s)', (names,),
+        )
+        return [
+            {
+                'pair_key': pair_key, 'count': count,
+                'last_met': last_met.isoformat() if last_met else None,
+                'days': [day.isoformat() for day in days],
+            }
+            for pair_key, count, last_met, days in self.cursor.fetchall()
+        ]
+
+    def test_all_pairs_match_python(self):
+        self.assertEqual(_as_set(self._sql_rows()), _as_set(_python_rows()))
+
+    def test_attendee_subset_matches_python(self):
+        names = ['가', '다', 'B', 'a']
+        self.assertEqual(_as_set(self._sql_rows(names)), _as_set(_python_rows(names)))
+        self.assertIn('B-a', {row['pair_key'] for row in self._sql_rows(names)})
+
+    def test_json_wrapper_returns_every_row_with_its_count(self):
+        names = ['가', '다', 'B', 'a']
+        for argument in (None, names):
+            self.cursor.execute('select public.history_pair_counts_json(%s)', (argument,))
+            result = self.cursor.fetchone()[0]
+            result = json.loads(result) if isinstance(result, str) else result
+            self.assertEqual(result['row_count'], len(result['rows']))
+            self.assertEqual(_as_set(result['rows']), _as_set(_python_rows(argument)))
+        self.cursor.execute('select public.history_pair_counts_json(%s)', (['없는 이름'],))
+        result = self.cursor.fetchone()[0]
+        self.assertEqual(json.loads(result) if isinstance(result, str) else result, {'rows': [], 'row_count': 0})
+
+    def test_refresh_overwrites_affected_pairs_from_history(self):
+        self.cursor.executemany(
+            'insert into public.bookclub_co_matrix (pair_key, count, last_met) values (%s, %s, %s)',
+            [('가-다', 7, '2020-01-01'), ('가-나', 1, None), ('나-라', 3, '2026-01-01'), ('라-마', 9, None)],
+        )
+        names = ['가', '나', '다', '라']
+        pair_keys = ['가-나', '가-다', '나-라']
+        result = _refresh(self.cursor, names, pair_keys)
+
+        stored = _stored(self.cursor)
+        self.assertEqual({key: stored[key] for key in pair_keys if key in stored}, _expected(names, pair_keys))
+        self.assertNotIn('나-라', stored)
+        # 넘기지 않은 쌍은 건드리지 않는다.
+        self.assertEqual(stored['라-마'], (9, None))
+        self.assertEqual(result, {'pair_count': 2, 'removed_count': 1})
+        # 다시 불러도 같은 값이다(더하지 않고 덮어쓴다).
+        _refresh(self.cursor, names, pair_keys)
+        self.assertEqual(_stored(self.cursor), stored)
+
+
+@unittest.skipUnless(DSN and _pg, 'LOCAL_POSTGRES_DSN과 psycopg가 있어야 실행한다')
+class RefreshCoMatrixConcurrencyTests(unittest.TestCase):
+    """두 연결이 같은 쌍을 고칠 때 나중 호출이 앞 호출을 기다렸다가 커밋된 기록으로 덮어쓰는지 본다.
+
+    연결 여러 개가 같은 표를 봐야 하므로 임시 데이터베이스를 만들어 커밋하고 끝나면 지운다.
+    """
+
+    def setUp(self):
+        self.database = f'bookclub_sql_test_{uuid.uuid4().hex[:12]}'
+        self.admin = _pg.connect(DSN)
+        self.admin.autocommit = True
+        self.admin.cursor().execute(f'create database {self.database}')
+        self.dsn = _database_dsn(self.database)
+        with _pg.connect(self.dsn) as connection:
+            _load_fixture(connection.cursor())
+
+    def tearDown(self):
+        self.admin.cursor().execute(f'drop database if exists {self.database}')
+        self.admin.close()
+
+    def test_concurrent_refreshes_end_with_the_committed_history(self):
+        names = ['가', '나', '다']
+        pair_keys = ['가-나', '가-다', '나-다']
+        new_record = (6, '2026-04-01', [['가', '나', '다']], None)
+        first = _pg.connect(self.dsn)
+        second = _pg.connect(self.dsn)
+        try:
+            # 첫 연결이 잠금을 잡은 채 옛 이력으로 고쳐 둔다.
+            _refresh(first.cursor(), names, pair_keys)
+            # 그사이 다른 요청이 새 기록을 커밋하고 같은 쌍을 고치려 한다.
+            with second.cursor() as cursor:
+                cursor.execute(
+                    'insert into public.history values (%s, %s, %s::jsonb, null)',
+                    (new_record[0], new_record[1], json.dumps(new_record[2])),
+                )
+            second.commit()
+            waiting = threading.Thread(target=lambda: (_refresh(second.cursor(), names, pair_keys), second.commit()))
+            waiting.start()
+            waiting.join(0.5)
+            self.assertTrue(waiting.is_alive(), '첫 호출이 끝나기 전에 두 번째 호출이 표를 고쳤다')
+            first.commit()
+            waiting.join(10)
+            self.assertFalse(waiting.is_alive())
+
+            with first.cursor() as cursor:
+                stored = _stored(cursor)
+        finally:
+            first.close()
+            second.close()
+        self.assertEqual(stored, _expected(names, pair_keys, HISTORY + [new_record]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from query_coalescing import CoalescingClient, QueryScope
+
+
+class _Builder:
+    """보낸 호출 사슬을 기록하고 members 표를 흉내 내는 postgrest 빌더 대역."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.calls = []
+        self.negate = False
+
+    def __getattr__(self, name):
+        if name == 'not_':
+            self.negate = True
+            return self
+
+        def call(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return call
+
+    def execute(self):
+        self.client.sent.append((self.table, self.calls, self.negate))
+        rows = [dict(row) for row in self.client.rows]
+        for name, args in self.calls:
+            if name == 'eq':
+                rows = [row for row in rows if row[args[0]] == args[1]]
+            elif name == 'in_':
+                rows = [row for row in rows if row[args[0]] in args[1]]
+        return type('Response', (), {'data': rows, 'count': len(rows)})()
+
+
+class _Client:
+    def __init__(self):
+        self.rows = [
+            {'id': 1, 'name': '가', 'is_active': True},
+            {'id': 2, 'name': '나', 'is_active': True},
+            {'id': 3, 'name': '다', 'is_active': False},
+        ]
+        self.sent = []
+
+    def table(self, name):
+        return _Builder(self, name)
+
+    def rpc(self, name, params):
+        self.sent.append(('rpc', name, params))
+
+
+class QueryCoalescingTests(unittest.TestCase):
+    def setUp(self):
+        self.raw = _Client()
+        self.scope = QueryScope()
+        self.client = CoalescingClient(self.raw, lambda: self.scope)
+
+    def test_identical_reads_are_sent_once_and_copied(self):
+        first = self.client.table('members').select('id, name').eq('is_active', True).execute().data
+        first[0]['name'] = '바뀜'
+        second = self.client.table('members').select('id, name').eq('is_active', True).execute().data
+        self.assertEqual([row['name'] for row in second], ['가', '나'])
+        self.client.table('members').select('id').eq('is_active', True).execute()
+        self.assertEqual(len(self.raw.sent), 2)
+        self.assertEqual(self.scope.stats(), {'issued': 2, 'hits': 1, 'merged': 0})
+
+    def test_in_lookups_merge_and_fetch_only_new_values(self):
+        self.client.table('members').select('id, name').in_('id', [1, 2]).execute()
+        rows = self.client.table('members').select('id, name').in_('id', [2, 3]).execute().data
+        self.assertEqual([row['id'] for row in rows], [2, 3])
+        self.assertEqual(self.raw.sent[-1][1], [('select', ('id, name',)), ('in_', ('id', [3]))])
+        self.client.table('members').select('id, name').in_('id', ['3', 1]).execute()
+        self.assertEqual(len(self.raw.sent), 2)
+        self.assertEqual(self.scope.stats(), {'issued': 2, 'hits': 1, 'merged': 3})
+
+    def test_writes_and_rpc_forget_and_property_steps_replay(self):
+        query = lambda: self.client.table('members').select('id').not_.is_('name', 'null').execute()
+        query()
+        self.assertTrue(self.raw.sent[-1][2])
+        self.client.table('members').update({'name': '라'}).eq('id', 1).execute()
+        query()
+        self.client.rpc('noop', {})
+        query()
+        self.assertEqual(self.scope.stats()['issued'], 3)
+
+    def test_outside_a_request_nothing_is_remembered(self):
+        client = CoalescingClient(self.raw, lambda: None)
+        for _ in range(2):
+            client.table('members').select('id').execute()
+        self.assertEqual(len(self.raw.sent), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,7 +41,7 @@ class RecordsAnalyticsAttendanceTest(unittest.TestCase):
             self.app_source.index("def records_analytics"):
             self.app_source.index("from boards import init_board_routes")
         ]
-        self.assertIn("select('id, date, genre, present, book_title')", route)
+        self.assertIn("'history', 'id, date, genre, present, book_title'", route)
         self.assertIn("min_attendance = max(1, min(", route)
         self.assertIn("below_minimum", route)
         self.assertIn("member.get('is_active')", route)
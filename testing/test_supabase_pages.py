@@ -0,0 +1,118 @@
+import unittest
+from pathlib import Path
+
+from supabase_pages import iter_rows, read_all, rpc_rows
+
+
+class _Query:
+    """select/gt/gte/order/limit만 흉내 내고 max_rows에서 응답을 자르는 PostgREST 대역."""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.size = None
+        self.key = None
+
+    def select(self, columns):
+        self.table.selects.append(columns)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def order(self, column):
+        self.key = column
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        self.table.requests += 1
+        rows = [row for row in self.table.rows if all(check(row) for check in self.filters)]
+        if self.key:
+            rows.sort(key=lambda row: row[self.key])
+        rows = rows[:min(self.size or len(rows), self.table.max_rows)]
+        return type('Result', (), {'data': rows})()
+
+
+class _Client:
+    def __init__(self, rows, max_rows=1000):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.requests = 0
+        self.selects = []
+
+    def table(self, name):
+        return _Query(self)
+
+    def rpc(self, function, params):
+        return _Rpc(self.rpc_data)
+
+
+class _Rpc:
+    """RPC 응답(값 하나 또는 행 목록)을 그대로 돌려주는 대역."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+
+class SupabasePagesTests(unittest.TestCase):
+    def test_reads_past_the_server_row_cap_in_key_order(self):
+        client = _Client([{'id': n, 'date': f'2026-{n % 12 + 1:02d}-01'} for n in range(2500, 0, -1)])
+        rows = read_all(client, 'history', 'date', page_size=400)
+        self.assertEqual([row['id'] for row in rows], list(range(1, 2501)))
+        self.assertEqual(client.requests, 7)
+        self.assertEqual(client.selects[0], 'date, id')
+
+    def test_filters_apply_to_every_page_and_rows_stream(self):
+        client = _Client([{'pair_key': f'p{n:04d}', 'count': n} for n in range(30)])
+        rows = iter_rows(client, 'bookclub_co_matrix', 'pair_key, count', key='pair_key', page_size=4,
+                         where=lambda q: q.gte('count', 10))
+        self.assertEqual(next(rows)['pair_key'], 'p0010')
+        self.assertEqual(client.requests, 1)
+        self.assertEqual(len(list(rows)), 19)
+
+    def test_rpc_rows_returns_the_whole_result(self):
+        client = _Client([])
+        client.rpc_data = {'rows': [{'pair_key': '가-나'}], 'row_count': 1}
+        self.assertEqual(rpc_rows(client, 'history_pair_counts_json', {'p_names': ['가', '나']}),
+                         [{'pair_key': '가-나'}])
+        client.rpc_data = {'rows': [], 'row_count': 0}
+        self.assertEqual(rpc_rows(client, 'history_pair_counts_json'), [])
+
+    def test_rpc_rows_rejects_truncated_responses(self):
+        client = _Client([])
+        # 행 집합 RPC 응답은 max-rows에서 잘려도 알 수 없으므로 받지 않는다.
+        client.rpc_data = [{'pair_key': f'p{n:04d}'} for n in range(1000)]
+        with self.assertRaises(ValueError):
+            rpc_rows(client, 'history_pair_counts_json')
+        client.rpc_data = {'rows': [{'pair_key': f'p{n:04d}'} for n in range(1000)], 'row_count': 1780}
+        with self.assertRaises(ValueError):
+            rpc_rows(client, 'history_pair_counts_json')
+        client.rpc_data = None
+        with self.assertRaises(ValueError):
+            rpc_rows(client, 'history_pair_counts_json')
+
+
+class MemberReadContracts(unittest.TestCase):
+    def test_grouping_and_term_plan_jobs_page_the_member_table(self):
+        source = (Path(__file__).resolve().parents[1] / 'app.py').read_text(encoding='utf-8')
+        self.assertNotIn('supabase.table("members").select("*").order("name")', source)
+        self.assertIn("members_res = sorted(_read_all(supabase, 'members', '*')", source)
+        self.assertIn("_read_all(supabase, 'members', 'id, name, student_id, gender',", source)
+        self.assertNotIn(".eq('is_active', True).order('name').execute().data or []\n"
+                         "    sessions = _term_plan_sessions", source)
+
+
+if __name__ == '__main__':
+    unittest.main()
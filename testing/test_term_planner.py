@@ -0,0 +1,63 @@
+import unittest
+
+from term_planner import expected_session_attendees, plan_term_groupings, planned_repeat_count
+
+
+NAMES = [f'회원{index:02d}' for index in range(16)]
+GENDERS = {name: ('M' if index % 2 else 'W') for index, name in enumerate(NAMES)}
+
+
+def make_sessions(count):
+    return [
+        {
+            'id': f'session-{index}',
+            'meeting_date': f'2026-03-{index + 2:02d}',
+            'attendees': NAMES,
+            'facilitators': NAMES[index % 4:index % 4 + 4],
+        }
+        for index in range(count)
+    ]
+
+
+class ExpectedAttendeesTests(unittest.TestCase):
+    def test_absence_only_counts_everyone_who_did_not_report_absence(self):
+        session = {'participation_mode': 'absence_only'}
+        self.assertEqual(expected_session_attendees(session, {1, 2, 3}, {9}, {2}), {1, 3})
+
+    def test_vote_modes_count_only_active_yes_votes(self):
+        for mode in ('opt_in', 'legacy_explicit', None):
+            session = {'participation_mode': mode}
+            self.assertEqual(expected_session_attendees(session, {1, 2, 3}, {2, 9}, {1}), {2})
+
+
+class PlanTermGroupingsTests(unittest.TestCase):
+    def test_later_sessions_avoid_pairs_planned_earlier(self):
+        sessions = make_sessions(3)
+        plans = plan_term_groupings(list(reversed(sessions)), GENDERS, {}, seed=1, time_budget=0.5)
+        self.assertEqual([plan['session_id'] for plan in plans], [s['id'] for s in sessions])
+        for plan in plans:
+            self.assertEqual(sorted(name for group in plan['groups'] for name in group), NAMES)
+            for group in plan['groups']:
+                self.assertLessEqual(len(set(group) & set(plan['facilitators'])), 1)
+        # 회차마다 따로 짜면(앞 초안을 만남 기록에 더하지 않으면) 같은 쌍이 더 자주 다시 만난다.
+        independent = [
+            plan_term_groupings([session], GENDERS, {}, seed=1 + index, time_budget=0.5)[0]
+            for index, session in enumerate(sessions)
+        ]
+        self.assertLess(planned_repeat_count(plans, {}), planned_repeat_count(independent, {}))
+        self.assertLessEqual(planned_repeat_count(plans, {}), 4)
+
+    def test_session_that_cannot_be_grouped_is_reported_and_skipped(self):
+        sessions = make_sessions(2)
+        sessions[0]['attendees'] = NAMES[:2]
+        seen = []
+        plans = plan_term_groupings(sessions, GENDERS, {}, time_budget=0.3,
+                                    session_callback=lambda plan, done: seen.append(done))
+        self.assertIn('error', plans[0])
+        self.assertEqual(plans[0]['groups'], [])
+        self.assertTrue(plans[1]['groups'])
+        self.assertEqual(seen, [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()